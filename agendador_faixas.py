@@ -0,0 +1,61 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Faixas de prioridade (menor = mais urgente)
+FAIXA_ACESSO = 0     # inserir / ativar / set_classes de quem está sem acesso
+FAIXA_BLOQUEIO = 1   # desativações e limpeza de fantasmas
+FAIXA_CADASTRO = 2   # nome e e-mail
+
+NOMES_FAIXAS = {FAIXA_ACESSO: "ACESSO", FAIXA_BLOQUEIO: "BLOQUEIO", FAIXA_CADASTRO: "CADASTRO"}
+
+# Concorrência máxima de cada faixa dentro do pool
+LIMITES_PADRAO = {FAIXA_ACESSO: 20, FAIXA_BLOQUEIO: 10, FAIXA_CADASTRO: 5}
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+class AgendadorFaixas:
+    """
+    Executa tarefas em um único pool respeitando prioridade estrita entre faixas
+    (sempre despacha da faixa mais urgente com vaga) e um teto de concorrência por faixa.
+    Registra, por faixa, o tempo desde o início do agendamento até cada conclusão.
+    """
+    def __init__(self, max_workers=20, limites=None):
+        self.max_workers = max_workers
+        self.limites = dict(LIMITES_PADRAO if limites is None else limites)
+        self.tempos = {faixa: [] for faixa in self.limites}
+
+    def executar(self, tarefas):
+        """tarefas: iterável de (faixa, chave, func, args). Gera (chave, futuro) conforme concluem."""
+        filas = {faixa: deque() for faixa in sorted(self.limites)}
+        for faixa, chave, func, args in tarefas:
+            filas[faixa].append((chave, func, args))
+
+        em_voo = {faixa: 0 for faixa in filas}
+        ativos = {}
+        inicio = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while ativos or any(filas.values()):
+                # Preenche as vagas livres pela ordem de prioridade
+                for faixa, fila in filas.items():
+                    while fila and len(ativos) < self.max_workers and em_voo[faixa] < self.limites[faixa]:
+                        chave, func, args = fila.popleft()
+                        ativos[executor.submit(func, *args)] = (faixa, chave)
+                        em_voo[faixa] += 1
+
+                concluidos, _ = wait(ativos, return_when=FIRST_COMPLETED)
+                agora = time.monotonic()
+                for futuro in concluidos:
+                    faixa, chave = ativos.pop(futuro)
+                    em_voo[faixa] -= 1
+                    self.tempos[faixa].append(agora - inicio)
+                    yield chave, futuro
+
+    def resumo(self, faixa):
+        tempos = self.tempos.get(faixa, [])
+        return {"n": len(tempos), "p50": _percentil(tempos, 50), "p95": _percentil(tempos, 95), "max": max(tempos, default=0.0)}
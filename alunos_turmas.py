@@ -1,7 +1,8 @@
-import requests
+from cliente_lize import ClienteLize
 import os
 from dotenv import load_dotenv
 from constantes import HEADERS, ANO_LETIVO_ATUAL
+from snapshot_lize import max_idade_argv
 
 # Carregar variáveis de ambiente do arquivo config.env
 load_dotenv("config.env")
@@ -10,20 +11,14 @@ load_dotenv("config.env")
 token = os.getenv("API_TOKEN")
 HEADERS = {"Authorization": f"{token}", "Accept": "application/json"}
 
+cliente = ClienteLize("staging", headers=HEADERS)
+
+# Varreduras com até MAX_IDADE segundos vêm do snapshot local (--max-idade MIN; 0 = sempre da API)
+MAX_IDADE = max_idade_argv()
+
 # Função para obter todas as turmas
 def obter_todas_turmas():
-    url = f"https://staging.lizeedu.com.br/api/v2/classes/?school_year={ANO_LETIVO_ATUAL}"
-    turmas = []
-
-    while url:
-        response = requests.get(url, headers=HEADERS)
-        if response.status_code == 200:
-            data = response.json()
-            turmas.extend(data["results"])  # Adiciona os resultados da página atual à lista
-            url = data.get("next")  # Atualiza a URL para a próxima página (se houver)
-        else:
-            print("Erro ao buscar turmas:", response.status_code, response.text)
-            break  # Para a execução em caso de erro
+    turmas = list(cliente.paginar("classes/", {"school_year": ANO_LETIVO_ATUAL}, max_idade=MAX_IDADE))
 
     # Exibir o total de turmas coletadas
     print(f"Total de turmas coletadas: {len(turmas)}")
@@ -31,19 +26,8 @@ def obter_todas_turmas():
 
 # Função para obter todos os alunos
 def obter_todos_alunos():
-    url = "https://staging.lizeedu.com.br/api/v2/students/"
-    alunos = []
-
-    # Loop para percorrer todas as páginas de alunos
-    while url:
-        response = requests.get(url, headers=HEADERS)
-        if response.status_code == 200:
-            data = response.json()
-            alunos.extend(data["results"])  # Adiciona os resultados da página atual à lista
-            url = data.get("next")  # Atualiza a URL para a próxima página (se houver)
-        else:
-            print(f"❌ Erro ao buscar alunos: {response.status_code} - {response.text}")
-            break  # Para a execução em caso de erro
+    # Percorre todas as páginas de alunos (para no primeiro erro da API)
+    alunos = list(cliente.paginar("students/", max_idade=MAX_IDADE))
 
     # Imprimir todos os alunos com seus IDs e nomes
     if alunos:
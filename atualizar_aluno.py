@@ -1,4 +1,4 @@
-import requests
+from cliente_lize import ClienteLize
 import os
 from dotenv import load_dotenv
 
@@ -14,17 +14,17 @@ HEADERS = {
     "Content-Type": "application/json"
 }
 
+cliente = ClienteLize("staging", headers=HEADERS)
+
 # Função para atualizar aluno
 def atualizar_aluno(aluno_id, nome, matricula, email):
-    url = f"https://staging.lizeedu.com.br/api/v2/students/{aluno_id}/"
-    
     data = {
         "name": nome,
         "enrollment_number": matricula,
         "email": email,
     }
     
-    response = requests.put(url, headers=HEADERS, json=data)
+    response = cliente.put(f"students/{aluno_id}/", json=data)
     
     if response.status_code == 200:
         print(f"✅ Aluno '{nome}' atualizado com sucesso!")
@@ -0,0 +1,86 @@
+import json
+import hashlib
+import logging
+import requests
+import psycopg2
+from constantes import DB_CONFIG
+
+SQL_CRIAR_TABELA = """CREATE TABLE IF NOT EXISTS cache_api_lize (
+    recurso TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, impressao TEXT, atualizado_em TIMESTAMP
+);"""
+
+def impressao_digital(itens, campos):
+    """MD5 da listagem reduzida aos campos relevantes, independente da ordem das páginas."""
+    linhas = sorted(json.dumps([item.get(c) for c in campos], ensure_ascii=False, default=str) for item in itens)
+    return hashlib.md5("\n".join(linhas).encode("utf-8")).hexdigest()
+
+class ListagemEmCache:
+    """
+    Listagem paginada da API com validação de cache registrada em cache_api_lize:
+    1. dentro do TTL -> nada é consultado;
+    2. envia If-None-Match / If-Modified-Since quando a API devolveu ETag / Last-Modified; 304 -> inalterada.
+       Os validadores só valem para a página 1: são guardados apenas para listagens de página única;
+    3. sem validadores (ou com várias páginas), baixa tudo e compara a impressão digital dos `campos`.
+    `gravar(itens)` só é chamado quando a listagem mudou.
+    """
+    def __init__(self, cliente, recurso, caminho, params=None, campos=("id",), ttl_s=3600):
+        self.cliente = cliente
+        self.recurso = recurso
+        self.caminho = caminho
+        self.params = params or {}
+        self.campos = campos
+        self.ttl_s = ttl_s
+
+    def _meta(self, cur):
+        cur.execute("""SELECT etag, last_modified, impressao, atualizado_em >= NOW() - make_interval(secs => %s)
+                       FROM cache_api_lize WHERE recurso = %s""", (self.ttl_s, self.recurso))
+        return cur.fetchone()
+
+    def _salvar_meta(self, cur, resp, impressao, validadores=True):
+        # validadores=False: listagem com várias páginas, o ETag da página 1 não cobre as outras
+        etag, last_modified = (resp.headers.get("ETag"), resp.headers.get("Last-Modified")) if validadores else (None, None)
+        cur.execute("""INSERT INTO cache_api_lize (recurso, etag, last_modified, impressao, atualizado_em)
+                       VALUES (%s, %s, %s, %s, NOW())
+                       ON CONFLICT (recurso) DO UPDATE SET etag = EXCLUDED.etag, last_modified = EXCLUDED.last_modified,
+                           impressao = EXCLUDED.impressao, atualizado_em = NOW()""",
+                    (self.recurso, etag, last_modified, impressao))
+
+    def _renovar_meta(self, cur):
+        # 304: mantém ETag / Last-Modified / impressão guardados, só reinicia o TTL
+        cur.execute("UPDATE cache_api_lize SET atualizado_em = NOW() WHERE recurso = %s", (self.recurso,))
+
+    def sincronizar(self, gravar, forcar=False):
+        """Retorna True se a listagem mudou (e foi gravada), False se o cache local continua válido."""
+        with psycopg2.connect(**DB_CONFIG) as conn:
+            with conn.cursor() as cur:
+                cur.execute(SQL_CRIAR_TABELA)
+                meta = None if forcar else self._meta(cur)
+                if meta and meta[3]:
+                    logging.info(f"{self.recurso}: dentro do TTL ({self.ttl_s // 60} min), sem consulta à API.")
+                    return False
+
+                condicionais = {}
+                if meta and meta[0]: condicionais["If-None-Match"] = meta[0]
+                if meta and meta[1]: condicionais["If-Modified-Since"] = meta[1]
+                r = self.cliente.get(self.caminho, params=self.params, headers=condicionais)
+                if r.status_code == 304:
+                    self._renovar_meta(cur)
+                    logging.info(f"{self.recurso}: 304 Not Modified, cache local mantido.")
+                    return False
+                if r.status_code != 200:
+                    raise requests.HTTPError(f"Erro ao listar {self.caminho}: {r.status_code}", response=r)
+
+                data = r.json()
+                itens = data.get("results", [])
+                pagina_unica = not data.get("next")
+                if not pagina_unica:
+                    itens += list(self.cliente.paginar(data["next"]))
+                impressao = impressao_digital(itens, self.campos)
+                if meta and meta[2] == impressao:
+                    self._salvar_meta(cur, r, impressao, validadores=pagina_unica)
+                    logging.info(f"{self.recurso}: {len(itens)} itens sem alteração (impressão digital igual), gravação pulada.")
+                    return False
+
+                gravar(cur, itens)
+                self._salvar_meta(cur, r, impressao, validadores=pagina_unica)
+                return True
@@ -0,0 +1,180 @@
+import os
+import logging
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from constantes import HEADERS
+from disjuntor_lize import Disjuntor, AdaptadorComDisjuntor
+from hedge_http import GetComHedge
+from modelos_lize import carregar_json
+from snapshot_lize import obter_snapshot
+
+# Ambiente padrão dos scripts (LIZE_AMBIENTE=staging para testes)
+URLS_BASE = {
+    "app": "https://app.lizeedu.com.br/api/v2/",
+    "staging": "https://staging.lizeedu.com.br/api/v2/",
+}
+AMBIENTE_PADRAO = os.getenv("LIZE_AMBIENTE", "app")
+
+TIMEOUT_PADRAO = 15
+TAMANHO_PAGINA = 50
+
+# Compressão negociada explicitamente (urllib3 descompacta; br só se houver brotli instalado)
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "br, gzip, deflate"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+class VarreduraIncompleta(requests.RequestException):
+    """paginar_offsets em que alguma página falhou (HTTP, rede ou circuito aberto)."""
+    def __init__(self, caminho, falhas):
+        super().__init__(f"Varredura de {caminho} incompleta: {len(falhas)} páginas falharam (offsets {sorted(falhas)[:5]}...)")
+        self.caminho = caminho
+        self.falhas = falhas
+
+class ClienteLize:
+    """
+    Cliente HTTP único da API Lize: sessão com pool keep-alive (a conexão TLS é reaproveitada
+    entre requisições), timeout padrão, disjuntor e URL base por ambiente (app | staging).
+    Caminhos relativos ("students/") são resolvidos na URL base; URLs completas (o "next"
+    da paginação) passam direto. O snapshot local (snapshot_lize) é opcional por chamada:
+    só varreduras com max_idade (s) leem dele (se a captura for recente) e gravam nele;
+    max_idade=0 sempre consulta a API mas grava a captura. Sem max_idade nada é guardado.
+
+        cliente = ClienteLize()
+        for turma in cliente.paginar("classes/", {"school_year": 2026}): ...  # sem snapshot
+        for turma in cliente.paginar("classes/", {"school_year": 2026}, max_idade=3600): ...  # snapshot de até 1h
+    """
+    def __init__(self, ambiente=None, headers=None, max_conexoes=20, timeout=TIMEOUT_PADRAO, disjuntor=None, sessao=None, snapshot=None):
+        self.ambiente = ambiente or AMBIENTE_PADRAO
+        self.base_url = URLS_BASE[self.ambiente]
+        self.timeout = timeout
+        self.disjuntor = disjuntor or Disjuntor()
+        self.sessao = sessao or requests.Session()
+        self.sessao.mount("https://", AdaptadorComDisjuntor(self.disjuntor, pool_connections=max_conexoes, pool_maxsize=max_conexoes))
+        self.sessao.headers.update(HEADERS if headers is None else headers)
+        self.sessao.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        # snapshot=False desliga; None usa o snapshot do processo (LIZE_SNAPSHOT), aberto só
+        # na primeira varredura que pedir max_idade
+        self._snapshot = snapshot
+
+    @property
+    def snapshot(self):
+        if self._snapshot is None:
+            self._snapshot = obter_snapshot() or False
+        return self._snapshot or None
+
+    def url(self, caminho):
+        return caminho if caminho.startswith("http") else self.base_url + caminho.lstrip("/")
+
+    def request(self, metodo, caminho, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.sessao.request(metodo, self.url(caminho), **kwargs)
+
+    def get(self, caminho, **kwargs):
+        return self.request("GET", caminho, **kwargs)
+
+    def post(self, caminho, **kwargs):
+        return self.request("POST", caminho, **kwargs)
+
+    def put(self, caminho, **kwargs):
+        return self.request("PUT", caminho, **kwargs)
+
+    def delete(self, caminho, **kwargs):
+        return self.request("DELETE", caminho, **kwargs)
+
+    def _snapshot_da_chamada(self, max_idade):
+        # Opt-in: sem max_idade a varredura não lê, não acumula páginas e não grava
+        return self.snapshot if max_idade is not None else None
+
+    def _ler_snapshot(self, snapshot, caminho, params, max_idade):
+        if max_idade and snapshot:
+            return snapshot.ler(self.ambiente, caminho, params, max_idade)
+        return None
+
+    def _gravar_snapshot(self, snapshot, caminho, params, paginas):
+        try:
+            snapshot.gravar(self.ambiente, caminho, params, paginas)
+        except Exception as e:
+            # Snapshot é só atalho para diagnósticos: falha nele não derruba a varredura
+            logging.warning(f"Snapshot: falha ao gravar {caminho}: {e}")
+
+    def paginar(self, caminho, params=None, max_idade=None):
+        """Segue o link "next" página a página, gerando cada registro. Para no primeiro erro HTTP."""
+        snapshot = self._snapshot_da_chamada(max_idade)
+        salvas = self._ler_snapshot(snapshot, caminho, params, max_idade)
+        if salvas is not None:
+            for conteudo in salvas:
+                yield from carregar_json(conteudo).get("results", [])
+            return
+
+        url, params_pg, paginas = self.url(caminho), params, []
+        while url:
+            r = self.get(url, params=params_pg)
+            if r.status_code != 200:
+                logging.error(f"Erro ao paginar {url}: {r.status_code} - {r.text[:200]}")
+                return
+            if snapshot:
+                paginas.append(r.content)
+            data = r.json()
+            yield from data.get("results", [])
+            # O "next" já carrega os parâmetros da consulta
+            url, params_pg = data.get("next"), None
+        if snapshot:
+            self._gravar_snapshot(snapshot, caminho, params, paginas)
+
+    def contar(self, caminho, params=None):
+        r = self.get(caminho, params={**(params or {}), "limit": 1})
+        if r.status_code != 200:
+            raise requests.HTTPError(f"Erro ao contar {caminho}: {r.status_code}", response=r)
+        return r.json().get("count", 0)
+
+    def paginar_offsets(self, caminho, params=None, total=None, tamanho=TAMANHO_PAGINA, max_workers=10, hedge=True, decodificar=None, max_idade=None):
+        """
+        Baixa todas as páginas por offset em paralelo (com hedging opcional) e gera a lista
+        de resultados de cada página conforme chegam. Página com erro gera lista vazia e, no
+        fim, VarreduraIncompleta: quem grava a varredura (ex.: DELETE + recarga do alunos_lize)
+        deve desfazer a transação em vez de gravar um retrato parcial do portal.
+        `decodificar(bytes) -> lista` substitui o response.json() (ex.: modelos_lize.decodificar_alunos).
+        Com max_idade, só vai para o snapshot a varredura em que todas as páginas vieram.
+        """
+        params = dict(params or {})
+        snapshot = self._snapshot_da_chamada(max_idade)
+        salvas = self._ler_snapshot(snapshot, caminho, params, max_idade)
+        if salvas is not None:
+            for conteudo in salvas:
+                yield decodificar(conteudo) if decodificar else carregar_json(conteudo).get("results", [])
+            return
+
+        if total is None:
+            total = self.contar(caminho, params)
+        getter = GetComHedge(self.sessao) if hedge else self.sessao
+        url = self.url(caminho)
+        paginas, falhas = {}, []
+
+        def buscar(offset):
+            try:
+                r = getter.get(url, params={**params, "limit": tamanho, "offset": offset}, timeout=self.timeout)
+                if r.status_code == 200:
+                    if snapshot:
+                        paginas[offset] = r.content
+                    return decodificar(r.content) if decodificar else r.json().get("results", [])
+                logging.warning(f"Pagina offset {offset} de {caminho}: HTTP {r.status_code}")
+            except Exception as e:
+                logging.warning(f"Pagina offset {offset} de {caminho}: {e}")
+            falhas.append(offset)
+            return []
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(buscar, off) for off in range(0, total, tamanho)]
+                for future in as_completed(futures):
+                    yield future.result()
+            if falhas:
+                raise VarreduraIncompleta(caminho, falhas)
+            if snapshot:
+                self._gravar_snapshot(snapshot, caminho, params, [paginas[o] for o in sorted(paginas)])
+        finally:
+            if hedge:
+                getter.encerrar()
+                logging.info(f"{caminho}: {getter.resumo()}")
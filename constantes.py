@@ -10,9 +10,16 @@ ANO_LETIVO_ATUAL = datetime.now().year
 TABELA_ALUNOS_GERAL = f"alunos_{str(ANO_LETIVO_ATUAL)[2:]}_geral" 
 # Resultado: "alunos_26_geral" em 2026
 
+# Tabela onde o daemon_lize instala o gatilho de NOTIFY. Gatilho só funciona em tabela:
+# se TABELA_ALUNOS_GERAL for view, aponte LIZE_TABELA_GATILHO para a tabela base
+TABELA_GATILHO_ALUNOS = os.getenv("LIZE_TABELA_GATILHO", TABELA_ALUNOS_GERAL)
+
 # Token de autenticação para API
 API_TOKEN = "Token 443864674b4a856e86990a6c8b3241d3a08e7d8e"
 
+# Segredo do controle local do servico_lize ("<token> <comando>"); vazio desliga o controle
+SERVICO_TOKEN = os.getenv("LIZE_SERVICO_TOKEN", "")
+
 # Cabeçalhos padrão para requisições HTTP
 HEADERS = {
     "Authorization": f"{API_TOKEN}",
@@ -20,6 +27,37 @@ HEADERS = {
     "Content-Type": "application/json"
 }
 
+# Orçamento de memória (MB) das linhas pendentes em cada lote do GravadorLote
+ORCAMENTO_LOTE_BYTES = int(os.getenv("LIZE_ORCAMENTO_LOTE_MB", "16")) * 1024 * 1024
+
+# Hedging de GETs paginados: fração máxima de requisições duplicadas (0 desliga)
+HEDGE_ORCAMENTO = float(os.getenv("LIZE_HEDGE_ORCAMENTO", "0.05"))
+
+# Disjuntor da API Lize: abre com esta fração de falhas (timeouts, 5xx, 429) nas últimas
+# requisições e tenta uma sonda após DISJUNTOR_ESPERA_S; ações recusadas vão para o diário
+DISJUNTOR_LIMITE_FALHAS = float(os.getenv("LIZE_DISJUNTOR_LIMITE", "0.5"))
+DISJUNTOR_ESPERA_S = float(os.getenv("LIZE_DISJUNTOR_ESPERA_S", "30"))
+DIARIO_RETENTATIVAS = os.getenv("LIZE_DIARIO_RETENTATIVAS", "retentativas_lize.jsonl")
+
+# Listagem de turmas da API: dentro do TTL nem consulta a API; depois dele, só regrava
+# turmas_lize se o ETag/Last-Modified ou a impressão digital da listagem mudou
+TURMAS_TTL_S = int(os.getenv("LIZE_TURMAS_TTL_MIN", "60")) * 60
+
+# Coordenações e séries mudam raramente: o registro_lize só consulta a API após este TTL
+REGISTRO_TTL_S = int(os.getenv("LIZE_REGISTRO_TTL_H", "24")) * 3600
+
+# Diff fonte x cache em colunas (diff_vetorizado, requer polars); "1" liga, padrão é o diff linha a linha
+DIFF_VETORIZADO = os.getenv("LIZE_DIFF_VETORIZADO", "0") == "1"
+
+# Snapshot local (SQLite) das listagens do portal: só as varreduras do ClienteLize chamadas
+# com max_idade (scripts de diagnóstico, auditoria, exportação) gravam e leem dele, aceitando
+# capturas de até SNAPSHOT_MAX_IDADE_S; a sincronização não usa (vazio desliga o snapshot)
+SNAPSHOT_LIZE = os.getenv("LIZE_SNAPSHOT", "snapshot_lize.sqlite3")
+SNAPSHOT_MAX_IDADE_S = int(os.getenv("LIZE_SNAPSHOT_MAX_IDADE_MIN", "30")) * 60
+
+# Diretório dos Parquet do exportacao_lize (fonte, alunos_lize e portal por execução)
+EXPORTACAO_LIZE = os.getenv("LIZE_EXPORTACAO", "exportacao_lize")
+
 # Configuração do banco de dados
 DB_CONFIG = {
     "database": "BOLETOS",
@@ -121,3 +159,14 @@ COORDINATION_IDS = {
     }
 }
 
+# IDs das séries (grade) por dígito da turma; validados contra /api/v2/series/ pelo registro_lize
+GRADE_IDS = {
+    "5": "bab8fff7-5af0-47ab-b589-24e7f5ba51ae",  # 5º ano Fund II
+    "6": "0bc3989a-00c8-471a-8088-ad7b9a54fa72",  # 6º ano Fund II
+    "7": "5e7eaa55-a312-4c1e-9316-b5d3841ceff5",  # 7º ano Fund II
+    "8": "33ad38ee-1ff1-47f7-b1cb-7e95a5b16e00",  # 8º ano Fund II
+    "9": "3a635495-56e0-4ac8-8da0-1d162418d376",  # 9º ano Fund II
+    "1": "190121e2-9b62-457a-b138-d4dc562e2f50",  # 1º ano EM
+    "2": "5c8919ee-810e-4b70-a79a-a52a5f98fa9a",  # 2º ano EM
+    "3": "e0ec150d-0e32-4c3f-928b-207bebcc3d22"   # 3º ano EM
+}
@@ -1,48 +1,18 @@
-import requests
 import os
 import psycopg2
+from gravador_lote import GravadorLote
+from cliente_lize import ClienteLize
+from registro_lize import obter_registro
+from sql_lize import SQL_UPSERT_TURMAS
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from constantes import DB_CONFIG, TABELA_ALUNOS_GERAL, ANO_LETIVO_ATUAL, HEADERS
+from constantes import DB_CONFIG, TABELA_ALUNOS_GERAL, ANO_LETIVO_ATUAL, CODIGO_PARA_UNIDADE
 
 # Carregando variáveis de ambiente (Caso precise do Token ou outros valores específicos)
 load_dotenv("config.env")
 TOKEN = os.getenv("API_TOKEN")
 
-# Mapeamentos de Regra de Negócio
-CODIGO_PARA_UNIDADE = {
-    "01": "Bento Ribeiro", "02": "Madureira", "03": "Santa Cruz", "04": "Cascadura",
-    "05": "Taquara", "06": "Nilópolis", "09": "Seropédica", "10": "Barra da Tijuca",
-    "11": "Campo Grande", "13": "Mangueira", "14": "Maricá", 
-    "15": "Ilha do Governador", "16": "Freguesia", "17": "Recreio dos Bandeirantes"
-}
-
-GRADE_IDS = {
-    "5": "bab8fff7-5af0-47ab-b589-24e7f5ba51ae",  # 5º ano Fund II
-    "6": "0bc3989a-00c8-471a-8088-ad7b9a54fa72",  # 6º ano Fund II
-    "7": "5e7eaa55-a312-4c1e-9316-b5d3841ceff5",  # 7º ano Fund II
-    "8": "33ad38ee-1ff1-47f7-b1cb-7e95a5b16e00",  # 8º ano Fund II
-    "9": "3a635495-56e0-4ac8-8da0-1d162418d376",  # 9º ano Fund II
-    "1": "190121e2-9b62-457a-b138-d4dc562e2f50",  # 1º ano EM
-    "2": "5c8919ee-810e-4b70-a79a-a52a5f98fa9a",  # 2º ano EM
-    "3": "e0ec150d-0e32-4c3f-928b-207bebcc3d22"   # 3º ano EM
-}
-
-COORDINATION_IDS = {
-    "Barra da Tijuca": {"Anos Iniciais": "0f04befc-aedd-4020-a85d-ae295b677412", "Anos Finais": "79bebe52-d907-4313-b83d-9818c57f59a6", "Ensino Médio": "086fcd65-1c90-42c5-b8f9-66b033f6c603"},
-    "Bento Ribeiro": {"Anos Iniciais": "f286f842-b8a7-4834-818e-eedea7d5f7c2", "Anos Finais": "972b0161-d403-4b50-ab79-dd3ce20f169a", "Ensino Médio": "467e5fc6-5c4d-46d2-aa1a-7d049743852f"},
-    "Campo Grande": {"Anos Iniciais": "b85ec9ad-aef4-4c08-9b43-e6e18be31511", "Anos Finais": "98c2d145-d0bd-41cd-934a-3e7d5efa0eef", "Ensino Médio": "4aff0b60-294a-469f-87e4-b47803621585"},
-    "Cascadura": {"Anos Iniciais": "31861f2d-8bb1-4624-a121-5146c1a8405f", "Anos Finais": "4cf321dd-ef18-4cbd-ab1d-e94dd54a20dd", "Ensino Médio": "746f35a2-27fc-4e9b-b3d5-4aad7799dca7"},
-    "Freguesia": {"Anos Iniciais": "95f002ff-037f-413a-8e48-199b3f92f75f", "Anos Finais": "3748054e-3c5d-4257-90b2-84d281c8d5ca", "Ensino Médio": "1ea65818-3cf3-42be-a59c-cc0aa28d8bfc"},
-    "Ilha do Governador": {"Anos Iniciais": "b33b93a7-0b2c-4b14-84d1-3e49f46bc0c5", "Anos Finais": "a5093693-9d59-4a94-a497-01050c907578", "Ensino Médio": "37f7ef66-127c-4cbf-9fca-88090538751a"},
-    "Madureira": {"Anos Iniciais": "79b383e9-0adb-4a55-aac6-4590836d22f9", "Anos Finais": "480111d4-65be-4dd1-8065-793a303e9cb0", "Ensino Médio": "5b8c71a0-c4c9-4f71-8ff4-c58745f67738"},
-    "Mangueira": {"Anos Iniciais": "b906493d-2fb1-42bf-a8d1-8846ba533f2c", "Anos Finais": "3274f5e2-f878-420a-8ac8-07c2a8a9c9a0", "Ensino Médio": "4f576314-3210-4ba4-9e6d-45d6239964bf"},
-    "Maricá": {"Anos Iniciais": "9caeb8b4-bf53-4736-8f73-68c99b54b827", "Anos Finais": "e725625f-20d0-4408-aaad-5622b34cf0ff", "Ensino Médio": "898c55e2-3422-43d5-acfc-5ff8d8bdea6c"},
-    "Nilópolis": {"Anos Iniciais": "0aba4d71-6cfd-4cf0-ba13-720a94f1d183", "Anos Finais": "61bc5631-dbdc-46a4-8b65-1ae272c1b47e", "Ensino Médio": "350baf94-6add-4531-8e11-51f56c569524"},
-    "Recreio dos Bandeirantes": {"Anos Iniciais": "f6edfb0a-3126-4f78-9d32-2d6aca9f602f", "Anos Finais": "c85649ca-772d-4ff4-8e80-5e5cba39ed89", "Ensino Médio": "4aad3b57-9a83-49e5-877d-b2638734b595"},
-    "Santa Cruz": {"Anos Iniciais": "d843fb10-0bde-4163-8297-ed51db858e35", "Anos Finais": "2c79be68-3119-4f8b-8255-77d3c1ab4b3c", "Ensino Médio": "97521433-8fc5-454a-9215-af10d05069ff"},
-    "Seropédica": {"Anos Iniciais": "942c4bbb-9c07-4bf6-bfa8-092026acbb31", "Anos Finais": "2d76bc0a-5ecb-4165-a6c2-ad2e16c347b3", "Ensino Médio": "051ab556-9bc2-4dc6-a109-e8763f4121d8"},
-    "Taquara": {"Anos Iniciais": "6f5b8d57-7b73-446c-b716-dfb371afbbc9", "Anos Finais": "959ab757-89be-46ce-bd3f-e84c8c7c5724", "Ensino Médio": "a86f9e35-48b2-40cc-85ba-62a66aab345b"}
-}
+MAX_WORKERS = 10
 
 def obter_turmas_do_banco():
     """Busca turmas únicas na View de produção que atendam ao critério >= 11500"""
@@ -60,13 +30,31 @@ def obter_turmas_do_banco():
         print(f"❌ Erro ao ler banco de dados: {e}")
         return []
 
-def criar_turma(codigo_turma, unidade_codigo):
-    """Processa a criação de uma turma individual na API Lize"""
+def carregar_turmas_existentes(cliente):
+    """Turmas já cadastradas no ano: cache turmas_lize ou, se vazio, uma única varredura paginada da API"""
+    try:
+        with psycopg2.connect(**DB_CONFIG) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT coordination, nome FROM turmas_lize WHERE school_year = %s", (ANO_LETIVO_ATUAL,))
+                existentes = {(str(c).strip(), str(n).strip()) for c, n in cur.fetchall()}
+        if existentes:
+            print(f"📚 {len(existentes)} turmas já conhecidas em turmas_lize.")
+            return existentes
+    except Exception as e:
+        print(f"⚠️  Não foi possível ler turmas_lize ({e}). Consultando a API...")
+
+    existentes = {(str(t["coordination"]).strip(), str(t["name"]).strip())
+                  for t in cliente.paginar("classes/", {"school_year": ANO_LETIVO_ATUAL})}
+    print(f"📚 {len(existentes)} turmas já cadastradas na API.")
+    return existentes
+
+def montar_payload(codigo_turma, unidade_codigo, registro):
+    """Aplica a regra de nível e resolve grade/coordenação; retorna (unidade_nome, payload) ou None"""
     unidade_nome = CODIGO_PARA_UNIDADE.get(str(unidade_codigo).zfill(2), "Desconhecida")
     
-    if len(str(codigo_turma)) < 3: return
+    if len(str(codigo_turma)) < 3: return None
 
-    codigo_turma = str(codigo_turma)
+    codigo_turma = str(codigo_turma).strip()
     terceiro_digito = codigo_turma[2]
 
     # Determinação de Nível (Regra de Ouro)
@@ -75,35 +63,50 @@ def criar_turma(codigo_turma, unidade_codigo):
     elif codigo_turma.startswith("2"):
         nivel = "Ensino Médio"
     else:
-        return
+        return None
 
-    grade_id = GRADE_IDS.get(terceiro_digito)
-    coord_id = COORDINATION_IDS.get(unidade_nome, {}).get(nivel)
+    grade_id = registro.serie(terceiro_digito)
+    coord_id = registro.coordenacao(unidade_nome, nivel)
 
     if not grade_id or not coord_id:
         print(f"⚠️  CONFIG FALTANTE | Turma: {codigo_turma} | Unid: {unidade_nome} | Nível: {nivel}")
-        return
+        return None
 
-    payload = {
+    return unidade_nome, {
         "name": codigo_turma,
         "grade": grade_id,
         "coordination": coord_id,
         "school_year": ANO_LETIVO_ATUAL,
     }
 
+def criar_turma(cliente, unidade_nome, payload):
+    """Cria uma turma na API Lize; retorna a linha para turmas_lize em caso de sucesso"""
+    codigo_turma = payload["name"]
     try:
-        url_api = "https://app.lizeedu.com.br/api/v2/classes/"
-        response = requests.post(url_api, json=payload, headers=HEADERS, timeout=10)
+        response = cliente.post("classes/", json=payload, timeout=10)
         
         if response.status_code == 201:
             print(f"✅ SUCESSO | {unidade_nome:<20} | Turma: {codigo_turma} criada.")
+            criada = response.json()
+            return (criada.get("id"), codigo_turma, payload["coordination"], ANO_LETIVO_ATUAL)
         elif response.status_code == 400:
-            # Resposta comum quando a turma já existe
+            # Cache local desatualizado: a turma foi criada fora deste processo
             print(f"ℹ️  EXISTE  | {unidade_nome:<20} | Turma: {codigo_turma} já cadastrada.")
         else:
             print(f"❌ API ERRO | {unidade_nome:<20} | Turma: {codigo_turma} | Status: {response.status_code}")
     except Exception as e:
         print(f"💥 REDE ERRO | Falha ao conectar na Lize para turma {codigo_turma}: {e}")
+    return None
+
+def registrar_turmas_criadas(turmas_criadas):
+    """Upsert imediato em turmas_lize para o envio_lize não precisar de outro atualizar_mapa_turmas"""
+    try:
+        with psycopg2.connect(**DB_CONFIG) as conn:
+            with conn.cursor() as cur, GravadorLote(cur, SQL_UPSERT_TURMAS, "turmas_lize", chave=(0,)) as gravador:
+                gravador.adicionar_varios(turmas_criadas)
+        print(f"💾 {len(turmas_criadas)} turmas novas registradas em turmas_lize. ({gravador.resumo()})")
+    except Exception as e:
+        print(f"❌ Erro ao registrar turmas criadas em turmas_lize: {e}")
 
 if __name__ == "__main__":
     print(f"🚀 Iniciando Auditoria e Criação de Turmas - Ano Letivo {ANO_LETIVO_ATUAL}")
@@ -114,8 +117,30 @@ if __name__ == "__main__":
     if not lista_turmas:
         print("📭 Nenhuma turma encontrada no banco para os critérios informados.")
     else:
+        cliente = ClienteLize(max_conexoes=MAX_WORKERS)
+        registro = obter_registro(cliente)
+        if registro.problemas:
+            print(f"⚠️  {len(registro.problemas)} problemas de configuração (ver log CONFIG); as turmas afetadas serão puladas.")
+        existentes = carregar_turmas_existentes(cliente)
+
+        # Diff local: só vai para a API o que ainda não existe
+        faltantes = []
         for turma, unidade in sorted(lista_turmas):
-            criar_turma(turma, unidade)
+            plano = montar_payload(turma, unidade, registro)
+            if plano and (plano[1]["coordination"], plano[1]["name"]) not in existentes:
+                faltantes.append(plano)
+        print(f"🔎 {len(faltantes)} turmas a criar ({len(lista_turmas) - len(faltantes)} já existentes ou sem configuração).")
+
+        turmas_criadas = []
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = [executor.submit(criar_turma, cliente, unidade_nome, payload) for unidade_nome, payload in faltantes]
+            for future in as_completed(futures):
+                linha = future.result()
+                if linha and linha[0]:
+                    turmas_criadas.append(linha)
+
+        if turmas_criadas:
+            registrar_turmas_criadas(turmas_criadas)
             
     print("-" * 70)
-    print("🏁 Processo concluído.")
\ No newline at end of file
+    print("🏁 Processo concluído.")
@@ -0,0 +1,209 @@
+import sys
+import time
+import select
+import logging
+import psycopg2
+import psycopg2.extensions
+from envio_lize import LizeManager
+from constantes import DB_CONFIG, TABELA_GATILHO_ALUNOS
+
+CANAL_NOTIFICACAO = "lize_alunos_mudanca"
+
+# Debounce: o lote sai quando a fonte fica quieta por DEBOUNCE_S, ou no máximo
+# ESPERA_MAXIMA_S após a primeira mudança pendente, ou ao atingir TAMANHO_MAXIMO_LOTE
+DEBOUNCE_S = 3.0
+ESPERA_MAXIMA_S = 30.0
+TAMANHO_MAXIMO_LOTE = 500
+# Lote que falha é devolvido à fila no máximo esta quantidade de vezes; erro de dado
+# (não transitório) descarta o lote na hora. A próxima carga completa cobre o descartado
+TENTATIVAS_LOTE = 5
+
+# O mapa de turmas é relido do banco local periodicamente (não da API)
+RECARGA_MAPA_TURMAS_S = 600
+
+# Reconexão do LISTEN: espera inicial, dobrando até o máximo
+RECONEXAO_S = 5.0
+RECONEXAO_MAXIMA_S = 300.0
+
+# Keepalive TCP na conexão do LISTEN: queda silenciosa da rede vira erro no poll
+KEEPALIVE_LISTEN = {"keepalives": 1, "keepalives_idle": 30, "keepalives_interval": 10, "keepalives_count": 3}
+
+TIPOS_RELACAO = {"v": "view", "m": "view materializada", "f": "tabela estrangeira"}
+
+class DaemonLize(LizeManager):
+    """
+    Modo daemon do LizeManager: gatilhos na tabela de origem publicam a matrícula alterada
+    via NOTIFY; o daemon faz LISTEN, agrupa as notificações em micro-lotes e passa cada
+    lote pela mesma lógica por aluno do processar (planejar_aluno + fantasmas, por faixa de prioridade).
+    Se a conexão do LISTEN cair, reconecta e roda uma passada completa: as notificações
+    emitidas sem ninguém escutando se perderam.
+    """
+    def __init__(self):
+        super().__init__()
+        self.mapa_turmas = {}
+        self._mapa_carregado_em = 0.0
+
+    def _verificar_tabela_gatilho(self, cur):
+        cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (TABELA_GATILHO_ALUNOS,))
+        linha = cur.fetchone()
+        if not linha:
+            raise RuntimeError(f"Tabela do gatilho {TABELA_GATILHO_ALUNOS} não existe.")
+        if linha[0] in TIPOS_RELACAO:
+            raise RuntimeError(f"{TABELA_GATILHO_ALUNOS} é {TIPOS_RELACAO[linha[0]]}: gatilhos de linha só funcionam em tabela. "
+                               f"Defina LIZE_TABELA_GATILHO com a tabela base de onde vêm as matrículas.")
+
+    def instalar_gatilhos(self):
+        # Gatilhos só funcionam em tabela: TABELA_GATILHO_ALUNOS (LIZE_TABELA_GATILHO) aponta a tabela base
+        nome_gatilho = f"trg_{TABELA_GATILHO_ALUNOS.split('.')[-1]}_notifica_lize"
+        queries = [
+            f"""CREATE OR REPLACE FUNCTION notificar_mudanca_aluno_lize() RETURNS trigger AS $$
+                BEGIN
+                    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                        PERFORM pg_notify('{CANAL_NOTIFICACAO}', TRIM(OLD.matricula::TEXT));
+                    END IF;
+                    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                        PERFORM pg_notify('{CANAL_NOTIFICACAO}', TRIM(NEW.matricula::TEXT));
+                    END IF;
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql;""",
+            f"DROP TRIGGER IF EXISTS {nome_gatilho} ON {TABELA_GATILHO_ALUNOS};",
+            f"""CREATE TRIGGER {nome_gatilho}
+                AFTER INSERT OR UPDATE OR DELETE ON {TABELA_GATILHO_ALUNOS}
+                FOR EACH ROW EXECUTE FUNCTION notificar_mudanca_aluno_lize();""",
+        ]
+        with psycopg2.connect(**DB_CONFIG) as conn:
+            with conn.cursor() as cur:
+                self._verificar_tabela_gatilho(cur)
+                for q in queries: cur.execute(q)
+        logging.info(f"Gatilho {nome_gatilho} instalado em {TABELA_GATILHO_ALUNOS} (canal {CANAL_NOTIFICACAO}).")
+
+    def _mapa_turmas_atual(self):
+        if time.monotonic() - self._mapa_carregado_em > RECARGA_MAPA_TURMAS_S:
+            self.mapa_turmas = self.carregar_mapa_turmas()
+            self._mapa_carregado_em = time.monotonic()
+        return self.mapa_turmas
+
+    def processar_lote(self, matriculas):
+        inicio = time.monotonic()
+        alunos_origem = self.carregar_fonte(matriculas)
+        estado_local = self.carregar_estado_local(matriculas)
+
+        # Matrículas notificadas que deixaram de ser elegíveis (saíram, sit 2/4, apagadas)
+        fantasmas = self.detectar_fantasmas(alunos_origem, estado_local)
+        upsert_banco_local = self.sincronizar_alunos(alunos_origem, estado_local, self._mapa_turmas_atual(), fantasmas)
+        self.persistir_upserts(upsert_banco_local)
+
+        self.consolidar_stats()
+        resumo = ", ".join(f"{cat}: {sum(u.values())}" for cat, u in sorted(self.stats_trocas.items())) or "sem alterações"
+        for t in sorted(self.turmas_ausentes):
+            logging.warning(f"TURMA AUSENTE | {t}")
+        if self.tempo_ate_acesso:
+            resumo += f" | acesso p95: {self.tempo_ate_acesso['p95']:.1f}s"
+        logging.info(f"LOTE | {len(matriculas)} matrículas | {resumo} | {time.monotonic() - inicio:.1f}s")
+        self.stats_trocas.clear()
+        self.turmas_ausentes.clear()
+        self.tempo_ate_acesso = None
+
+    def _escutar(self):
+        conn = psycopg2.connect(**{**KEEPALIVE_LISTEN, **DB_CONFIG})
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CANAL_NOTIFICACAO};")
+        logging.info(f"Escutando {CANAL_NOTIFICACAO}...")
+        return conn
+
+    def _reconectar(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        espera = RECONEXAO_S
+        while True:
+            try:
+                return self._escutar()
+            except psycopg2.OperationalError as e:
+                logging.warning(f"LISTEN: reconexão falhou ({e}); nova tentativa em {espera:.0f}s.")
+                time.sleep(espera)
+                espera = min(espera * 2, RECONEXAO_MAXIMA_S)
+
+    def carga_completa(self):
+        self.processar()
+        self.stats_trocas.clear()
+        self.turmas_ausentes.clear()
+
+    def executar(self, carga_inicial=True):
+        self.instalar_gatilhos()
+        conn = self._escutar()
+
+        # A carga inicial roda depois do LISTEN: o que mudar durante ela fica na fila
+        if carga_inicial:
+            self.carga_completa()
+        else:
+            self.preparar()
+
+        pendentes = set()
+        tentativas = {}
+        primeira = ultima = 0.0
+        recuperar = False
+        try:
+            while True:
+                if recuperar:
+                    # Depois de reconectar: passada completa cobre o que mudou com o LISTEN caído
+                    try:
+                        self.carga_completa()
+                        recuperar = False
+                        pendentes.clear()
+                    except Exception as e:
+                        logging.error(f"Erro na passada completa após reconexão (nova tentativa no próximo ciclo): {e}")
+
+                espera = DEBOUNCE_S if pendentes else 60.0
+                try:
+                    if select.select([conn], [], [], espera)[0]:
+                        conn.poll()
+                except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                    logging.warning(f"LISTEN: conexão perdida ({e}), reconectando...")
+                    conn = self._reconectar(conn)
+                    recuperar = True
+                    continue
+                if conn.notifies:
+                    agora = time.monotonic()
+                    while conn.notifies:
+                        notificacao = conn.notifies.pop(0)
+                        if notificacao.payload:
+                            if not pendentes:
+                                primeira = agora
+                            pendentes.add(notificacao.payload)
+                            ultima = agora
+
+                agora = time.monotonic()
+                if pendentes and (agora - ultima >= DEBOUNCE_S
+                                  or agora - primeira >= ESPERA_MAXIMA_S
+                                  or len(pendentes) >= TAMANHO_MAXIMO_LOTE):
+                    lote, pendentes = pendentes, set()
+                    try:
+                        self.processar_lote(lote)
+                        for mat in lote:
+                            tentativas.pop(mat, None)
+                    except Exception as e:
+                        logging.error(f"Erro ao processar lote de {len(lote)} matrículas: {e}")
+                        transitorio = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)) \
+                            or not isinstance(e, psycopg2.Error)
+                        for mat in lote:
+                            tentativas[mat] = tentativas.get(mat, 0) + 1
+                        esgotadas = {m for m in lote if not transitorio or tentativas[m] >= TENTATIVAS_LOTE}
+                        if esgotadas:
+                            logging.error(f"LOTE DESCARTADO | {len(esgotadas)} matrículas após {TENTATIVAS_LOTE if transitorio else 1} "
+                                          f"tentativa(s): {', '.join(sorted(esgotadas)[:20])}")
+                            for mat in esgotadas:
+                                tentativas.pop(mat)
+                        # Devolve o restante para a próxima janela
+                        pendentes |= lote - esgotadas
+                        primeira = ultima = time.monotonic()
+        except KeyboardInterrupt:
+            logging.info("Daemon encerrado.")
+        finally:
+            conn.close()
+
+if __name__ == "__main__":
+    DaemonLize().executar(carga_inicial="--sem-carga-inicial" not in sys.argv)
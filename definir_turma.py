@@ -1,4 +1,4 @@
-import requests
+from cliente_lize import ClienteLize
 import os
 from dotenv import load_dotenv
 
@@ -13,10 +13,10 @@ HEADERS = {
     "Content-Type": "application/json"
 }
 
+cliente = ClienteLize("staging", headers=HEADERS)
+
 # Função para associar um aluno a uma turma
 def associar_aluno_turma(student_id, name, enrollment_number, email, school_classes):
-    url = f"https://staging.lizeedu.com.br/api/v2/students/{student_id}/set_classes/"
-
     # Dados a serem enviados no corpo da requisição
     payload = {
         "name": name,
@@ -25,7 +25,7 @@ def associar_aluno_turma(student_id, name, enrollment_number, email, school_clas
         "school_classes": school_classes
     }
 
-    response = requests.post(url, headers=HEADERS, json=payload)
+    response = cliente.post(f"students/{student_id}/set_classes/", json=payload)
 
     if response.status_code == 200:
         aluno = response.json()
@@ -1,4 +1,4 @@
-import requests
+from cliente_lize import ClienteLize
 import os
 from dotenv import load_dotenv
 from datetime import datetime
@@ -14,20 +14,11 @@ HEADERS = {
     "Accept": "application/json",
 }
 
+cliente = ClienteLize("staging", headers=HEADERS)
+
 def obter_turmas_api():
     ano_atual = datetime.now().year
-    url = f"https://staging.lizeedu.com.br/api/v2/classes/?school_year={ano_atual}"
-    turmas = []
-
-    while url:
-        response = requests.get(url, headers=HEADERS)
-        if response.status_code == 200:
-            data = response.json()
-            turmas.extend(data["results"])
-            url = data.get("next")
-        else:
-            print("Erro:", response.status_code, response.text)
-            break
+    turmas = list(cliente.paginar("classes/", {"school_year": ano_atual}))
 
     print("Total de turmas coletadas:", len(turmas))
     for turma in turmas:
@@ -42,9 +33,7 @@ def obter_turmas_api():
 
 # Função para deletar aluno
 def deletar_aluno(id_aluno):
-    url = f"https://staging.lizeedu.com.br/api/v2/students/{id_aluno}/"
-    
-    response = requests.delete(url, headers=HEADERS)
+    response = cliente.delete(f"students/{id_aluno}/")
     
     if response.status_code == 204:
         print(f"Aluno {'name'} com id {id_aluno} deletado com sucesso!")
@@ -1,54 +1,89 @@
-import requests
-from collections import defaultdict
-from constantes import HEADERS
-
-API_BASE_URL = "https://staging.lizeedu.com.br/api/v2/students/"
-
-def obter_alunos_api():
-    """Busca todos os alunos diretamente da API e retorna uma lista."""
-    url = API_BASE_URL
-    alunos = []
-    
-    while url:
-        response = requests.get(url, headers=HEADERS)
-        if response.status_code == 200:
-            data = response.json()
-            alunos.extend(data.get("results", []))  # Adiciona os alunos da página atual
-            url = data.get("next")  # Obtém o link para a próxima página
-        else:
-            print(f"❌ Erro ao obter alunos da API: {response.status_code}")
-            break
-
-    print(f"✅ Total de alunos obtidos: {len(alunos)}")
-    return alunos
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from cliente_lize import ClienteLize
 
-def desativar_alunos_duplicados():
-    """Desativa alunos com matrícula duplicada na API que não estejam em nenhuma turma."""
-    alunos_api = obter_alunos_api()
-    matriculas_dict = defaultdict(list)
+MAX_WORKERS = 10
+
+cliente = ClienteLize("staging", max_conexoes=MAX_WORKERS)
 
-    # Organiza os alunos por matrícula
-    for aluno in alunos_api:
-        matriculas_dict[aluno["enrollment_number"]].append(aluno)
+def iterar_alunos_api():
+    """Percorre os alunos da API página a página, sem acumular a lista completa."""
+    total = 0
+    for aluno in cliente.paginar("students/"):
+        total += 1
+        yield aluno
 
-    # Filtra apenas matrículas duplicadas
-    matriculas_duplicadas = {mat: alunos for mat, alunos in matriculas_dict.items() if len(alunos) > 1}
+    print(f"✅ Total de alunos percorridos: {total}")
 
-    print(f"🔍 Encontradas {len(matriculas_duplicadas)} matrículas duplicadas.")
+class DetectorDuplicados:
+    """
+    Ocorrências (matrícula, id, nome, tem turma) gravadas em um SQLite temporário em disco,
+    em lotes; o GROUP BY matricula roda no SQLite. A memória fica limitada ao lote, não
+    cresce com o tamanho do portal. A chave é o JSON da matrícula: mesma igualdade do dict
+    da versão original (None agrupa com None, 123 não agrupa com "123").
+    """
+    def __init__(self, tamanho_lote=1000):
+        # connect("") cria um banco temporário em disco, apagado ao fechar a conexão
+        self.conn = sqlite3.connect("")
+        self.conn.execute("CREATE TABLE ocorrencias (chave TEXT, id TEXT, nome TEXT, tem_turma INTEGER)")
+        self.tamanho_lote = tamanho_lote
+        self._lote = []
+        self.grupos_duplicados = 0
 
-    for matricula, alunos in matriculas_duplicadas.items():
-        alunos_sem_turma = [a for a in alunos if not a["classes"]]  # Filtra alunos sem turma
+    def observar(self, aluno):
+        self._lote.append((json.dumps(aluno["enrollment_number"]), aluno["id"], aluno["name"], bool(aluno["classes"])))
+        if len(self._lote) >= self.tamanho_lote:
+            self._gravar()
 
-        for aluno in alunos_sem_turma:
-            id_aluno = aluno["id"]
-            nome_aluno = aluno["name"]
-            if desativar_aluno(id_aluno, nome_aluno):
-                print(f"✅ Aluno {nome_aluno} ({matricula}) desativado.")
+    def _gravar(self):
+        self.conn.executemany("INSERT INTO ocorrencias VALUES (?, ?, ?, ?)", self._lote)
+        self._lote = []
+
+    def candidatos(self):
+        """Gera (matricula, id, nome) dos alunos sem turma em matrículas repetidas, em streaming."""
+        self._gravar()
+        self.conn.execute("CREATE INDEX ix_ocorrencias_chave ON ocorrencias (chave)")
+        self.conn.execute("""CREATE TEMP TABLE duplicadas AS
+                             SELECT chave FROM ocorrencias GROUP BY chave HAVING COUNT(*) > 1""")
+        self.grupos_duplicados = self.conn.execute("SELECT COUNT(*) FROM duplicadas").fetchone()[0]
+        for chave, id_aluno, nome in self.conn.execute("""SELECT o.chave, o.id, o.nome FROM ocorrencias o
+                                                          JOIN duplicadas d ON d.chave = o.chave
+                                                          WHERE NOT o.tem_turma"""):
+            yield json.loads(chave), id_aluno, nome
+
+    def fechar(self):
+        self.conn.close()
+
+def desativar_alunos_duplicados():
+    """Desativa alunos com matrícula duplicada na API que não estejam em nenhuma turma."""
+    detector = DetectorDuplicados()
+    desativados = 0
+    try:
+        for aluno in iterar_alunos_api():
+            detector.observar(aluno)
+
+        # Desativações em paralelo, lidas do SQLite conforme saem do GROUP BY
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {executor.submit(desativar_aluno, id_aluno, nome_aluno): (matricula, nome_aluno)
+                       for matricula, id_aluno, nome_aluno in detector.candidatos()}
+            for future in as_completed(futures):
+                matricula, nome_aluno = futures[future]
+                if future.result():
+                    desativados += 1
+                    print(f"✅ Aluno {nome_aluno} ({matricula}) desativado.")
+    finally:
+        detector.fechar()
+
+    print(f"🔍 Encontradas {detector.grupos_duplicados} matrículas duplicadas. {desativados} alunos desativados.")
 
 def desativar_aluno(id_aluno, nome_aluno):
     """Chama a API para desativar o aluno pelo ID."""
-    url = f"{API_BASE_URL}{id_aluno}/disable/"
-    response = requests.post(url, headers=HEADERS, json={})
+    try:
+        response = cliente.post(f"students/{id_aluno}/disable/", json={})
+    except Exception as e:
+        print(f"❌ Erro ao desativar aluno {nome_aluno}: {e}")
+        return False
 
     if response.status_code in [200, 204]:
         return True
@@ -0,0 +1,140 @@
+import hashlib
+from agendador_faixas import FAIXA_ACESSO, FAIXA_BLOQUEIO, FAIXA_CADASTRO
+
+# Motor de diff opcional: sem polars o LizeManager segue com planejar_aluno linha a linha
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+DISPONIVEL = pl is not None
+
+COLUNAS_FONTE = ("unidade", "sit", "matricula", "nome", "turma")
+
+def _texto(valores):
+    # Mesmo str(x) do caminho linha a linha (inteiros, Decimal, None...)
+    return pl.Series(valores, dtype=pl.String, strict=False)
+
+def _md5(chaves):
+    return [hashlib.md5(c.encode("utf-8")).hexdigest() for c in chaves]
+
+def tabela_fonte(alunos_origem):
+    # Linhas de carregar_fonte direto para colunas; o cast para texto reproduz o str(x) do caminho linha a linha
+    esquema = {"unidade": pl.String, "sit": pl.Float64, "mat": pl.String, "nome": pl.String, "turma": pl.String}
+    return (pl.DataFrame(alunos_origem, schema=esquema, orient="row", strict=False)
+            .with_columns(pl.col("sit").cast(pl.Int64), pl.col("mat", "nome", "turma").str.strip_chars())
+            .with_row_index("_ordem"))
+
+def tabela_estado(estado_local):
+    mats = list(estado_local)
+    valores = estado_local.values()
+    return pl.DataFrame({
+        "mat": pl.Series(mats, dtype=pl.String),
+        "nome_api": pl.Series([a["nome"] for a in valores], dtype=pl.String, strict=False),
+        "email_api": pl.Series([a["email"] for a in valores], dtype=pl.String, strict=False),
+        "ativo_api": pl.Series([a["ativo"] for a in valores], dtype=pl.Boolean, strict=False),
+        "hash_api": _texto([str(a["hash"]) for a in valores]),
+    }).with_columns(pl.lit(True).alias("_no_cache"))
+
+def _etapa():
+    # Vetorização de LizeManager.definir_etapa_ensino
+    turma = pl.col("turma")
+    return (pl.when(turma.str.len_chars() < 3).then(None)
+            .when(turma.str.starts_with("11"))
+            .then(pl.when(turma.str.slice(2, 1) == "5").then(pl.lit("Anos Iniciais")).otherwise(pl.lit("Anos Finais")))
+            .when(turma.str.starts_with("2")).then(pl.lit("Ensino Médio"))
+            .otherwise(None))
+
+def planejar_lote(alunos_origem, estado_local, mapa_turmas, coordenacoes, unidades, siglas):
+    """
+    Mesmo diff de LizeManager.planejar_aluno para a população inteira com joins em colunas.
+    coordenacoes: {(unidade, etapa): coord_id} do registro; unidades: CODIGO_PARA_UNIDADE;
+    siglas: prefixo da matrícula -> sigla. Retorna (planos na ordem da fonte, turmas ausentes,
+    matrículas com situação inválida).
+    """
+    id_turmas = _ids_originais(mapa_turmas)
+    fonte = tabela_fonte(alunos_origem)
+    erros = fonte.filter(pl.col("sit").is_null())["mat"].to_list()
+    fonte = fonte.filter(pl.col("sit").is_not_null())
+
+    tab_coord = pl.DataFrame({
+        "unidade_nome": [u for u, _ in coordenacoes], "etapa": [e for _, e in coordenacoes],
+        "coord": [str(c).strip() for c in coordenacoes.values()],
+    }, schema={"unidade_nome": pl.String, "etapa": pl.String, "coord": pl.String})
+    tab_turmas = pl.DataFrame({
+        "coord": [c for c, _ in mapa_turmas], "turma": [t for _, t in mapa_turmas],
+        "id_turma": [str(i) for i in mapa_turmas.values()],
+    }, schema={"coord": pl.String, "turma": pl.String, "id_turma": pl.String})
+
+    df = (fonte
+          .with_columns(
+              turma_valida=(pl.col("turma").cast(pl.Int64, strict=False) >= 11500).fill_null(False),
+              unidade_nome=pl.col("unidade").str.zfill(2).replace_strict(unidades, default=None, return_dtype=pl.String),
+              etapa=_etapa(),
+              sigla=pl.col("mat").str.slice(0, 2).replace_strict(siglas, default="??", return_dtype=pl.String),
+              email=pl.col("mat") + "@alunos.smrede.com.br")
+          .join(tab_coord, on=["unidade_nome", "etapa"], how="left")
+          .join(tab_turmas, on=["coord", "turma"], how="left")
+          .with_columns(id_turma=pl.when(pl.col("turma_valida")).then(pl.col("id_turma")))
+          .with_columns(deve=pl.col("turma_valida") & pl.col("id_turma").is_not_null() & ~pl.col("sit").is_in([2, 4])))
+
+    ausentes = set(df.filter(pl.col("turma_valida") & pl.col("id_turma").is_null())
+                   .select(pl.format("{} | Turma: {}", pl.coalesce("unidade_nome", "unidade"), "turma"))
+                   .to_series().to_list())
+
+    chaves = df.select(pl.concat_str([pl.col("nome"), pl.when(pl.col("deve")).then(pl.lit("True")).otherwise(pl.lit("False")),
+                                      pl.col("id_turma").fill_null("SEM_TURMA")], separator="|")).to_series()
+    df = df.with_columns(hash=pl.Series(_md5(chaves.to_list()), dtype=pl.String))
+    if estado_local:
+        df = df.join(tabela_estado(estado_local), on="mat", how="left")
+    else:
+        df = df.with_columns(pl.lit(None, dtype=pl.Boolean).alias("_no_cache"))
+
+    base = [pl.col("_ordem"), pl.col("mat"), pl.col("nome"), pl.col("email"), pl.col("sigla"),
+            pl.col("deve").alias("ativo"), pl.col("id_turma"), pl.col("hash")]
+    novos = (df.filter(pl.col("_no_cache").is_null() & pl.col("deve"))
+             .select(*base, id_aluno=pl.lit(None), inserir=pl.lit(True), status_acao=pl.lit(None, dtype=pl.String),
+                     faixa=pl.lit(FAIXA_ACESSO)))
+    planos = novos.to_dicts()
+
+    if estado_local:
+        alterar_ativo = pl.col("ativo_api").ne_missing(pl.col("deve"))
+        alterados = (df.filter(pl.col("_no_cache").is_not_null() & pl.col("hash_api").ne_missing(pl.col("hash")))
+                     .select(*base, id_aluno=pl.lit(None), inserir=pl.lit(False),
+                             status_acao=pl.when(~alterar_ativo).then(pl.lit("MUDANÇA"))
+                                           .when(pl.col("deve")).then(pl.lit("ATIVAR")).otherwise(pl.lit("DESATIVAR")),
+                             atualizar_cadastro=pl.col("nome_api").ne_missing(pl.col("nome")) | pl.col("email_api").ne_missing(pl.col("email")),
+                             alterar_ativo=alterar_ativo,
+                             definir_turma=pl.col("deve"),
+                             faixa=pl.when(pl.col("deve") & alterar_ativo).then(FAIXA_ACESSO)
+                                     .when(alterar_ativo).then(FAIXA_BLOQUEIO).otherwise(FAIXA_CADASTRO)))
+        planos += alterados.to_dicts()
+
+    planos.sort(key=lambda p: p["_ordem"])
+    for p in planos:
+        del p["_ordem"]
+        p["id_turma"] = id_turmas.get(p["id_turma"])
+        if not p["inserir"]:
+            aluno_api = estado_local[p["mat"]]
+            p["id_aluno"] = aluno_api["id_api"]
+            # Ativo mas fora da turma certa também está sem acesso: passa na frente (só nos alterados)
+            if p["faixa"] == FAIXA_CADASTRO and p["definir_turma"] and \
+                    str(p["id_turma"]) not in {str(c) for c in aluno_api["classes"] or []}:
+                p["faixa"] = FAIXA_ACESSO
+    return planos, ausentes, erros
+
+def _ids_originais(mapa_turmas):
+    # O join compara ids como texto; o plano leva o valor original do turmas_lize
+    return {str(i): i for i in mapa_turmas.values()}
+
+def detectar_fantasmas(alunos_origem, estado_local):
+    """Anti-join cache x fonte: ativos no alunos_lize que sumiram da fonte, na ordem do cache."""
+    if not estado_local:
+        return []
+    fonte = pl.DataFrame({"mat": _texto([a[2] for a in alunos_origem]).str.strip_chars()})
+    cache = pl.DataFrame({
+        "mat": pl.Series(list(estado_local), dtype=pl.String),
+        "ativo": pl.Series([a.get("ativo") is True for a in estado_local.values()], dtype=pl.Boolean),
+    }).with_row_index("_ordem")
+    sumidos = cache.filter(pl.col("ativo")).join(fonte.unique(), on="mat", how="anti").sort("_ordem")
+    return [(mat, estado_local[mat]) for mat in sumidos["mat"]]
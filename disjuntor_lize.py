@@ -0,0 +1,115 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+import requests
+from constantes import DISJUNTOR_LIMITE_FALHAS, DISJUNTOR_ESPERA_S, DIARIO_RETENTATIVAS
+
+class CircuitoAberto(requests.RequestException):
+    """Requisição recusada sem ir à rede: a API está degradada e o disjuntor abriu."""
+
+class Disjuntor:
+    """
+    Disjuntor por taxa de falhas numa janela deslizante das últimas requisições.
+    fechado -> aberto quando a taxa passa do limite; aberto -> meio-aberto após a espera,
+    deixando passar `sondas` requisições; sucesso da sonda fecha, falha reabre.
+    """
+    FECHADO, ABERTO, MEIO_ABERTO = "fechado", "aberto", "meio-aberto"
+
+    def __init__(self, limite_falhas=None, janela=50, amostras_minimas=20, espera_s=None, sondas=1):
+        self.limite_falhas = DISJUNTOR_LIMITE_FALHAS if limite_falhas is None else limite_falhas
+        self.amostras_minimas = amostras_minimas
+        self.espera_s = DISJUNTOR_ESPERA_S if espera_s is None else espera_s
+        self.sondas = sondas
+        self.estado = self.FECHADO
+        self.aberturas = 0
+        self.recusadas = 0
+        self._resultados = deque(maxlen=janela)
+        self._reabrir_em = 0.0
+        self._sondas_em_voo = 0
+        self._lock = threading.Lock()
+
+    def antes(self):
+        with self._lock:
+            if self.estado == self.ABERTO and time.monotonic() >= self._reabrir_em:
+                self.estado = self.MEIO_ABERTO
+                self._sondas_em_voo = 0
+                logging.info("CIRCUITO | Meio-aberto: enviando requisição de sonda.")
+            if self.estado == self.FECHADO:
+                return
+            if self.estado == self.MEIO_ABERTO and self._sondas_em_voo < self.sondas:
+                self._sondas_em_voo += 1
+                return
+            self.recusadas += 1
+        raise CircuitoAberto("Circuito aberto: API Lize degradada")
+
+    def registrar(self, sucesso):
+        with self._lock:
+            if self.estado == self.MEIO_ABERTO:
+                if sucesso:
+                    self.estado = self.FECHADO
+                    self._resultados.clear()
+                    logging.info("CIRCUITO | Sonda OK, circuito fechado.")
+                else:
+                    self._abrir()
+                return
+            if self.estado == self.ABERTO:
+                return
+            self._resultados.append(sucesso)
+            if len(self._resultados) >= self.amostras_minimas:
+                falhas = self._resultados.count(False) / len(self._resultados)
+                if falhas >= self.limite_falhas:
+                    self._abrir()
+
+    def _abrir(self):
+        self.estado = self.ABERTO
+        self.aberturas += 1
+        self._reabrir_em = time.monotonic() + self.espera_s
+        logging.warning(f"CIRCUITO | Aberto por {self.espera_s:.0f}s (falhas acima de {self.limite_falhas:.0%}).")
+
+class AdaptadorComDisjuntor(requests.adapters.HTTPAdapter):
+    """HTTPAdapter que consulta o disjuntor antes de cada envio e registra o resultado."""
+    def __init__(self, disjuntor, **kwargs):
+        self.disjuntor = disjuntor
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.disjuntor.antes()
+        try:
+            resp = super().send(request, **kwargs)
+        except Exception:
+            self.disjuntor.registrar(False)
+            raise
+        self.disjuntor.registrar(resp.status_code < 500 and resp.status_code != 429)
+        return resp
+
+class DiarioRetentativas:
+    """Ações recusadas pelo disjuntor, uma por linha (JSONL), para o modo --retomar."""
+    def __init__(self, caminho=DIARIO_RETENTATIVAS):
+        self.caminho = caminho
+        self.gravadas = 0
+        self._lock = threading.Lock()
+
+    def registrar(self, tipo, dados):
+        linha = json.dumps({"tipo": tipo, "dados": dados, "em": time.strftime("%Y-%m-%d %H:%M:%S")}, ensure_ascii=False)
+        with self._lock:
+            with open(self.caminho, "a", encoding="utf-8") as f:
+                f.write(linha + "\n")
+            self.gravadas += 1
+
+    def retirar(self):
+        """Lê e remove o diário; o que falhar de novo volta a ser registrado."""
+        if not os.path.exists(self.caminho):
+            return []
+        processando = self.caminho + ".processando"
+        os.replace(self.caminho, processando)
+        with open(processando, encoding="utf-8") as f:
+            entradas = [json.loads(l) for l in f if l.strip()]
+        os.remove(processando)
+        return entradas
+
+    def descartar(self):
+        if os.path.exists(self.caminho):
+            os.remove(self.caminho)
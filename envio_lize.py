@@ -1,29 +1,48 @@
+import sys
 import requests
 import psycopg2
-from psycopg2.extras import execute_values
 import logging
 import time
 import hashlib
 import logging
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from collections import defaultdict
-from constantes import HEADERS, DB_CONFIG, CODIGO_PARA_UNIDADE, COORDINATION_IDS, TABELA_ALUNOS_GERAL, ANO_LETIVO_ATUAL
-
-# Configuração de log tabular Enterprise
-logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(message)s")
+from collections import defaultdict, Counter
+from constantes import DB_CONFIG, CODIGO_PARA_UNIDADE, TABELA_ALUNOS_GERAL, ANO_LETIVO_ATUAL, TURMAS_TTL_S, DIFF_VETORIZADO
+from logs_lize import configurar_logs, AUDITORIA
+from gravador_lote import GravadorLote
+from sql_lize import SQL_UPSERT_TURMAS, SQL_UPSERT_CACHE_ALUNOS, SQL_UPSERT_SYNC_ALUNOS
+from cliente_lize import ClienteLize, VarreduraIncompleta
+from cache_listagens import ListagemEmCache
+from registro_lize import obter_registro
+from modelos_lize import decodificar_alunos, turmas_do_ano
+from disjuntor_lize import Disjuntor, CircuitoAberto, DiarioRetentativas
+import diff_vetorizado
+from agendador_faixas import AgendadorFaixas, FAIXA_ACESSO, FAIXA_BLOQUEIO, FAIXA_CADASTRO, NOMES_FAIXAS, LIMITES_PADRAO
+
+# Configuração de log tabular Enterprise (fila + listener, sem I/O nos workers)
+configurar_logs()
 
 class LizeManager:
     def __init__(self):
+        # stats_lock so protege o registro dos acumuladores por worker; os contadores
+        # do caminho quente ficam em thread-local e sao somados em consolidar_stats()
         self.stats_lock = threading.Lock()
         self.stats_trocas = defaultdict(lambda: defaultdict(int))
         self.turmas_ausentes = set()
-        self.session = requests.Session()
-        # Aumenta o pool para suportar 20 threads simultaneas sem avisos
-        adapter = requests.adapters.HTTPAdapter(pool_connections=20, pool_maxsize=20)
-        self.session.mount("https://", adapter)
-        self.session.headers.update(HEADERS)
+        self._local = threading.local()
+        self._acumuladores = []
+        self._geracao_stats = 0
+        # p50/p95/máx do início da execução até a conclusão das ações da faixa de acesso
+        self.tempo_ate_acesso = None
+        self._registro = None
+        # Disjuntor compartilhado: com a API degradada as chamadas falham na hora e
+        # as ações recusadas vão para o diário de retentativas (--retomar)
+        self.disjuntor = Disjuntor()
+        self.diario = DiarioRetentativas()
+        # Pool de 20 conexões para as 20 threads simultaneas sem avisos
+        self.cliente = ClienteLize(max_conexoes=20, disjuntor=self.disjuntor)
+        self.session = self.cliente.sessao
 
         self.siglas_diretas = {
             "01": "BR", "02": "MD", "03": "SC", "04": "CD",
@@ -47,31 +66,24 @@ class LizeManager:
             with conn.cursor() as cur:
                 for q in queries: cur.execute(q)
 
-    def atualizar_mapa_turmas(self):
+    def atualizar_mapa_turmas(self, forcar=False):
         logging.info("Sincronizando mapa completo de turmas da Lize...")
-        url = f"https://app.lizeedu.com.br/api/v2/classes/?school_year={ANO_LETIVO_ATUAL}"
-        todas_turmas = []
+        listagem = ListagemEmCache(self.cliente, f"classes/{ANO_LETIVO_ATUAL}", "classes/", {"school_year": ANO_LETIVO_ATUAL},
+                                   campos=("id", "name", "coordination", "school_year"), ttl_s=TURMAS_TTL_S)
+
+        def gravar(cur, todas_turmas):
+            with GravadorLote(cur, SQL_UPSERT_TURMAS, "turmas_lize", chave=(0,)) as gravador:
+                gravador.adicionar_varios((t["id"], t["name"], t["coordination"], t["school_year"]) for t in todas_turmas)
+            logging.info(f"OK: {len(todas_turmas)} turmas sincronizadas com o banco local. ({gravador.resumo()})")
 
         try:
-            while url:
-                r = self.session.get(url, timeout=10)
-                if r.status_code == 200:
-                    data = r.json()
-                    todas_turmas.extend(data.get("results", []))
-                    url = data.get("next")
-                else:
-                    logging.error(f"Erro na API de turmas: {r.status_code}")
-                    break
-
-            if todas_turmas:
-                dados_upsert = [(t["id"], t["name"], t["coordination"], t["school_year"]) for t in todas_turmas]
-                sql = """INSERT INTO turmas_lize (id, nome, coordination, school_year)
-                         VALUES %s ON CONFLICT (id) DO UPDATE SET
-                         nome=EXCLUDED.nome, coordination=EXCLUDED.coordination"""
+            # Sem turmas locais do ano o cache de validação não vale (tabela recriada/limpa)
+            if not forcar:
                 with psycopg2.connect(**DB_CONFIG) as conn:
-                    with conn.cursor() as cur: 
-                        execute_values(cur, sql, dados_upsert)
-                logging.info(f"OK: {len(todas_turmas)} turmas sincronizadas com o banco local.")
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT EXISTS (SELECT 1 FROM turmas_lize WHERE school_year = %s)", (ANO_LETIVO_ATUAL,))
+                        forcar = not cur.fetchone()[0]
+            listagem.sincronizar(gravar, forcar=forcar)
         except Exception as e: 
             logging.error(f"Falha critica ao atualizar mapa de turmas: {e}")
 
@@ -84,10 +96,32 @@ class LizeManager:
             return "Ensino Médio"
         return None
 
+    def _acumulador(self):
+        """Acumulador de estatisticas da thread atual (registrado uma unica vez por worker)."""
+        acc = getattr(self._local, "acc", None)
+        if acc is None or acc["geracao"] != self._geracao_stats:
+            acc = {"geracao": self._geracao_stats, "trocas": defaultdict(lambda: defaultdict(int)), "ausentes": set()}
+            self._local.acc = acc
+            with self.stats_lock:
+                self._acumuladores.append(acc)
+        return acc
+
+    def consolidar_stats(self):
+        """Soma os acumuladores dos workers em stats_trocas/turmas_ausentes (chamar apos os pools terminarem)."""
+        with self.stats_lock:
+            acumuladores, self._acumuladores = self._acumuladores, []
+            self._geracao_stats += 1
+        for acc in acumuladores:
+            for categoria, unidades in acc["trocas"].items():
+                for sigla, qtd in unidades.items():
+                    self.stats_trocas[categoria][sigla] += qtd
+            self.turmas_ausentes.update(acc["ausentes"])
+
     def gerar_hash(self, nome, situacao_ativo, id_turma):
         return hashlib.md5(f"{nome.strip()}|{situacao_ativo}|{id_turma}".encode('utf-8')).hexdigest()
 
-    def _sync_single_student(self, mat, aluno_origem, estado_local, mapa_turmas):
+    def planejar_aluno(self, mat, aluno_origem, estado_local, mapa_turmas):
+        """Diff de um aluno sem tocar na API: retorna o plano de ações (com a faixa de prioridade) ou None."""
         unid_cod, sit, mat_db, nome, turma_n = aluno_origem
         mat = str(mat).strip()
         nome = str(nome).strip()
@@ -106,96 +140,143 @@ class LizeManager:
             unidade_nome = CODIGO_PARA_UNIDADE.get(unid_cod_str)
             etapa_ensino = self.definir_etapa_ensino(turma_n)
             if unidade_nome and etapa_ensino:
-                coord_id = COORDINATION_IDS.get(unidade_nome, {}).get(etapa_ensino)
-                id_turma_alvo = mapa_turmas.get((str(coord_id).strip(), turma_n))
+                # Coordenação mal configurada já foi apontada pelo registro (CONFIG | ...)
+                coord_id = self.registro.coordenacao(unidade_nome, etapa_ensino)
+                if coord_id:
+                    id_turma_alvo = mapa_turmas.get((str(coord_id).strip(), turma_n))
 
         if turma_valida and not id_turma_alvo:
-            with self.stats_lock:
-                self.turmas_ausentes.add(f"{unidade_nome or unid_cod} | Turma: {turma_n}")
+            self._acumulador()["ausentes"].add(f"{unidade_nome or unid_cod} | Turma: {turma_n}")
             deve_estar_ativo = False 
 
         novo_hash = self.gerar_hash(nome, deve_estar_ativo, id_turma_alvo or "SEM_TURMA")
         aluno_api = estado_local.get(mat)
+        plano = {"mat": mat, "nome": nome, "email": f"{mat}@alunos.smrede.com.br", "sigla": sigla,
+                 "ativo": deve_estar_ativo, "id_turma": id_turma_alvo, "hash": novo_hash}
 
         if not aluno_api:
-            if deve_estar_ativo:
-                novo_id = self.api_insert(nome, mat, f"{mat}@alunos.smrede.com.br")
-                if novo_id:
-                    self.api_set_classes(novo_id, id_turma_alvo)
-                    return (novo_id, nome, mat, f"{mat}@alunos.smrede.com.br", [id_turma_alvo] if id_turma_alvo else [], True, ANO_LETIVO_ATUAL, novo_hash)
+            if not deve_estar_ativo:
+                return None
+            plano.update(id_aluno=None, inserir=True, status_acao=None, faixa=FAIXA_ACESSO)
+            return plano
+
+        if str(aluno_api.get("hash")) == novo_hash:
             return None
 
-        if str(aluno_api.get("hash")) != novo_hash:
-            id_aluno = aluno_api["id_api"]
-            status_acao = "MUDANÇA"
-            
-            if aluno_api["nome"] != nome or aluno_api["email"] != f"{mat}@alunos.smrede.com.br":
-                self.api_update_student(id_aluno, nome, mat, f"{mat}@alunos.smrede.com.br")
+        plano.update(id_aluno=aluno_api["id_api"], inserir=False, status_acao="MUDANÇA",
+                     atualizar_cadastro=aluno_api["nome"] != nome or aluno_api["email"] != plano["email"],
+                     alterar_ativo=aluno_api["ativo"] != deve_estar_ativo,
+                     definir_turma=bool(deve_estar_ativo and id_turma_alvo))
+        if plano["alterar_ativo"]:
+            plano["status_acao"] = "ATIVAR" if deve_estar_ativo else "DESATIVAR"
+
+        # Faixa: quem está sem acesso (inativo ou fora da turma certa) passa na frente do resto
+        sem_turma_alvo = plano["definir_turma"] and str(id_turma_alvo) not in {str(c) for c in aluno_api["classes"] or []}
+        if deve_estar_ativo and (plano["alterar_ativo"] or sem_turma_alvo):
+            plano["faixa"] = FAIXA_ACESSO
+        elif plano["alterar_ativo"]:
+            plano["faixa"] = FAIXA_BLOQUEIO
+        else:
+            plano["faixa"] = FAIXA_CADASTRO
+        return plano
+
+    def executar_plano(self, plano):
+        """Aplica o plano na API; retorna a linha para alunos_lize ou None."""
+        mat, nome, email, id_turma_alvo = plano["mat"], plano["nome"], plano["email"], plano["id_turma"]
+        classes = [id_turma_alvo] if id_turma_alvo else []
+
+        if plano["inserir"]:
+            novo_id = self.api_insert(nome, mat, email)
+            if novo_id:
+                self.api_set_classes(novo_id, id_turma_alvo)
+                return (novo_id, nome, mat, email, classes, True, ANO_LETIVO_ATUAL, plano["hash"])
+            return None
 
-            if aluno_api["ativo"] != deve_estar_ativo:
-                status_acao = "ATIVAR" if deve_estar_ativo else "DESATIVAR"
-                if deve_estar_ativo: self.api_enable(id_aluno)
-                else: self.api_disable(id_aluno)
-            
-            if deve_estar_ativo and id_turma_alvo:
-                self.api_set_classes(id_aluno, id_turma_alvo, nome, mat, f"{mat}@alunos.smrede.com.br")
-            
-            with self.stats_lock:
-                self.stats_trocas[status_acao][sigla] += 1
-            
-            return (id_aluno, nome, mat, f"{mat}@alunos.smrede.com.br", [id_turma_alvo] if id_turma_alvo else [], deve_estar_ativo, ANO_LETIVO_ATUAL, novo_hash)
-        return None
+        id_aluno = plano["id_aluno"]
+        # Acesso primeiro dentro do próprio aluno: ativar/turma antes do cadastro
+        if plano["alterar_ativo"]:
+            if plano["ativo"]: self.api_enable(id_aluno)
+            else: self.api_disable(id_aluno)
+
+        if plano["definir_turma"]:
+            self.api_set_classes(id_aluno, id_turma_alvo, nome, mat, email)
+
+        if plano["atualizar_cadastro"]:
+            self.api_update_student(id_aluno, nome, mat, email)
+
+        self._acumulador()["trocas"][plano["status_acao"]][plano["sigla"]] += 1
+        return (id_aluno, nome, mat, email, classes, plano["ativo"], ANO_LETIVO_ATUAL, plano["hash"])
+
+    def _sync_single_student(self, mat, aluno_origem, estado_local, mapa_turmas):
+        plano = self.planejar_aluno(mat, aluno_origem, estado_local, mapa_turmas)
+        return self.executar_plano(plano) if plano else None
 
     def atualizar_cache_alunos(self):
         logging.info("Atualizando cache local de alunos (alunos_lize) via API (Ano Atual)...")
         
-        r = self.session.get(f"https://app.lizeedu.com.br/api/v2/students/?school_year={ANO_LETIVO_ATUAL}&limit=1", timeout=15)
-        if r.status_code != 200: return
-        total_records = r.json().get("count", 0)
-        pages = (total_records // 50) + 1
+        params = {"school_year": ANO_LETIVO_ATUAL}
+        try:
+            total_records = self.cliente.contar("students/", params)
+        except requests.RequestException: return
         
-        logging.info(f"   -> Baixando {total_records} registros em {pages} paginas simultaneas...")
+        logging.info(f"   -> Baixando {total_records} registros em {total_records // 50 + 1} paginas simultaneas...")
 
-        def fetch_page(offset):
-            url = f"https://app.lizeedu.com.br/api/v2/students/?school_year={ANO_LETIVO_ATUAL}&limit=50&offset={offset}"
-            try:
-                resp = self.session.get(url, timeout=15)
-                return resp.json().get("results", []) if resp.status_code == 200 else []
-            except Exception: return []
+        try:
+            self._recarregar_cache_alunos(params, total_records)
+        except VarreduraIncompleta as e:
+            # O with da conexão já desfez o DELETE: o cache anterior continua valendo
+            logging.error(f"{e}. Recarga do alunos_lize desfeita, cache anterior mantido.")
 
+    def _recarregar_cache_alunos(self, params, total_records):
         with psycopg2.connect(**DB_CONFIG) as conn:
             with conn.cursor() as cur:
                 cur.execute(f"DELETE FROM alunos_lize WHERE ano_letivo = {ANO_LETIVO_ATUAL}")
-                
-                offsets = [i * 50 for i in range(pages)]
                 total_processados = 0
                 
-                with ThreadPoolExecutor(max_workers=10) as executor:
-                    futures = [executor.submit(fetch_page, off) for off in offsets]
-                    for future in as_completed(futures):
-                        alunos_pg = future.result()
+                # Página lenta não segura o download inteiro: paginar_offsets faz hedging após o p95 observado
+                with GravadorLote(cur, SQL_UPSERT_CACHE_ALUNOS, "alunos_lize", chave=(2, 6)) as gravador:
+                    # Páginas decodificadas direto em AlunoPortal (só os campos usados)
+                    for alunos_pg in self.cliente.paginar_offsets("students/", params, total=total_records, decodificar=decodificar_alunos):
                         for a in alunos_pg:
-                            classes = [c.get("id") for c in a.get("classes", []) if c.get("school_year") == ANO_LETIVO_ATUAL]
+                            classes = turmas_do_ano(a, ANO_LETIVO_ATUAL)
                             id_turma = str(classes[0]) if classes else "SEM_TURMA"
-                            h = self.gerar_hash(a['name'], a['is_active'], id_turma)
-                            
-                            cur.execute("""
-                                INSERT INTO alunos_lize (id, nome, matricula, email, classes, ativo, ano_letivo, hash_estado)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                                ON CONFLICT (matricula, ano_letivo) DO UPDATE SET 
-                                    id = EXCLUDED.id, nome = EXCLUDED.nome, classes = EXCLUDED.classes, 
-                                    ativo = EXCLUDED.ativo, hash_estado = EXCLUDED.hash_estado
-                            """, (a['id'], a['name'], a['enrollment_number'], a.get('email'), [id_turma], a['is_active'], ANO_LETIVO_ATUAL, h))
+                            h = self.gerar_hash(a.name, a.is_active, id_turma)
+                            gravador.adicionar((a.id, a.name, a.enrollment_number, a.email, [id_turma], a.is_active, ANO_LETIVO_ATUAL, h))
                         
                         total_processados += len(alunos_pg)
                         if total_processados % 1000 == 0 or total_processados >= total_records:
                             logging.info(f"   -> {total_processados}/{total_records} sincronizados no cache...")
                 conn.commit()
-        logging.info("OK: Cache de alunos atualizado.")
+        logging.info(f"OK: Cache de alunos atualizado. ({gravador.resumo()})")
+
+    def carregar_fonte(self, matriculas=None):
+        # Filtro na Fonte: Somente alunos elegíveis para a Lize (Turma >= 11500 e Ativos)
+        sql = f"""
+            SELECT unidade, sit, matricula, nome, turma 
+            FROM {TABELA_ALUNOS_GERAL} 
+            WHERE (turma::NUMERIC >= 11500) AND (sit::NUMERIC NOT IN (2, 4))
+        """
+        params = []
+        if matriculas is not None:
+            sql += " AND TRIM(matricula::TEXT) = ANY(%s)"
+            params.append(list(matriculas))
+        with psycopg2.connect(**DB_CONFIG) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                return cur.fetchall()
 
-    def processar(self):
-        logging.info(f"Iniciando Sincronizacao Lize - Ano Letivo: {ANO_LETIVO_ATUAL}")
+    @property
+    def registro(self):
+        """Coordenações/séries conferidas com a API (registro_lize), uma vez por processo."""
+        if self._registro is None:
+            self._registro = obter_registro(self.cliente)
+        return self._registro
+
+    def preparar(self):
         self.criar_e_atualizar_tabelas()
+        # Erros de COORDINATION_IDS/GRADE_IDS aparecem aqui, antes de virarem "turma ausente"
+        if self.registro.problemas:
+            logging.warning(f"{len(self.registro.problemas)} problemas de configuração (CONFIG | ...): alunos afetados ficarão sem turma.")
         self.atualizar_mapa_turmas()
         
         # Atualiza o cache se estiver vazio
@@ -205,102 +286,177 @@ class LizeManager:
                 if cur.fetchone()[0] == 0:
                     logging.info("Banco local vazio. Iniciando carga inicial...")
                     self.atualizar_cache_alunos()
-        
+
+    def carregar_estado_local(self, matriculas=None):
+        """Índice matricula -> estado do cache alunos_lize (todas ou só as matrículas informadas)."""
+        sql = "SELECT matricula, id, nome, classes, ativo, hash_estado, email FROM alunos_lize WHERE ano_letivo = %s"
+        params = [ANO_LETIVO_ATUAL]
+        if matriculas is not None:
+            sql += " AND matricula = ANY(%s)"
+            params.append(list(matriculas))
+        with psycopg2.connect(**DB_CONFIG) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                return {str(r[0]).strip(): {"id_api": r[1], "nome": r[2], "classes": r[3] or [], "ativo": r[4], "hash": r[5], "email": r[6]} for r in cur.fetchall()}
+
+    def carregar_mapa_turmas(self):
         with psycopg2.connect(**DB_CONFIG) as conn:
             with conn.cursor() as cur:
-                cur.execute("SELECT matricula, id, nome, classes, ativo, hash_estado, email FROM alunos_lize WHERE ano_letivo = %s", (ANO_LETIVO_ATUAL,))
-                estado_local = {str(r[0]).strip(): {"id_api": r[1], "nome": r[2], "classes": r[3] or [], "ativo": r[4], "hash": r[5], "email": r[6]} for r in cur.fetchall()}
                 cur.execute("SELECT coordination, nome, id FROM turmas_lize WHERE school_year = %s", (ANO_LETIVO_ATUAL,))
-                mapa_turmas = {(str(r[0]).strip(), str(r[1]).strip()): r[2] for r in cur.fetchall()}
-                # Filtro na Fonte: Somente alunos elegíveis para a Lize (Turma >= 11500 e Ativos)
-                query_fonte = f"""
-                    SELECT unidade, sit, matricula, nome, turma 
-                    FROM {TABELA_ALUNOS_GERAL} 
-                    WHERE (turma::NUMERIC >= 11500) AND (sit::NUMERIC NOT IN (2, 4))
-                """
-                cur.execute(query_fonte)
-                alunos_origem = cur.fetchall()
-        
-        logging.info(f"Fonte da Verdade (Elegíveis): {len(alunos_origem)} alunos encontrados.")
-        logging.info(f"Cache Local (alunos_lize): {len(estado_local)} registros.")
-        logging.info("Iniciando comparação de dados...")
+                return {(str(r[0]).strip(), str(r[1]).strip()): r[2] for r in cur.fetchall()}
+
+    def sincronizar_alunos(self, alunos_origem, estado_local, mapa_turmas, fantasmas=()):
+        """
+        Planeja o diff de cada aluno da fonte e executa as ações por faixa de prioridade
+        (acesso > bloqueio/fantasmas > cadastro); retorna as linhas para alunos_lize.
+        """
+        tarefas = [self._tarefa("plano", p) for p in self.planejar_todos(alunos_origem, estado_local, mapa_turmas)]
+        if fantasmas:
+            logging.info(f"Detectados {len(fantasmas)} alunos fantasmas/intrusos. Desativação na faixa de bloqueio...")
+            tarefas += [self._tarefa("fantasma", f) for f in fantasmas]
+        return self.executar_tarefas(tarefas)
+
+    def usar_diff_vetorizado(self, alunos_origem):
+        # Lotes pequenos (modo incremental) não compensam montar as tabelas
+        return DIFF_VETORIZADO and diff_vetorizado.DISPONIVEL and len(alunos_origem) >= 1000
+
+    def planejar_todos(self, alunos_origem, estado_local, mapa_turmas):
+        """Planos da população inteira, na ordem da fonte: em colunas (polars) ou linha a linha."""
+        if self.usar_diff_vetorizado(alunos_origem):
+            planos, ausentes, erros = diff_vetorizado.planejar_lote(
+                alunos_origem, estado_local, mapa_turmas, self.registro.coordenacoes(),
+                CODIGO_PARA_UNIDADE, self.siglas_diretas)
+            self._acumulador()["ausentes"].update(ausentes)
+            for mat in erros:
+                logging.error(f"Erro ao processar aluno {mat}: situação inválida")
+            return planos
+
+        planos = []
+        for a in alunos_origem:
+            try:
+                plano = self.planejar_aluno(a[2], a, estado_local, mapa_turmas)
+            except Exception as e:
+                logging.error(f"Erro ao processar aluno {a[2]}: {e}")
+                continue
+            if plano:
+                planos.append(plano)
+        return planos
+
+    def _tarefa(self, tipo, dados):
+        if tipo == "plano":
+            return (dados["faixa"], (tipo, dados), self.executar_plano, (dados,))
+        return (FAIXA_BLOQUEIO, (tipo, dados), self.desativar_fantasma, (dados,))
+
+    def executar_tarefas(self, tarefas):
+        """Roda as tarefas por faixa; as recusadas pelo disjuntor vão para o diário."""
+        if tarefas:
+            por_faixa = Counter(t[0] for t in tarefas)
+            logging.info("Fila de ações | " + " | ".join(f"{NOMES_FAIXAS[f]}: {por_faixa[f]}" for f in sorted(por_faixa)))
 
         upsert_banco_local = []
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            # Submetemos todos os alunos para processamento paralelo
-            future_to_mat = {executor.submit(self._sync_single_student, a[2], a, estado_local, mapa_turmas): a[2] for a in alunos_origem}
-            
-            for future in as_completed(future_to_mat):
-                try:
-                    res = future.result()
-                    if res:
-                        upsert_banco_local.append(res)
-                except Exception as e:
-                    mat_err = future_to_mat[future]
-                    logging.error(f"Erro ao processar aluno {mat_err}: {e}")
-        
+        agendador = AgendadorFaixas(max_workers=20, limites=LIMITES_PADRAO)
+        recusadas_antes = self.diario.gravadas
+        for (tipo, dados), future in agendador.executar(tarefas):
+            try:
+                res = future.result()
+                if res:
+                    upsert_banco_local.append(res)
+            except CircuitoAberto:
+                # Nada vai para alunos_lize: a próxima execução recalcula o mesmo diff
+                self.diario.registrar(tipo, dados)
+            except Exception as e:
+                mat = dados["mat"] if tipo == "plano" else dados[0]
+                logging.error(f"Erro ao processar aluno {mat}: {e}")
+        if agendador.tempos[FAIXA_ACESSO]:
+            self.tempo_ate_acesso = agendador.resumo(FAIXA_ACESSO)
+        if self.diario.gravadas > recusadas_antes:
+            logging.warning(f"CIRCUITO | {self.diario.gravadas - recusadas_antes} ações gravadas em {self.diario.caminho}. "
+                            f"Rode 'python envio_lize.py --retomar' quando a API voltar.")
+        return upsert_banco_local
+
+    def retomar(self):
+        """Reexecuta as ações do diário de retentativas (gravadas com o circuito aberto)."""
+        entradas = self.diario.retirar()
+        logging.info(f"Retomando {len(entradas)} ações do diário de retentativas...")
+        # JSON devolve o par (matrícula, dados) do fantasma como lista
+        tarefas = [self._tarefa(e["tipo"], e["dados"] if e["tipo"] == "plano" else tuple(e["dados"])) for e in entradas]
+        self.persistir_upserts(self.executar_tarefas(tarefas))
+        self.exibir_relatorio()
+
+    def detectar_fantasmas(self, alunos_origem, estado_local):
+        if self.usar_diff_vetorizado(alunos_origem):
+            return diff_vetorizado.detectar_fantasmas(alunos_origem, estado_local)
         # Caso 3: Deletados na fonte (Intrusos ou formados)
         mats_origem = {str(a[2]).strip() for a in alunos_origem}
-        fantasmas = []
-        for mat_del, aluno_del in estado_local.items():
-            # Só processa como fantasma se não estiver na fonte E ainda estiver ativo no cache
-            if mat_del not in mats_origem and aluno_del.get("ativo") is True:
-                fantasmas.append((mat_del, aluno_del))
-        
-        if fantasmas:
-            logging.info(f"Detectados {len(fantasmas)} alunos fantasmas/intrusos. Iniciando desativação paralela...")
-            
-            def desativar_fantasma(item):
-                mat_f, dados_f = item
-                sigla = self.siglas_diretas.get(mat_f[:2], "??")
-                logging.info(f"SUMIU DA FONTE | Mat: {mat_f} | {dados_f['nome']} | Desativando")
-                if self.api_disable(dados_f["id_api"]):
-                    h = self.gerar_hash(dados_f['nome'], False, "DELETADO")
-                    with self.stats_lock:
-                        self.stats_trocas["SUMIU DA FONTE"][sigla] += 1
-                    return (dados_f["id_api"], dados_f["nome"], mat_f, "", [], False, ANO_LETIVO_ATUAL, h)
-                return None
-
-            with ThreadPoolExecutor(max_workers=20) as executor:
-                futures = [executor.submit(desativar_fantasma, f) for f in fantasmas]
-                for future in as_completed(futures):
-                    res = future.result()
-                    if res: upsert_banco_local.append(res)
+        # Só processa como fantasma se não estiver na fonte E ainda estiver ativo no cache
+        return [(mat_del, aluno_del) for mat_del, aluno_del in estado_local.items()
+                if mat_del not in mats_origem and aluno_del.get("ativo") is True]
+
+    def desativar_fantasma(self, item):
+        mat_f, dados_f = item
+        sigla = self.siglas_diretas.get(mat_f[:2], "??")
+        logging.log(AUDITORIA, f"SUMIU DA FONTE | Mat: {mat_f} | {dados_f['nome']} | Desativando")
+        if self.api_disable(dados_f["id_api"]):
+            h = self.gerar_hash(dados_f['nome'], False, "DELETADO")
+            self._acumulador()["trocas"]["SUMIU DA FONTE"][sigla] += 1
+            return (dados_f["id_api"], dados_f["nome"], mat_f, "", [], False, ANO_LETIVO_ATUAL, h)
+        return None
 
+    def persistir_upserts(self, upsert_banco_local):
         if upsert_banco_local:
             with psycopg2.connect(**DB_CONFIG) as conn:
-                with conn.cursor() as cur:
-                    execute_values(cur, """INSERT INTO alunos_lize (id, nome, matricula, email, classes, ativo, ano_letivo, hash_estado)
-                                           VALUES %s ON CONFLICT (matricula, ano_letivo) DO UPDATE SET
-                                           nome=EXCLUDED.nome, ativo=EXCLUDED.ativo, classes=EXCLUDED.classes, hash_estado=EXCLUDED.hash_estado""", upsert_banco_local)
+                with conn.cursor() as cur, GravadorLote(cur, SQL_UPSERT_SYNC_ALUNOS, "alunos_lize", chave=(2, 6)) as gravador:
+                    gravador.adicionar_varios(upsert_banco_local)
+
+    def processar(self, alunos_origem=None):
+        """alunos_origem: população já lida da fonte (sincronizacao.py); se None, consulta a tabela geral."""
+        logging.info(f"Iniciando Sincronizacao Lize - Ano Letivo: {ANO_LETIVO_ATUAL}")
+        # O diff completo refaz tudo o que estava no diário
+        self.diario.descartar()
+        self.preparar()
+        
+        estado_local = self.carregar_estado_local()
+        mapa_turmas = self.carregar_mapa_turmas()
+        if alunos_origem is None:
+            alunos_origem = self.carregar_fonte()
+        
+        logging.info(f"Fonte da Verdade (Elegíveis): {len(alunos_origem)} alunos encontrados.")
+        logging.info(f"Cache Local (alunos_lize): {len(estado_local)} registros.")
+        logging.info("Iniciando comparação de dados...")
+
+        fantasmas = self.detectar_fantasmas(alunos_origem, estado_local)
+        upsert_banco_local = self.sincronizar_alunos(alunos_origem, estado_local, mapa_turmas, fantasmas)
+        self.persistir_upserts(upsert_banco_local)
         self.exibir_relatorio()
 
     def api_find_by_enrollment(self, mat):
         try:
-            r = self.session.get(f"https://app.lizeedu.com.br/api/v2/students/?enrollment_number={mat}", timeout=15)
+            r = self.cliente.get("students/", params={"enrollment_number": mat})
             if r.status_code == 200:
                 for aluno in r.json().get("results", []):
                     if str(aluno.get("enrollment_number", "")).strip() == str(mat).strip():
                         return aluno.get("id")
             return None
+        except CircuitoAberto: raise
         except Exception: return None
 
     def api_insert(self, nome, mat, email):
         try:
-            res = self.session.post("https://app.lizeedu.com.br/api/v2/students/", json={"name": nome, "enrollment_number": mat, "email": email}, timeout=15)
+            res = self.cliente.post("students/", json={"name": nome, "enrollment_number": mat, "email": email})
             if res.status_code == 201: return res.json().get("id")
             if res.status_code == 400: return self.api_find_by_enrollment(mat)
             return None
+        except CircuitoAberto: raise
         except Exception: return None
 
     def api_update_student(self, id_aluno, nome, mat, email):
         try:
-            url = f"https://app.lizeedu.com.br/api/v2/students/{id_aluno}/"
-            res = self.session.put(url, json={"name": nome, "enrollment_number": mat, "email": email}, timeout=15)
+            res = self.cliente.put(f"students/{id_aluno}/", json={"name": nome, "enrollment_number": mat, "email": email})
             if res.status_code == 200:
                 return True
             logging.error(f"Erro ao atualizar aluno {mat}: {res.status_code} - {res.text}")
             return False
+        except CircuitoAberto: raise
         except Exception as e:
             logging.error(f"Excecao ao atualizar aluno {mat}: {e}")
             return False
@@ -313,38 +469,42 @@ class LizeManager:
             if mat: payload["enrollment_number"] = mat
             if email: payload["email"] = email
             
-            r = self.session.post(f"https://app.lizeedu.com.br/api/v2/students/{id_aluno}/set_classes/", json=payload, timeout=15)
+            r = self.cliente.post(f"students/{id_aluno}/set_classes/", json=payload)
             if r.status_code in (200, 201, 204):
                 return True
             logging.error(f"Erro ao set_classes aluno {id_aluno}: {r.status_code} - {r.text}")
             return False
+        except CircuitoAberto: raise
         except Exception as e:
             logging.error(f"Excecao ao set_classes aluno {id_aluno}: {e}")
             return False
 
     def api_disable(self, id_a):
         try:
-            r = self.session.post(f"https://app.lizeedu.com.br/api/v2/students/{id_a}/disable/", timeout=15)
+            r = self.cliente.post(f"students/{id_a}/disable/")
             if r.status_code in (200, 204):
                 return True
             logging.warning(f"api_disable HTTP {r.status_code} | id {id_a}")
             return False
+        except CircuitoAberto: raise
         except Exception as e:
             logging.warning(f"api_disable exception | id {id_a} | {e}")
             return False
 
     def api_enable(self, id_a):
         try:
-            r = self.session.post(f"https://app.lizeedu.com.br/api/v2/students/{id_a}/enable/", timeout=15)
+            r = self.cliente.post(f"students/{id_a}/enable/")
             if r.status_code in (200, 204):
                 return True
             logging.warning(f"api_enable HTTP {r.status_code} | id {id_a}")
             return False
+        except CircuitoAberto: raise
         except Exception as e:
             logging.warning(f"api_enable exception | id {id_a} | {e}")
             return False
 
     def exibir_relatorio(self):
+        self.consolidar_stats()
         print("\n" + "="*95)
         print(f"RESUMO DE SINCRONIZACAO (API LIZE) - ANO LETIVO: {ANO_LETIVO_ATUAL}")
         print("="*95)
@@ -359,8 +519,16 @@ class LizeManager:
                 total = sum(unidades.values())
                 detalhe = ", ".join([f"{s}: {q}" for s, q in sorted(unidades.items())])
                 print(f"  {categoria:<30} | Total: {total:<4} | Detalhe: [{detalhe}]")
+        if self.tempo_ate_acesso:
+            t = self.tempo_ate_acesso
+            print(f"  {'TEMPO ATÉ ACESSO':<30} | Alunos: {t['n']:<4} | p50: {t['p50']:.1f}s | p95: {t['p95']:.1f}s | máx: {t['max']:.1f}s")
+        if self.disjuntor.aberturas:
+            print(f"  {'CIRCUITO ABERTO':<30} | Vezes: {self.disjuntor.aberturas:<4} | Recusadas: {self.disjuntor.recusadas} | Diário: {self.diario.caminho}")
         print("="*95)
         logging.info(f"Sincronizacao Lize {ANO_LETIVO_ATUAL} concluida.")
 
 if __name__ == "__main__":
-    LizeManager().processar()
\ No newline at end of file
+    if "--retomar" in sys.argv:
+        LizeManager().retomar()
+    else:
+        LizeManager().processar()
\ No newline at end of file
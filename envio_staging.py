@@ -1,9 +1,12 @@
-import psutil
-import requests
 import psycopg2
 from datetime import datetime
-from psycopg2.extras import execute_batch, DictCursor
+from psycopg2.extras import execute_values
 from constantes2 import HEADERS, DB_CONFIG, CODIGO_PARA_UNIDADE, COORDINATION_IDS, TABELA_ALUNOS_GERAL, ANO_LETIVO_ATUAL
+from gravador_lote import GravadorLote, sql_upsert
+from cliente_lize import ClienteLize
+
+# Cliente pooled do ambiente de staging (token de config2.env)
+cliente = ClienteLize("staging", headers=HEADERS)
 
 # Função para criar tabelas no banco de dados (se não existirem)
 def criar_tabelas():
@@ -41,7 +44,7 @@ def obter_dados_api(url, tipo_dado):
     pagina = 1
     while url:
         print(f"🔄 Obtendo {tipo_dado} da página {pagina}...")  # Indicador de progresso
-        response = requests.get(url, headers=HEADERS)
+        response = cliente.get(url)
         if response.status_code == 200:
             data = response.json()
             dados.extend(data.get("results", []))
@@ -58,38 +61,12 @@ def persistir_dados_em_lote(tabela, dados, colunas, conflito):
         return
     
     try:
-        # Configuração inicial do batch_size com fallback
-        try:
-            batch_size = 1000 if psutil.virtual_memory().percent < 70 else 500
-        except Exception:
-            batch_size = 500  # Fallback se psutil falhar
-        
-        print(f"🔧 Configuração inicial - Batch size: {batch_size} | RAM usada: {psutil.virtual_memory().percent}%")
-
+        # Lotes dimensionados pelo tamanho real das linhas (ver gravador_lote.py)
         with psycopg2.connect(**DB_CONFIG) as conexao:
-            with conexao.cursor() as cursor:
-                placeholders = ", ".join(["%s"] * len(colunas))
-                update_set = ", ".join(f"{coluna} = EXCLUDED.{coluna}" 
-                                     for coluna in colunas if coluna != conflito)
-                
-                query = f"""
-                    INSERT INTO {tabela} ({", ".join(colunas)})
-                    VALUES ({placeholders})
-                    ON CONFLICT ({conflito}) DO UPDATE
-                    SET {update_set};
-                """
-                
-                for i in range(0, len(dados), batch_size):
-                    # Reavalia o batch_size a cada 5 lotes (opcional)
-                    if i > 0 and i % (5 * batch_size) == 0:
-                        try:
-                            batch_size = 1000 if psutil.virtual_memory().percent < 70 else 500
-                            print(f"🔧 Ajuste dinâmico - Novo batch size: {batch_size} | RAM: {psutil.virtual_memory().percent}%")
-                        except Exception:
-                            pass  # Mantém o batch_size anterior
-                    
-                    batch = dados[i:i + batch_size]
-                    valores = [(
+            with conexao.cursor() as cursor, GravadorLote(cursor, sql_upsert(tabela, colunas, conflito), tabela,
+                                                          chave=(colunas.index(conflito),)) as gravador:
+                for dado in dados:
+                    gravador.adicionar((
                         dado.get("id"),
                         dado.get("name"),
                         dado.get("enrollment_number"),
@@ -102,17 +79,11 @@ def persistir_dados_em_lote(tabela, dados, colunas, conflito):
                         dado.get("name"),
                         dado.get("coordination"),
                         dado.get("school_year")
-                    ) for dado in batch]
-
-                    execute_batch(cursor, query, valores)
-                    conexao.commit()
-                    print(f"✅ Lote {i//batch_size + 1} persistido - {len(batch)} registros | RAM: {psutil.virtual_memory().percent}%")
-                
-                print(f"✅ Todos os dados persistidos na tabela {tabela}")
+                    ))
+            conexao.commit()
+        print(f"✅ Todos os dados persistidos na tabela {tabela} | {gravador.resumo()}")
     except Exception as e:
         print(f"❌ Erro ao persistir dados em lote: {e}")
-        if 'conexao' in locals():  # Garante que a conexão seja fechada em caso de erro
-            conexao.rollback()
 
 # Função para obter alunos do banco de dados local
 def obter_alunos_banco():
@@ -145,29 +116,52 @@ def obter_alunos_banco():
         print(f"❌ Erro ao obter alunos do banco: {e}")
         yield from ()  # Retorna gerador vazio em caso de erro
 
+# Caches em memória preenchidos uma vez por execução (carregar_caches)
+alunos_cache = {}
+turmas_cache = {}
+matricula_por_id = {}
+
+# Mudanças de status acumuladas para um único UPDATE no final (gravar_status_pendentes)
+status_pendentes = {}
+
+def carregar_caches():
+    with psycopg2.connect(**DB_CONFIG) as conexao:
+        with conexao.cursor() as cursor:
+            # Cache de alunos
+            cursor.execute("""
+                SELECT matricula, id, nome, email, ativo, classes 
+                FROM alunos_lize_teste;
+            """)
+            alunos_cache.clear()
+            alunos_cache.update({
+                row[0]: {
+                    'id': row[1],
+                    'nome': row[2],
+                    'email': row[3],
+                    'ativo': row[4],
+                    'classes': row[5] or []
+                } for row in cursor.fetchall()
+            })
+            matricula_por_id.clear()
+            matricula_por_id.update({info['id']: mat for mat, info in alunos_cache.items()})
+            
+            # Cache de turmas
+            cursor.execute("""
+                SELECT nome, coordination, id 
+                FROM turmas_lize_teste 
+                WHERE school_year = %s;
+            """, (datetime.now().year,))
+            turmas_cache.clear()
+            for nome, coordination, id_turma in cursor.fetchall():
+                turmas_cache.setdefault((coordination, nome), []).append(id_turma)
+
 def obter_id_aluno_por_matricula(matricula):
-    try:
-        with psycopg2.connect(**DB_CONFIG) as conexao:
-            with conexao.cursor() as cursor:
-                cursor.execute("SELECT id FROM alunos_lize_teste WHERE matricula = %s;", (matricula,))
-                return cursor.fetchone()[0] if cursor.rowcount > 0 else None
-    except Exception as e:
-        print(f"❌ Erro ao buscar ID do aluno: {e}")
-        return None
+    aluno_info = alunos_cache.get(matricula)
+    return aluno_info['id'] if aluno_info else None
 
 def aluno_tem_turma(aluno_id, turma_id):
-    try:
-        with psycopg2.connect(**DB_CONFIG) as conexao:
-            with conexao.cursor() as cursor:
-                cursor.execute("""
-                    SELECT classes FROM alunos_lize_teste 
-                    WHERE id = %s;
-                """, (aluno_id,))
-                result = cursor.fetchone()
-                return result and turma_id in result[0]
-    except Exception as e:
-        print(f"❌ Erro ao verificar turma do aluno: {e}")
-        return False
+    aluno_info = alunos_cache.get(matricula_por_id.get(aluno_id))
+    return bool(aluno_info) and turma_id in aluno_info['classes']
 
 # Função para definir a etapa de ensino com base no código da turma
 def definir_etapa_ensino(codigo_turma):
@@ -185,13 +179,13 @@ def processar_alunos():
     print("⏳ Iniciando coleta de dados...")
     
     # 1.1. Coletar dados da API
-    alunos_api = obter_dados_api("https://staging.lizeedu.com.br/api/v2/students/", "alunos")
-    turmas_api = obter_dados_api(f"https://staging.lizeedu.com.br/api/v2/classes/?school_year={datetime.now().year}", "turmas")
+    alunos_api = obter_dados_api("students/", "alunos")
+    turmas_api = obter_dados_api(f"classes/?school_year={datetime.now().year}", "turmas")
     
     # 1.2. Persistência otimizada em lote
     print("⏳ Persistindo dados da API...")
     persistir_dados_em_lote("alunos_lize_teste", alunos_api, 
-                          ["id", "nome", "matricula", "email", "classes", "ativo"], "matricula")
+                          ["id", "nome", "matricula", "email", "classes", "ativo", "ano_letivo"], "matricula")
     persistir_dados_em_lote("turmas_lize_teste", turmas_api, 
                           ["id", "nome", "coordination", "school_year"], "id")
     
@@ -215,32 +209,7 @@ def processar_alunos():
             alunos_para_processar.append(aluno)
         
     # 2.2. Carregar caches otimizados
-    with psycopg2.connect(**DB_CONFIG) as conexao:
-        with conexao.cursor() as cursor:
-            # Cache de alunos
-            cursor.execute("""
-                SELECT matricula, id, nome, email, ativo, classes 
-                FROM alunos_lize_teste;
-            """)
-            alunos_cache = {
-                row[0]: {
-                    'id': row[1],
-                    'nome': row[2],
-                    'email': row[3],
-                    'ativo': row[4],
-                    'classes': row[5] or []
-                } for row in cursor.fetchall()
-            }
-            
-            # Cache de turmas
-            cursor.execute("""
-                SELECT nome, coordination, id 
-                FROM turmas_lize_teste 
-                WHERE school_year = %s;
-            """, (datetime.now().year,))
-            turmas_cache = {}
-            for nome, coordination, id_turma in cursor.fetchall():
-                turmas_cache.setdefault((coordination, nome), []).append(id_turma)
+    carregar_caches()
     
     # 3. Fase de processamento principal
     print(f"⏳ Processando {len(alunos_para_processar)} alunos...")
@@ -291,16 +260,16 @@ def processar_alunos():
         # 3.3. Inserção/Atualização do aluno
         email_gerado = f"{matricula}@alunos.smrede.com.br"
         if not aluno_info:
-            if inserir_aluno(nome, matricula, email_gerado):
-                aluno_id = obter_id_aluno_por_matricula(matricula)
-                if aluno_id:
-                    alunos_cache[matricula] = {
-                        'id': aluno_id,
-                        'nome': nome,
-                        'email': email_gerado,
-                        'ativo': True,
-                        'classes': []
-                    }
+            aluno_id = inserir_aluno(nome, matricula, email_gerado)
+            if aluno_id:
+                matricula_por_id[aluno_id] = matricula
+                alunos_cache[matricula] = {
+                    'id': aluno_id,
+                    'nome': nome,
+                    'email': email_gerado,
+                    'ativo': True,
+                    'classes': []
+                }
         else:
             if aluno_info['nome'] != nome or aluno_info['email'] != email_gerado:
                 if atualizar_aluno(aluno_info['id'], nome, matricula, email_gerado):
@@ -326,7 +295,10 @@ def processar_alunos():
             velocidade = contador / tempo_decorrido if tempo_decorrido > 0 else 0
             print(f"↳ Progresso: {contador}/{len(alunos_para_processar)} | Velocidade: {velocidade:.2f} alunos/seg")
     
-    # 4. Relatório final
+    # 4. Persistência das mudanças de status em um único lote
+    gravar_status_pendentes()
+
+    # 5. Relatório final
     tempo_total = (datetime.now() - tempo_inicio).total_seconds()
     print(f"\n✅ Processamento concluído!\n"
           f"• Alunos processados: {contador}\n"
@@ -334,35 +306,43 @@ def processar_alunos():
           f"• Velocidade média: {contador/max(1, tempo_total):.2f} alunos/seg")
 
 def atualizar_status_aluno_local(id_aluno, status):
+    # Apenas registra; o banco é atualizado uma vez em gravar_status_pendentes()
+    status_pendentes[id_aluno] = status
+
+def gravar_status_pendentes():
+    if not status_pendentes:
+        return
     try:
         with psycopg2.connect(**DB_CONFIG) as conexao:
             with conexao.cursor() as cursor:
-                cursor.execute("""
-                    UPDATE alunos_lize_teste 
-                    SET ativo = %s 
-                    WHERE id = %s;
-                """, (status, id_aluno))
+                execute_values(cursor, """
+                    UPDATE alunos_lize_teste AS a
+                    SET ativo = v.ativo
+                    FROM (VALUES %s) AS v(id, ativo)
+                    WHERE a.id = v.id;
+                """, list(status_pendentes.items()))
                 conexao.commit()
-                print(f"✅ Status do aluno (ID: {id_aluno}) atualizado para {'ativo' if status else 'inativo'}.")
+                print(f"✅ Status de {len(status_pendentes)} alunos atualizado no banco local.")
+        status_pendentes.clear()
     except Exception as e:
-        print(f"❌ Erro ao atualizar status do aluno no banco local: {e}")
+        print(f"❌ Erro ao atualizar status dos alunos no banco local: {e}")
 
 # Funções da API (mantidas conforme o original)
 def associar_aluno_turma(student_id, school_class_id):
-    url = f"https://staging.lizeedu.com.br/api/v2/students/{student_id}/set_classes/"
+    url = f"students/{student_id}/set_classes/"
     payload = {"school_classes": [str(school_class_id)]}
-    response = requests.post(url, headers=HEADERS, json=payload)
+    response = cliente.post(url, json=payload)
     return response.status_code == 200
 
 def atualizar_aluno(aluno_id, nome, matricula, email):
-    url = f"https://staging.lizeedu.com.br/api/v2/students/{aluno_id}/"
+    url = f"students/{aluno_id}/"
     data = {"name": nome, "enrollment_number": matricula, "email": email}
-    response = requests.put(url, headers=HEADERS, json=data)
+    response = cliente.put(url, json=data)
     return response.status_code == 200
 
-def desativar_aluno(id_aluno, nome_aluno):
-    url = f"https://staging.lizeedu.com.br/api/v2/students/{id_aluno}/disable/"
-    response = requests.post(url, headers=HEADERS, json={})
+def desativar_aluno(id_aluno, nome_aluno, matricula=None):
+    url = f"students/{id_aluno}/disable/"
+    response = cliente.post(url, json={})
     if response.status_code in [200, 204]:
         print(f"❌ Aluno {nome_aluno} desativado com sucesso!")
         atualizar_status_aluno_local(id_aluno, False)  # Atualiza o banco local
@@ -371,9 +351,9 @@ def desativar_aluno(id_aluno, nome_aluno):
         print(f"❌ Erro ao desativar aluno {nome_aluno}: {response.status_code}")
         return False
 
-def ativar_aluno(id_aluno, nome_aluno):
-    url = f"https://staging.lizeedu.com.br/api/v2/students/{id_aluno}/enable/"
-    response = requests.post(url, headers=HEADERS, json={})
+def ativar_aluno(id_aluno, nome_aluno, matricula=None):
+    url = f"students/{id_aluno}/enable/"
+    response = cliente.post(url, json={})
     if response.status_code in [200, 204]:
         print(f"✅ Aluno {nome_aluno} ativado com sucesso!")
         atualizar_status_aluno_local(id_aluno, True)  # Atualiza o banco local
@@ -383,10 +363,11 @@ def ativar_aluno(id_aluno, nome_aluno):
         return False
 
 def inserir_aluno(nome, matricula, email):
-    url = "https://staging.lizeedu.com.br/api/v2/students/"
+    url = "students/"
     data = {"name": nome, "enrollment_number": matricula, "email": email}
-    response = requests.post(url, headers=HEADERS, json=data)
-    return response.status_code == 201
+    response = cliente.post(url, json=data)
+    # O id volta na própria resposta; dispensa nova consulta ao banco
+    return response.json().get("id") if response.status_code == 201 else None
 
 # Execução principal
 if __name__ == "__main__":
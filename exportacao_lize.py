@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import logging
+import psycopg2
+from datetime import datetime
+from constantes import DB_CONFIG, ANO_LETIVO_ATUAL, EXPORTACAO_LIZE
+from modelos_lize import decodificar_alunos, turmas_do_ano
+from snapshot_lize import consulta_canonica, max_idade_argv
+from envio_lize import LizeManager
+
+# Exportação em Parquet (requer polars): polars já é a dependência opcional do diff em colunas
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+# Exporta a população da fonte, o alunos_lize e a listagem de alunos do portal de uma execução
+# para Parquet particionado (execucao / ano_letivo / unidade), para auditorias offline:
+#   pl.scan_parquet("exportacao_lize/fonte/**/*.parquet", hive_partitioning=True)
+#   duckdb: SELECT ... FROM read_parquet('exportacao_lize/portal/**/*.parquet', hive_partitioning = true)
+# Uso: python exportacao_lize.py [destino] [--max-idade MIN]
+
+PARTICOES = ["execucao", "ano_letivo", "unidade"]
+PARAMS_PORTAL = {"school_year": ANO_LETIVO_ATUAL}
+
+def tabela_fonte(alunos_origem):
+    esquema = {"unidade": pl.String, "sit": pl.String, "matricula": pl.String, "nome": pl.String, "turma": pl.String}
+    return (pl.DataFrame(alunos_origem, schema=esquema, orient="row", strict=False)
+            .with_columns(pl.col("matricula", "nome", "turma").str.strip_chars(), pl.col("unidade").str.zfill(2),
+                          ano_letivo=pl.lit(ANO_LETIVO_ATUAL)))
+
+def tabela_cache():
+    """alunos_lize inteiro (todos os anos letivos)."""
+    with psycopg2.connect(**DB_CONFIG) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id, nome, matricula, email, classes, ativo, ano_letivo, hash_estado FROM alunos_lize")
+            linhas = cur.fetchall()
+    esquema = {"id": pl.String, "nome": pl.String, "matricula": pl.String, "email": pl.String, "classes": pl.List(pl.String),
+               "ativo": pl.Boolean, "ano_letivo": pl.Int64, "hash_estado": pl.String}
+    return (pl.DataFrame(linhas, schema=esquema, orient="row", strict=False)
+            .with_columns(pl.col("matricula").str.strip_chars())
+            # O prefixo da matrícula é o código da unidade (mesma regra das siglas)
+            .with_columns(unidade=pl.col("matricula").str.slice(0, 2)))
+
+def tabela_portal(cliente, max_idade):
+    """Alunos do ano no portal: snapshot local se recente (max_idade), senão varredura completa."""
+    alunos = [a for pg in cliente.paginar_offsets("students/", PARAMS_PORTAL, decodificar=decodificar_alunos, max_idade=max_idade)
+              for a in pg]
+    capturado_em = time.time()
+    if max_idade is not None and cliente.snapshot:
+        chave = (cliente.ambiente, "students/", consulta_canonica(PARAMS_PORTAL))
+        capturado_em = next((c[3] for c in cliente.snapshot.capturas() if c[:3] == chave), capturado_em)
+    return pl.DataFrame({
+        "id": [a.id for a in alunos],
+        "nome": [a.name for a in alunos],
+        "matricula": [str(a.enrollment_number or "").strip() for a in alunos],
+        "email": [a.email for a in alunos],
+        "ativo": [a.is_active for a in alunos],
+        "classes": [turmas_do_ano(a, ANO_LETIVO_ATUAL) for a in alunos],
+    }, schema={"id": pl.String, "nome": pl.String, "matricula": pl.String, "email": pl.String,
+               "ativo": pl.Boolean, "classes": pl.List(pl.String)}).with_columns(
+        ano_letivo=pl.lit(ANO_LETIVO_ATUAL), unidade=pl.col("matricula").str.slice(0, 2),
+        capturado_em=pl.lit(datetime.fromtimestamp(capturado_em)))
+
+def gravar(df, destino, nome, execucao):
+    caminho = os.path.join(destino, nome)
+    df.with_columns(execucao=pl.lit(execucao)).write_parquet(caminho, partition_by=PARTICOES)
+    print(f"💾 {nome}: {df.height} linhas em {caminho}")
+
+def exportar(destino=EXPORTACAO_LIZE, max_idade=None, gerente=None):
+    if pl is None:
+        print("❌ polars não instalado: pip install polars")
+        return None
+    gerente = gerente or LizeManager()
+    execucao = datetime.now().strftime("%Y%m%d_%H%M%S")
+    print(f"📦 Exportando execução {execucao} para {destino}...")
+    gravar(tabela_fonte(gerente.carregar_fonte()), destino, "fonte", execucao)
+    gravar(tabela_cache(), destino, "alunos_lize", execucao)
+    gravar(tabela_portal(gerente.cliente, max_idade), destino, "portal", execucao)
+    logging.info(f"Exportação {execucao} concluída em {destino}.")
+    return execucao
+
+if __name__ == "__main__":
+    argumentos = [a for i, a in enumerate(sys.argv[1:], 1) if not a.startswith("--") and sys.argv[i - 1] != "--max-idade"]
+    exportar(argumentos[0] if argumentos else EXPORTACAO_LIZE, max_idade=max_idade_argv())
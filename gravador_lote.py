@@ -0,0 +1,106 @@
+import sys
+import time
+import logging
+import psycopg2
+from psycopg2.extras import execute_values
+from constantes import ORCAMENTO_LOTE_BYTES
+
+def sql_upsert(tabela, colunas, conflito, colunas_update=None):
+    """Monta o INSERT ... VALUES %s ON CONFLICT DO UPDATE usado pelo GravadorLote."""
+    conflito = [conflito] if isinstance(conflito, str) else list(conflito)
+    if colunas_update is None:
+        colunas_update = [c for c in colunas if c not in conflito]
+    update_set = ", ".join(f"{c} = EXCLUDED.{c}" for c in colunas_update)
+    return f"""INSERT INTO {tabela} ({", ".join(colunas)}) VALUES %s
+               ON CONFLICT ({", ".join(conflito)}) DO UPDATE SET {update_set}"""
+
+def _tamanho(valor):
+    """Bytes ocupados pelo valor na memória (tuplas/listas somam os elementos)."""
+    if isinstance(valor, (tuple, list)):
+        return sys.getsizeof(valor) + sum(_tamanho(v) for v in valor)
+    return sys.getsizeof(valor)
+
+class GravadorLote:
+    """
+    Acumula linhas e grava com execute_values sempre que o tamanho real das linhas
+    pendentes atinge o orçamento de memória. `sql` deve conter um único VALUES %s
+    (ver sql_upsert). `chave` (índices das colunas de conflito) descarta repetições
+    dentro do mesmo lote, que o ON CONFLICT DO UPDATE não aceita; a última vence.
+    Lote recusado por erro de dado (DataError / IntegrityError) é regravado linha a linha
+    sob SAVEPOINT: as linhas ruins são registradas e puladas (`rejeitadas`), o resto grava.
+
+        with conn.cursor() as cur, GravadorLote(cur, sql_upsert(...), "alunos_lize", chave=(2, 6)) as g:
+            for linha in linhas: g.adicionar(linha)
+        print(g.resumo())
+    """
+    def __init__(self, cursor, sql, rotulo="lote", orcamento_bytes=None, chave=None, template=None):
+        self.cursor = cursor
+        self.sql = sql
+        self.rotulo = rotulo
+        self.orcamento_bytes = orcamento_bytes or ORCAMENTO_LOTE_BYTES
+        self.chave = chave
+        self.template = template
+        self._pendentes = {}
+        self._bytes = 0
+        self.linhas = 0
+        self.lotes = 0
+        self.rejeitadas = 0
+        self._inicio = time.monotonic()
+
+    def adicionar(self, linha):
+        k = tuple(linha[i] for i in self.chave) if self.chave else len(self._pendentes)
+        if k not in self._pendentes:
+            self._bytes += _tamanho(linha)
+        self._pendentes[k] = linha
+        if self._bytes >= self.orcamento_bytes:
+            self.gravar()
+
+    def adicionar_varios(self, linhas):
+        for linha in linhas:
+            self.adicionar(linha)
+
+    def gravar(self):
+        if not self._pendentes:
+            return
+        lote = list(self._pendentes.values())
+        self.cursor.execute("SAVEPOINT gravador_lote")
+        try:
+            execute_values(self.cursor, self.sql, lote, template=self.template, page_size=len(lote))
+            self.linhas += len(lote)
+        except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+            # Erro persistente: repetir o lote inteiro falharia sempre do mesmo jeito
+            self.cursor.execute("ROLLBACK TO SAVEPOINT gravador_lote")
+            logging.warning(f"{self.rotulo}: lote de {len(lote)} linhas recusado ({e.pgcode}), gravando linha a linha...")
+            self._gravar_linhas(lote)
+        self.cursor.execute("RELEASE SAVEPOINT gravador_lote")
+        self.lotes += 1
+        self._pendentes = {}
+        self._bytes = 0
+
+    def _gravar_linhas(self, lote):
+        for linha in lote:
+            self.cursor.execute("SAVEPOINT gravador_linha")
+            try:
+                execute_values(self.cursor, self.sql, [linha], template=self.template)
+                self.linhas += 1
+            except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+                self.cursor.execute("ROLLBACK TO SAVEPOINT gravador_linha")
+                self.rejeitadas += 1
+                logging.error(f"{self.rotulo}: linha rejeitada {linha[:3]} | {str(e).strip().splitlines()[0]}")
+            self.cursor.execute("RELEASE SAVEPOINT gravador_linha")
+
+    def linhas_por_segundo(self):
+        decorrido = time.monotonic() - self._inicio
+        return self.linhas / decorrido if decorrido > 0 else 0.0
+
+    def resumo(self):
+        rejeitadas = f" | {self.rejeitadas} rejeitadas" if self.rejeitadas else ""
+        return f"{self.rotulo}: {self.linhas} linhas em {self.lotes} lotes{rejeitadas} | {self.linhas_por_segundo():.0f} linhas/s"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.gravar()
+        return False
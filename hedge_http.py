@@ -0,0 +1,102 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from constantes import HEDGE_ORCAMENTO
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+class GetComHedge:
+    """
+    GET idempotente com hedging: se a resposta não chega até o p95 das latências
+    observadas, dispara uma cópia e fica com a primeira resposta 200. As cópias
+    respeitam um orçamento (fração das requisições); com orcamento=0 é um GET comum.
+
+        with GetComHedge(sessao) as hedge:
+            r = hedge.get(url, timeout=15)
+        logging.info(hedge.resumo())
+    """
+    def __init__(self, sessao, orcamento=None, percentil=95, atraso_inicial=2.0, amostras_minimas=20, max_workers=40):
+        self.sessao = sessao
+        self.orcamento = HEDGE_ORCAMENTO if orcamento is None else orcamento
+        self.percentil = percentil
+        self.atraso_inicial = atraso_inicial
+        self.amostras_minimas = amostras_minimas
+        self._latencias = deque(maxlen=500)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self.requisicoes = 0
+        self.copias = 0
+        self.copias_venceram = 0
+
+    def _atraso(self):
+        with self._lock:
+            if len(self._latencias) < self.amostras_minimas:
+                return self.atraso_inicial
+            return _percentil(self._latencias, self.percentil)
+
+    def _pode_copiar(self):
+        with self._lock:
+            if self.copias + 1 > self.orcamento * self.requisicoes:
+                return False
+            self.copias += 1
+            return True
+
+    def _get_medido(self, url, kwargs):
+        inicio = time.monotonic()
+        resp = self.sessao.get(url, **kwargs)
+        # Toda tentativa concluída entra na amostra, inclusive a perdedora e as não-200:
+        # contar só a vencedora deixaria o p95 enviesado para baixo
+        with self._lock:
+            self._latencias.append(time.monotonic() - inicio)
+        return resp
+
+    def get(self, url, **kwargs):
+        with self._lock:
+            self.requisicoes += 1
+        if self.orcamento <= 0:
+            return self.sessao.get(url, **kwargs)
+
+        original = self._executor.submit(self._get_medido, url, kwargs)
+        pendentes = {original}
+        wait(pendentes, timeout=self._atraso())
+        if not original.done() and self._pode_copiar():
+            pendentes.add(self._executor.submit(self._get_medido, url, kwargs))
+
+        erro = ultima = None
+        while pendentes:
+            concluidos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                try:
+                    resp = futuro.result()
+                except Exception as e:
+                    erro = e
+                    continue
+                # Resposta não-200 só vale se a outra também não trouxer 200
+                if resp.status_code != 200 and pendentes:
+                    ultima = resp
+                    continue
+                if futuro is not original:
+                    with self._lock:
+                        self.copias_venceram += 1
+                # A requisição perdedora termina em segundo plano; o resultado é descartado
+                return resp
+        if ultima is not None:
+            return ultima
+        raise erro
+
+    def resumo(self):
+        return (f"hedge: {self.requisicoes} GETs | {self.copias} cópias ({self.copias_venceram} venceram) | "
+                f"atraso atual {self._atraso():.2f}s")
+
+    def encerrar(self):
+        self._executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.encerrar()
+        return False
@@ -1,4 +1,4 @@
-import requests
+from cliente_lize import ClienteLize
 import os
 from dotenv import load_dotenv
 
@@ -13,17 +13,17 @@ HEADERS = {
     "Accept": "application/json"
 }
 
+cliente = ClienteLize("staging", headers=HEADERS)
+
 # Função para inserir aluno
 def inserir_aluno(nome, matricula, email):
-    url = "https://staging.lizeedu.com.br/api/v2/students/"
-    
     data = {
         "name": nome,
         "enrollment_number": matricula,
         "email": email,
     }
     
-    response = requests.post(url, headers=HEADERS, json=data)
+    response = cliente.post("students/", json=data)
 
     if response.status_code == 201:
         print(f"✅ Aluno '{nome}' inserido com sucesso!")
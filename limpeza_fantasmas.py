@@ -1,69 +1,94 @@
 import requests
-import psycopg2
-from envio_lize import LizeManager
-from constantes import DB_CONFIG, TABELA_ALUNOS_GERAL, ANO_LETIVO_ATUAL
+from disjuntor_lize import CircuitoAberto
+from motor_limpeza import MotorLimpeza, RegraForaDaFonte, carregar_matriculas_validas
+from constantes import ANO_LETIVO_ATUAL
+from logs_lize import configurar_logs
 import logging
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Configuração de log
-logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(message)s")
+configurar_logs()
 
-class GhostCleaner(LizeManager):
-    def processar_fantasma(self, aluno, mats_validas):
-        mat = str(aluno.get("enrollment_number")).strip()
-        id_aluno = aluno.get("id")
-        nome = aluno.get("name")
-        
-        if mat not in mats_validas:
-            logging.info(f"🚫 FANTASMA DETECTADO | Mat: {mat} | Nome: {nome}")
-            
-            # 1. Remover de todas as turmas
-            if self.api_set_classes(id_aluno, None):
-                logging.info(f"   - Turmas removidas com sucesso.")
-            
-            # 2. Desativar se estiver ativo
-            if aluno.get("is_active"):
-                if self.api_disable(id_aluno):
-                    logging.info(f"   - Aluno desativado com sucesso.")
-            return True
-        return False
+# Apenas alunos ativos: os inativos nao precisam de nenhuma mutacao
+PARAMS_ATIVOS = {"school_year": ANO_LETIVO_ATUAL, "is_active": "true"}
+TAMANHO_PAGINA = 50
+
+class GhostCleaner(MotorLimpeza):
+    """
+    RegraForaDaFonte do motor_limpeza (sit 2/4 fora, tirando das turmas) aplicada em streaming:
+    cada página é processada enquanto a próxima é baixada, em vez do snapshot completo.
+    """
+    def __init__(self, max_workers=5):
+        super().__init__([], max_workers=max_workers)
+
+    def processar_fantasma(self, aluno):
+        # Mesma passada do MotorLimpeza.executar: a primeira regra que casar decide
+        for regra in self.regras:
+            if regra.avaliar(aluno):
+                return self._aplicar(regra, aluno)
+        return None
+
+    def buscar_pagina(self, offset):
+        r = self.cliente.get("students/", params={**PARAMS_ATIVOS, "limit": TAMANHO_PAGINA, "offset": offset})
+        if r.status_code != 200:
+            raise RuntimeError(f"Erro na API: {r.status_code} (offset {offset})")
+        return r.json().get("results", [])
 
     def executar_limpeza(self):
         logging.info("🚀 Iniciando Limpeza Profunda de Alunos Fantasmas (Lize 2026)...")
         
         # 1. Carregar matrículas válidas
-        with psycopg2.connect(**DB_CONFIG) as conn:
-            with conn.cursor() as cur:
-                cur.execute(f"SELECT matricula FROM {TABELA_ALUNOS_GERAL} WHERE (turma::NUMERIC >= 11500) AND (sit::NUMERIC NOT IN (2, 4))")
-                mats_validas = {str(r[0]).strip() for r in cur.fetchall()}
+        mats_validas = carregar_matriculas_validas(excluir_situacoes=True)
+        self.regras = [RegraForaDaFonte(mats_validas, remover_turmas=True)]
         
         logging.info(f"✅ Matrículas válidas na fonte (2026): {len(mats_validas)}")
         
-        # 2. Iterar sobre a API (Paginado)
-        url = f"https://app.lizeedu.com.br/api/v2/students/?school_year={ANO_LETIVO_ATUAL}"
-        total_limpos = 0
-        
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            while url:
-                logging.info(f"Buscando página: {url}")
-                r = self.session.get(url, timeout=15)
-                if r.status_code != 200:
-                    logging.error(f"Erro na API: {r.status_code}")
+        # 2. Total de ativos para montar os offsets
+        try:
+            total_ativos = self.cliente.contar("students/", PARAMS_ATIVOS)
+        except requests.RequestException as e:
+            logging.error(f"Erro na API: {e}")
+            return
+
+        # Offsets em ordem decrescente: desativar alunos da pagina atual so desloca
+        # registros de offsets maiores (ja processados), entao nenhum ativo e pulado
+        offsets = list(range(0, total_ativos, TAMANHO_PAGINA))[::-1]
+        logging.info(f"Varrendo {total_ativos} alunos ativos em {len(offsets)} paginas (com pre-busca)...")
+        desativados = []
+
+        # Pipeline: a proxima pagina e baixada enquanto as acoes da pagina atual rodam
+        with ThreadPoolExecutor(max_workers=1) as busca, ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            proxima = busca.submit(self.buscar_pagina, offsets[0]) if offsets else None
+            for i, offset in enumerate(offsets):
+                try:
+                    alunos = proxima.result()
+                except Exception as e:
+                    logging.error(str(e))
                     break
+                if i + 1 < len(offsets):
+                    proxima = busca.submit(self.buscar_pagina, offsets[i + 1])
                 
-                data = r.json()
-                alunos = data.get("results", [])
-                
-                futures = [executor.submit(self.processar_fantasma, a, mats_validas) for a in alunos]
+                futures = [executor.submit(self.processar_fantasma, a) for a in alunos]
+                circuito_aberto = False
                 for future in as_completed(futures):
-                    if future.result():
-                        total_limpos += 1
+                    try:
+                        res = future.result()
+                    except CircuitoAberto:
+                        circuito_aberto = True
+                        continue
+                    if res:
+                        desativados.append(res)
+                if circuito_aberto:
+                    # Sem diário aqui: a próxima varredura encontra os mesmos fantasmas
+                    logging.error("API degradada (circuito aberto). Limpeza interrompida; rode novamente mais tarde.")
+                    break
                 
-                url = data.get("next")
-                logging.info(f"Status: {total_limpos} fantasmas removidos até o momento...")
+                logging.info(f"Status: pagina {i + 1}/{len(offsets)} | {len(desativados)} fantasmas removidos até o momento...")
 
+        # Mesmo UPDATE do motor: alunos_lize fica coerente com o que foi desativado
+        self.gravar_desativados(desativados)
         logging.info("="*60)
-        logging.info(f"🏁 LIMPEZA CONCLUÍDA! Total de {total_limpos} fantasmas expulsos de 2026.")
+        logging.info(f"🏁 LIMPEZA CONCLUÍDA! Total de {len(desativados)} fantasmas expulsos de {ANO_LETIVO_ATUAL}.")
         logging.info("="*60)
 
 if __name__ == "__main__":
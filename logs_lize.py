@@ -0,0 +1,137 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import multiprocessing.util
+import os
+import queue
+import re
+import time
+
+# Formato tabular padrao dos scripts
+FORMATO_PADRAO = "%(asctime)s | %(message)s"
+
+# Trechos variaveis (UUIDs e numeros) ignorados ao agrupar mensagens repetidas
+_TRECHO_VARIAVEL = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|\d+", re.IGNORECASE)
+
+# Nivel de auditoria (entre INFO e WARNING): uma linha por aluno alterado/desativado.
+# Nunca e agregado: logging.log(AUDITORIA, "SUMIU DA FONTE | Mat: ...")
+AUDITORIA = 25
+logging.addLevelName(AUDITORIA, "AUDITORIA")
+
+_listener = None
+
+class FormatadorJson(logging.Formatter):
+    """Uma linha JSON por registro, para runs grandes processados por ferramentas."""
+    def format(self, record):
+        dados = {
+            "ts": self.formatTime(record),
+            "nivel": record.levelname,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "suprimidas", None):
+            dados["suprimidas"] = record.suprimidas
+        if record.exc_info:
+            dados["exc"] = self.formatException(record.exc_info)
+        return json.dumps(dados, ensure_ascii=False)
+
+class AgregadorRepetidas(logging.Handler):
+    """
+    Repassa ao handler de destino no maximo `limite` mensagens semelhantes por janela.
+    O excedente e contado e resumido em uma unica linha quando a janela vira.
+    Registros de nivel AUDITORIA sempre passam (trilha por aluno).
+    Roda apenas na thread do QueueListener, nunca nos workers.
+    """
+    def __init__(self, destino, limite=20, janela=10.0):
+        super().__init__()
+        self.destino = destino
+        self.limite = limite
+        self.janela = janela
+        self._inicio_janela = time.monotonic()
+        self._contagem = {}
+        self._suprimidas = {}
+
+    def _chave(self, record):
+        # Mensagens tabulares "CATEGORIA | campo | campo" sao agrupadas pela categoria
+        msg = record.getMessage()
+        categoria = msg.split(" | ", 1)[0] if " | " in msg else msg
+        return (record.levelno, _TRECHO_VARIAVEL.sub("#", categoria))
+
+    def _virar_janela(self):
+        for (nivel, _), (qtd, exemplo) in self._suprimidas.items():
+            resumo = logging.makeLogRecord({
+                "name": exemplo.name, "levelno": nivel, "levelname": logging.getLevelName(nivel),
+                "msg": f"(+{qtd} mensagens semelhantes suprimidas) {exemplo.getMessage()}",
+                "threadName": exemplo.threadName, "suprimidas": qtd,
+            })
+            self.destino.handle(resumo)
+        self._contagem.clear()
+        self._suprimidas.clear()
+        self._inicio_janela = time.monotonic()
+
+    def emit(self, record):
+        if time.monotonic() - self._inicio_janela >= self.janela:
+            self._virar_janela()
+        if record.levelno == AUDITORIA:
+            self.destino.handle(record)
+            return
+        chave = self._chave(record)
+        vistas = self._contagem.get(chave, 0) + 1
+        self._contagem[chave] = vistas
+        if vistas <= self.limite or record.levelno >= logging.CRITICAL:
+            self.destino.handle(record)
+        else:
+            qtd, _ = self._suprimidas.get(chave, (0, None))
+            self._suprimidas[chave] = (qtd + 1, record)
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._suprimidas:
+                self._virar_janela()
+            self.destino.flush()
+        finally:
+            self.release()
+
+def configurar_logs(nivel=logging.INFO, json_saida=None, limite_repetidas=20, janela_repetidas=10.0):
+    """
+    Roteia o logging raiz por um QueueHandler: os workers apenas enfileiram o registro
+    e um QueueListener faz a agregacao de repetidas e o I/O de console.
+    Saida JSON opcional por parametro ou pela variavel LIZE_LOG_JSON=1.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    if json_saida is None:
+        json_saida = os.getenv("LIZE_LOG_JSON", "").lower() in ("1", "true", "sim")
+
+    console = logging.StreamHandler()
+    console.setFormatter(FormatadorJson() if json_saida else logging.Formatter(FORMATO_PADRAO))
+    agregador = AgregadorRepetidas(console, limite=limite_repetidas, janela=janela_repetidas)
+
+    fila = queue.SimpleQueue()
+    raiz = logging.getLogger()
+    for h in list(raiz.handlers):
+        raiz.removeHandler(h)
+    raiz.addHandler(logging.handlers.QueueHandler(fila))
+    raiz.setLevel(nivel)
+
+    _listener = logging.handlers.QueueListener(fila, agregador, respect_handler_level=False)
+    _listener.start()
+    # Drena a fila antes do logging.shutdown (atexit roda em ordem inversa de registro)
+    atexit.register(_listener.stop)
+    return _listener
+
+def configurar_logs_processo(*args, **kwargs):
+    """
+    initializer de ProcessPoolExecutor: no fork o filho herda o QueueHandler e o _listener,
+    mas não a thread do listener, e os registros ficariam parados na fila. Recria os dois.
+    """
+    global _listener
+    _listener = None
+    listener = configurar_logs(*args, **kwargs)
+    # Workers do multiprocessing saem por os._exit (sem atexit): drena a fila no finalizador
+    multiprocessing.util.Finalize(None, listener.stop, exitpriority=10)
+    return listener
@@ -0,0 +1,55 @@
+import json
+from collections import namedtuple
+
+# Decodificador mais rápido disponível: msgspec (direto para structs) > orjson > json
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if msgspec is not None:
+    class TurmaRef(msgspec.Struct):
+        id: str
+        school_year: int | None = None
+
+    class AlunoPortal(msgspec.Struct):
+        """Só os campos usados pelos scripts; o resto do payload é ignorado na decodificação."""
+        id: str
+        name: str | None = None
+        enrollment_number: str | None = None
+        email: str | None = None
+        is_active: bool = True
+        classes: list[TurmaRef] = []
+
+    class _PaginaAlunos(msgspec.Struct):
+        results: list[AlunoPortal] = []
+
+    _decoder_pagina = msgspec.json.Decoder(_PaginaAlunos, strict=False)
+
+    def decodificar_alunos(conteudo):
+        return _decoder_pagina.decode(conteudo).results
+
+    DECODIFICADOR = "msgspec"
+else:
+    TurmaRef = namedtuple("TurmaRef", "id school_year")
+    AlunoPortal = namedtuple("AlunoPortal", "id name enrollment_number email is_active classes")
+    _loads = orjson.loads if orjson is not None else json.loads
+
+    def decodificar_alunos(conteudo):
+        return [AlunoPortal(a.get("id"), a.get("name"), a.get("enrollment_number"), a.get("email"),
+                            a.get("is_active", True),
+                            [TurmaRef(c.get("id"), c.get("school_year")) for c in a.get("classes") or []])
+                for a in _loads(conteudo).get("results", [])]
+
+    DECODIFICADOR = "orjson" if orjson is not None else "json"
+
+def carregar_json(conteudo):
+    """json.loads com o parser mais rápido instalado (para payloads sem struct)."""
+    return orjson.loads(conteudo) if orjson is not None else json.loads(conteudo)
+
+def turmas_do_ano(aluno, ano):
+    return [c.id for c in aluno.classes if c.school_year == ano]
@@ -0,0 +1,168 @@
+import logging
+import requests
+import psycopg2
+from psycopg2.extras import execute_values
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from envio_lize import LizeManager
+from logs_lize import AUDITORIA
+from constantes import DB_CONFIG, TABELA_ALUNOS_GERAL, ANO_LETIVO_ATUAL
+
+class RegraLimpeza:
+    """Regra plugável do motor de limpeza: decide, para um aluno do snapshot, se ele deve ser desativado."""
+    nome = "REGRA"
+    remover_turmas = False
+
+    def preparar(self, alunos):
+        """Recebe o snapshot completo antes da varredura (para regras que dependem de agregados)."""
+        pass
+
+    def avaliar(self, aluno):
+        return False
+
+class RegraForaDaFonte(RegraLimpeza):
+    """
+    Aluno ativo no portal cuja matrícula não está entre as elegíveis da fonte.
+    remover_turmas=True também tira o aluno das turmas antes de desativar (GhostCleaner);
+    a faxina só desativa.
+    """
+    nome = "FORA DA FONTE"
+
+    def __init__(self, mats_validas, remover_turmas=False):
+        self.mats_validas = mats_validas
+        self.remover_turmas = remover_turmas
+
+    def avaliar(self, aluno):
+        return str(aluno.get("enrollment_number")).strip() not in self.mats_validas
+
+class RegraMatriculaCurta(RegraLimpeza):
+    """Matrícula com menos dígitos que o padrão (cadastros manuais/errados)."""
+    nome = "MATRICULA CURTA"
+
+    def __init__(self, tamanho_minimo=9):
+        self.tamanho_minimo = tamanho_minimo
+
+    def avaliar(self, aluno):
+        mat = str(aluno.get("enrollment_number") or "").strip()
+        # Sem matrícula não é "curta": LENGTH(NULL) < 9 não casava na limpeza original
+        if not mat or mat.lower() == "none":
+            return False
+        return len(mat) < self.tamanho_minimo
+
+class RegraDuplicadaSemTurma(RegraLimpeza):
+    """Matrícula repetida no portal: desativa as cópias que não estão em nenhuma turma."""
+    nome = "DUPLICADA SEM TURMA"
+
+    def __init__(self):
+        self.contagem = Counter()
+
+    def preparar(self, alunos):
+        self.contagem = Counter(str(a.get("enrollment_number")).strip() for a in alunos)
+
+    def avaliar(self, aluno):
+        return self.contagem[str(aluno.get("enrollment_number")).strip()] > 1 and not aluno.get("classes")
+
+def carregar_matriculas_validas(excluir_situacoes=False):
+    """
+    Matrículas da fonte com turma >= 11500. excluir_situacoes=True também descarta sit 2/4
+    (mesmo critério do envio_lize, usado pelo GhostCleaner); a faxina considera válida
+    qualquer matrícula com turma, como sempre fez.
+    """
+    filtro_sit = " AND (sit::NUMERIC NOT IN (2, 4))" if excluir_situacoes else ""
+    with psycopg2.connect(**DB_CONFIG) as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT matricula FROM {TABELA_ALUNOS_GERAL} WHERE (turma::NUMERIC >= 11500){filtro_sit}")
+            return {str(r[0]).strip() for r in cur.fetchall()}
+
+class MotorLimpeza(LizeManager):
+    """
+    Aplica todas as regras em uma única passada sobre um snapshot do portal (baixado uma vez),
+    executa as desativações em paralelo e grava o resultado em alunos_lize com um único UPDATE.
+    """
+    def __init__(self, regras, max_workers=20):
+        super().__init__()
+        self.regras = regras
+        self.max_workers = max_workers
+        self._snapshot = None
+
+    def carregar_snapshot(self):
+        if self._snapshot is not None:
+            return self._snapshot
+
+        params = {"school_year": ANO_LETIVO_ATUAL, "is_active": "true"}
+        try:
+            total_records = self.cliente.contar("students/", params)
+        except requests.RequestException as e:
+            raise RuntimeError(f"Erro ao consultar total de ativos: {e}")
+        logging.info(f"Snapshot do portal: baixando {total_records} alunos ativos em {total_records // 50 + 1} paginas...")
+
+        alunos = []
+        for alunos_pg in self.cliente.paginar_offsets("students/", params, total=total_records, max_workers=self.max_workers):
+            alunos.extend(alunos_pg)
+
+        # Paginas por offset podem repetir registros nas bordas; o id do portal é único
+        self._snapshot = list({a["id"]: a for a in alunos}.values())
+        logging.info(f"Snapshot carregado: {len(self._snapshot)} alunos ativos.")
+        return self._snapshot
+
+    def _aplicar(self, regra, aluno):
+        id_aluno = aluno.get("id")
+        mat = str(aluno.get("enrollment_number")).strip()
+        logging.log(AUDITORIA, f"{regra.nome} | Mat: {mat} | {aluno.get('name')} | Desativando")
+        if regra.remover_turmas and aluno.get("classes"):
+            self.api_set_classes(id_aluno, None)
+        if self.api_disable(id_aluno):
+            return (id_aluno, self.gerar_hash(str(aluno.get("name") or ""), False, "DELETADO"))
+        return None
+
+    def gravar_desativados(self, desativados):
+        """Um único UPDATE em alunos_lize com os (id, hash) devolvidos por _aplicar."""
+        if not desativados:
+            return
+        with psycopg2.connect(**DB_CONFIG) as conn:
+            with conn.cursor() as cur:
+                execute_values(cur, f"""UPDATE alunos_lize AS a SET ativo = FALSE, hash_estado = v.hash
+                                        FROM (VALUES %s) AS v(id, hash)
+                                        WHERE a.id = v.id AND a.ano_letivo = {ANO_LETIVO_ATUAL}""", desativados)
+
+    def executar(self):
+        alunos = self.carregar_snapshot()
+        for regra in self.regras:
+            regra.preparar(alunos)
+
+        # Passada única: a primeira regra que casar define a ação do aluno
+        acoes = []
+        for aluno in alunos:
+            for regra in self.regras:
+                if regra.avaliar(aluno):
+                    acoes.append((regra, aluno))
+                    break
+
+        logging.info(f"{len(acoes)} desativações planejadas por {len(self.regras)} regras.")
+        desativados = []
+        por_regra = defaultdict(int)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._aplicar, regra, aluno): regra for regra, aluno in acoes}
+            for future in as_completed(futures):
+                try:
+                    res = future.result()
+                except Exception as e:
+                    logging.error(f"Erro ao desativar aluno: {e}")
+                    continue
+                if res:
+                    desativados.append(res)
+                    por_regra[futures[future].nome] += 1
+
+        self.gravar_desativados(desativados)
+
+        for nome_regra, qtd in sorted(por_regra.items()):
+            logging.info(f"  {nome_regra:<25} | Desativados: {qtd}")
+        logging.info(f"Limpeza concluída: {len(desativados)}/{len(acoes)} alunos desativados.")
+        return desativados
+
+if __name__ == "__main__":
+    MotorLimpeza([
+        RegraForaDaFonte(carregar_matriculas_validas()),
+        RegraMatriculaCurta(),
+        RegraDuplicadaSemTurma(),
+    ]).executar()
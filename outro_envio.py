@@ -2,6 +2,7 @@ import os
 from dotenv import load_dotenv
 import requests
 import psycopg2  # Biblioteca para PostgreSQL
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from constantes import TABELA_ALUNOS_GERAL
 
 # Carregar variáveis do arquivo .env
@@ -37,121 +38,168 @@ unidades_api = {
     "Recreio dos Bandeirantes": 35034
 }
 
-# 🔹 Cache para turmas já consultadas
-turmas_cache = {}
+URL_BASE = "https://app.redacaonline.com.br/api"
+MAX_WORKERS = 10
 
-def obter_turmas_api(unit_id, nome_turma):
-    if (unit_id, nome_turma) in turmas_cache:
-        return turmas_cache[(unit_id, nome_turma)]  # Retorna do cache sem chamar API
+class ClienteRedacaoOnline:
+    """
+    Adaptador da API do Redação Online: uma sessão com pool de conexões e índices
+    pré-carregados uma vez por execução (alunos por external_id e por nome, turmas por
+    (unit_id, nome)). Nenhuma consulta por aluno dispara uma nova listagem completa.
+    """
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.max_workers = max_workers
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(HEADERS)
+        self.alunos_por_matricula = {}
+        self.alunos_por_nome = {}
+        self.turmas = {}
 
-    url = "https://app.redacaonline.com.br/api/classes"
-    response = requests.get(url, headers=HEADERS, params={"name": nome_turma, "unit_id": unit_id})
+    # 🔹 Busca única de todos os alunos na API
+    def carregar_alunos(self):
+        url = f"{URL_BASE}/students"
+        page = 1
 
-    try:
-        turmas = response.json()
-        if not isinstance(turmas, list):
-            print(f"⚠ Resposta inesperada da API: {turmas}")
-            return None
+        while True:
+            print(f"🔄 Buscando alunos na página {page}...")
+            response = self.session.get(url, params={"page": page}, timeout=10)
+            if response.status_code != 200:
+                print(f"Erro ao listar alunos: {response.text}")
+                return False
+
+            data = response.json()
+            for aluno in data.get("data", []):
+                self._indexar_aluno(aluno)
+
+            if "next_page_url" not in data or not data["next_page_url"]:
+                print(f"✅ Todas as páginas de alunos foram carregadas ({len(self.alunos_por_matricula)} alunos).")
+                return True
+            
+            page += 1
+
+    def _indexar_aluno(self, aluno):
+        self.alunos_por_matricula[str(aluno["external_id"])] = aluno
+        self.alunos_por_nome[str(aluno["name"]).lower()] = aluno
+
+    # 🔹 Uma consulta por unidade (em paralelo) em vez de uma por (unidade, turma)
+    def carregar_turmas(self, unit_ids):
+        def turmas_da_unidade(unit_id):
+            response = self.session.get(f"{URL_BASE}/classes", params={"unit_id": unit_id}, timeout=10)
+            turmas = response.json()
+            if not isinstance(turmas, list):
+                print(f"⚠ Resposta inesperada da API para a unidade {unit_id}: {turmas}")
+                return unit_id, []
+            return unit_id, turmas
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(turmas_da_unidade, u) for u in set(unit_ids)]
+            for future in as_completed(futures):
+                try:
+                    unit_id, turmas = future.result()
+                except Exception as e:
+                    print(f"Erro ao obter turmas: {e}")
+                    continue
+                for turma in turmas:
+                    self.turmas[(unit_id, str(turma["name"]))] = turma["id"]
+        print(f"✅ {len(self.turmas)} turmas carregadas.")
 
-        for turma in turmas:
-            if turma["name"] == str(nome_turma):
-                turmas_cache[(unit_id, nome_turma)] = turma["id"]  # Salva no cache
-                return turma["id"]
+    def obter_turma(self, unit_id, nome_turma):
+        chave = (unit_id, str(nome_turma))
+        if chave in self.turmas:
+            return self.turmas[chave]
+
+        # Turma criada depois da pré-carga: uma consulta filtrada, resultado guardado no índice
+        try:
+            response = self.session.get(f"{URL_BASE}/classes", params={"name": nome_turma, "unit_id": unit_id}, timeout=10)
+            turmas = response.json()
+            if not isinstance(turmas, list):
+                print(f"⚠ Resposta inesperada da API: {turmas}")
+                return None
+            for turma in turmas:
+                if turma["name"] == str(nome_turma):
+                    self.turmas[chave] = turma["id"]
+                    return turma["id"]
+        except Exception as e:
+            print(f"Erro ao obter turmas: {e}")
+            return None
 
         print(f"⚠ Turma '{nome_turma}' não encontrada na unidade {unit_id}.")
+        self.turmas[chave] = None  # Evita repetir a consulta para a mesma turma
         return None
 
-    except Exception as e:
-        print(f"Erro ao obter turmas: {e}")
-        return None
+    # Obter aluno pelo external_id
+    def obter_aluno(self, matricula):
+        return self.alunos_por_matricula.get(str(matricula))
 
-# 🔹 Busca única de todos os alunos na API
-def listar_alunos():
-    url = "https://app.redacaonline.com.br/api/students"
-    alunos_api = {}
-    page = 1
-
-    while True:
-        print(f"🔄 Buscando alunos na página {page}...")
-        response = requests.get(url, headers=HEADERS, params={"page": page}, timeout=10)
-        if response.status_code != 200:
-            print(f"Erro ao listar alunos: {response.text}")
-            return {}
-
-        data = response.json()
-        for aluno in data.get("data", []):
-            alunos_api[aluno["external_id"]] = aluno  # Criamos um dicionário {matricula: aluno}
-
-        if "next_page_url" not in data or not data["next_page_url"]:
-            print("✅ Todas as páginas de alunos foram carregadas.")
-            break
-        
-        page += 1
-    
-    return alunos_api
-
-# Obter aluno na API pelo external_id
-def obter_aluno_api(matricula):
-    alunos = listar_alunos()
-    for aluno in alunos:
-        if aluno["external_id"] == str(matricula):
-            return aluno
-    return None
-
-# Obter student_id pelo nome do aluno
-def obter_student_id(nome_aluno):
-    alunos = listar_alunos()
-    for aluno in alunos:
-        if aluno["name"].lower() == nome_aluno.lower():
+    # Obter student_id pelo nome do aluno
+    def obter_student_id(self, nome_aluno):
+        aluno = self.alunos_por_nome.get(nome_aluno.lower())
+        if aluno:
             return aluno["id"]
-    print(f"Aluno '{nome_aluno}' não encontrado.")
-    return None
+        print(f"Aluno '{nome_aluno}' não encontrado.")
+        return None
 
-# Remover aluno
-def remover_aluno(student_id, nome_aluno):
-    if not student_id:
-        print(f"Não foi possível encontrar o aluno {nome_aluno}.")
-        return
+    # Remover aluno
+    def remover_aluno(self, student_id, nome_aluno):
+        if not student_id:
+            print(f"Não foi possível encontrar o aluno {nome_aluno}.")
+            return False
 
-    url = f"https://app.redacaonline.com.br/api/students/{student_id}"
-    response = requests.delete(url, headers=HEADERS)
+        response = self.session.delete(f"{URL_BASE}/students/{student_id}", timeout=10)
 
-    if response.status_code == 204:
-        print(f"Aluno {nome_aluno} removido com sucesso!")
-    else:
+        if response.status_code == 204:
+            print(f"Aluno {nome_aluno} removido com sucesso!")
+            return True
         print(f"Erro ao remover aluno: {response.status_code} - {response.text}")
+        return False
 
-# Atualizar aluno na API
-def atualizar_aluno(student_id, nome, email, class_id, external_id):
-    url = f"https://app.redacaonline.com.br/api/students/{student_id}"
-    payload = {
-        "name": nome,
-        "email": email,
-        "class_id": class_id,
-        "external_id": str(external_id)
-    }
-    response = requests.put(url, headers=HEADERS, json=payload)
-
-    if response.status_code == 200:
-        print(f"Aluno {nome} atualizado com sucesso!")
-    else:
+    # Atualizar aluno na API
+    def atualizar_aluno(self, student_id, nome, email, class_id, external_id):
+        payload = {
+            "name": nome,
+            "email": email,
+            "class_id": class_id,
+            "external_id": str(external_id)
+        }
+        response = self.session.put(f"{URL_BASE}/students/{student_id}", json=payload, timeout=10)
+
+        if response.status_code == 200:
+            print(f"Aluno {nome} atualizado com sucesso!")
+            return True
         print(f"Erro ao atualizar aluno: {response.status_code} - {response.text}")
+        return False
 
-# Inserir aluno na API
-def inserir_aluno(nome, matricula, class_id):
-    url = "https://app.redacaonline.com.br/api/students"
-    email = f"{matricula}@alunos.smrede.com.br"
-    payload = {"name": nome, "email": email, "class_id": class_id, "external_id": str(matricula)}
-    response = requests.post(url, headers=HEADERS, json=payload)
-    
-    if response.status_code == 200:
-        aluno_data = response.json()
-        aluno_id = aluno_data.get("id", "ID não encontrado")
-        print(f"Aluno {nome} inserido com sucesso! ID: {aluno_id}")
-    elif response.status_code == 400:
-        print(f"Erro ao inserir aluno: {response.text}")
-    else:
-        print(f"Erro inesperado: {response.status_code} - {response.text}")
+    # Inserir aluno na API
+    def inserir_aluno(self, nome, matricula, class_id):
+        email = f"{matricula}@alunos.smrede.com.br"
+        payload = {"name": nome, "email": email, "class_id": class_id, "external_id": str(matricula)}
+        response = self.session.post(f"{URL_BASE}/students", json=payload, timeout=10)
+        
+        if response.status_code == 200:
+            aluno_data = response.json()
+            aluno_id = aluno_data.get("id", "ID não encontrado")
+            print(f"Aluno {nome} inserido com sucesso! ID: {aluno_id}")
+            return True
+        elif response.status_code == 400:
+            print(f"Erro ao inserir aluno: {response.text}")
+        else:
+            print(f"Erro inesperado: {response.status_code} - {response.text}")
+        return False
+
+    def executar(self, acoes):
+        """Executa as ações planejadas (método, argumentos) em paralelo na sessão compartilhada."""
+        alterados = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(metodo, *args) for metodo, args in acoes]
+            for future in as_completed(futures):
+                try:
+                    if future.result():
+                        alterados += 1
+                except Exception as e:
+                    print(f"Erro ao executar ação na API: {e}")
+        return alterados
 
 # Mapeamento de código -> nome da unidade
 codigo_para_unidade = {
@@ -171,20 +219,25 @@ codigo_para_unidade = {
 }
 
 # 🔹 Processamento otimizado
-def processar_alunos():
-    conn = psycopg2.connect(**db_config)
-    cursor = conn.cursor()
-    cursor.execute(f""" 
-        SELECT unidade, sit, matricula, nome, turma 
-        FROM {TABELA_ALUNOS_GERAL} 
-        WHERE turma::NUMERIC >= 11900::NUMERIC
-    """)
-    alunos = cursor.fetchall()
-    conn.close()
+def processar_alunos(alunos=None):
+    """alunos: população já lida da fonte (sincronizacao.py); se None, consulta a tabela geral."""
+    if alunos is None:
+        conn = psycopg2.connect(**db_config)
+        cursor = conn.cursor()
+        cursor.execute(f""" 
+            SELECT unidade, sit, matricula, nome, turma 
+            FROM {TABELA_ALUNOS_GERAL} 
+            WHERE turma::NUMERIC >= 11900::NUMERIC
+        """)
+        alunos = cursor.fetchall()
+        conn.close()
     
-    alunos_api_dict = listar_alunos()  # Obtém todos os alunos uma única vez
-    alteracoes_feitas = False
+    cliente = ClienteRedacaoOnline()
+    if not cliente.carregar_alunos():  # Obtém todos os alunos uma única vez
+        return
+    cliente.carregar_turmas(unidades_api.values())
 
+    acoes = []
     for unidade_codigo, sit, matricula, nome, turma in alunos:
         unidade_codigo = unidade_codigo.strip().zfill(2)
         unit_id = unidades_api.get(codigo_para_unidade.get(unidade_codigo))
@@ -192,28 +245,26 @@ def processar_alunos():
             print(f"⚠ Unidade '{unidade_codigo}' não encontrada.")
             continue
 
-        class_id = turmas_cache.get((unit_id, turma)) or obter_turmas_api(unit_id, turma)
+        class_id = cliente.obter_turma(unit_id, turma)
         if not class_id:
             print(f"⚠ Turma {turma} não encontrada para a unidade {unit_id}.")
             continue
 
-        aluno_api = alunos_api_dict.get(str(matricula))  # Busca direta, sem chamadas extras
+        aluno_api = cliente.obter_aluno(matricula)  # Busca direta no índice, sem chamadas extras
 
         if int(sit) in [2, 4] and aluno_api:
-            remover_aluno(aluno_api["id"], aluno_api["name"])
-            alteracoes_feitas = True
+            acoes.append((cliente.remover_aluno, (aluno_api["id"], aluno_api["name"])))
         elif not aluno_api:
-            inserir_aluno(nome, matricula, class_id)
-            alteracoes_feitas = True
+            acoes.append((cliente.inserir_aluno, (nome, matricula, class_id)))
         elif aluno_api["class_id"] != class_id or aluno_api["name"] != nome:
-            atualizar_aluno(aluno_api["id"], nome, aluno_api["email"], class_id, matricula)
-            alteracoes_feitas = True
+            acoes.append((cliente.atualizar_aluno, (aluno_api["id"], nome, aluno_api["email"], class_id, matricula)))
 
-    if not alteracoes_feitas:
+    if not acoes:
         print("✅ Todos os alunos já estão corretos na API. Nenhuma alteração necessária.")
     else:
-        print("🔄 Alterações concluídas nos dados da API.")
+        alterados = cliente.executar(acoes)
+        print(f"🔄 Alterações concluídas nos dados da API ({alterados}/{len(acoes)} com sucesso).")
 
 # Executar
 if __name__ == "__main__":
-    processar_alunos()
\ No newline at end of file
+    processar_alunos()
@@ -0,0 +1,226 @@
+import sys
+import csv
+import hashlib
+import logging
+import psycopg2
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from constantes import DB_CONFIG, ANO_LETIVO_ATUAL
+from gravador_lote import GravadorLote
+from modelos_lize import decodificar_alunos, turmas_do_ano
+from snapshot_lize import max_idade_argv
+from envio_lize import LizeManager
+from sql_lize import SQL_UPSERT_CACHE_ALUNOS
+
+# Reconciliação por digest: compara fonte x alunos_lize turma a turma (e por coordenação)
+# e só baixa do portal, pelo filtro classes=, as turmas cujo digest diverge.
+# O relatório (--relatorio) confronta fonte x portal em todas as turmas (ou nas escolhidas)
+# com uma consulta à fonte e uma varredura do portal: faltando, fantasmas e nomes divergentes.
+# Uso: python reconciliacao_lize.py [--so-verificar]
+#      python reconciliacao_lize.py --relatorio [--turmas 11611,11621] [--csv saida.csv] [--max-idade MIN]
+
+def digest(membros):
+    """md5 do conjunto de (matricula, nome): independe da ordem de leitura."""
+    h = hashlib.md5()
+    for mat, nome in sorted(membros):
+        h.update(f"{mat}|{nome}\n".encode("utf-8"))
+    return h.hexdigest()
+
+def membros_fonte(gerente, alunos_origem, mapa_turmas):
+    """id_turma -> {(matricula, nome)} de quem deve estar ativo, pela mesma regra do diff."""
+    turmas = defaultdict(set)
+    for a in alunos_origem:
+        try:
+            # Com o cache vazio só sai plano (de inserção) para quem deve estar ativo
+            plano = gerente.planejar_aluno(a[2], a, {}, mapa_turmas)
+        except Exception as e:
+            logging.error(f"Erro ao processar aluno {a[2]}: {e}")
+            continue
+        if plano:
+            turmas[str(plano["id_turma"])].add((plano["mat"], plano["nome"]))
+    return turmas
+
+def membros_cache(estado_local):
+    """id_turma -> {(matricula, nome)} dos ativos no alunos_lize."""
+    turmas = defaultdict(set)
+    for mat, a in estado_local.items():
+        if a["ativo"] is True:
+            for c in a["classes"] or []:
+                turmas[str(c)].add((mat, str(a["nome"] or "").strip()))
+    return turmas
+
+def carregar_turmas():
+    """id_turma -> (coordenação, nome) do turmas_lize do ano."""
+    with psycopg2.connect(**DB_CONFIG) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id, coordination, nome FROM turmas_lize WHERE school_year = %s", (ANO_LETIVO_ATUAL,))
+            return {str(r[0]): (str(r[1]).strip(), str(r[2]).strip()) for r in cur.fetchall()}
+
+def digests_por_coordenacao(digests, turmas):
+    por_coord = defaultdict(list)
+    for id_turma, d in digests.items():
+        por_coord[turmas.get(id_turma, (None, None))[0]].append(f"{id_turma}:{d}")
+    return {coord: hashlib.md5("\n".join(sorted(itens)).encode("utf-8")).hexdigest() for coord, itens in por_coord.items()}
+
+def turmas_divergentes(fonte, cache, turmas):
+    """Compara primeiro as coordenações; só desce às turmas das coordenações que divergem."""
+    d_fonte = {t: digest(m) for t, m in fonte.items()}
+    d_cache = {t: digest(m) for t, m in cache.items()}
+    c_fonte = digests_por_coordenacao(d_fonte, turmas)
+    c_cache = digests_por_coordenacao(d_cache, turmas)
+    coords = {c for c in c_fonte.keys() | c_cache.keys() if c_fonte.get(c) != c_cache.get(c)}
+    divergentes = sorted(t for t in d_fonte.keys() | d_cache.keys()
+                         if turmas.get(t, (None, None))[0] in coords and d_fonte.get(t) != d_cache.get(t))
+    return coords, divergentes
+
+def baixar_turmas(cliente, ids_turmas, max_workers=10, max_idade=None):
+    """id_turma -> alunos ativos da turma no portal (uma paginação por turma, em paralelo)."""
+    def buscar(id_turma):
+        return id_turma, list(cliente.paginar("students/", {"classes": id_turma, "is_active": "true"}, max_idade=max_idade))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(executor.map(buscar, ids_turmas))
+
+def corrigir_cache(gerente, portal, cache):
+    """
+    Regrava no alunos_lize o que o portal mostrou nas turmas baixadas (mesma regra do
+    atualizar_cache_alunos). Quem o cache dava como ativo na turma e não apareceu fica só com
+    o hash nulo: o próximo diff replaneja o aluno (turma e ativo), e o ativo continua valendo
+    para o detectar_fantasmas, que só desativa quem está ativo no cache.
+    """
+    linhas, vistos = [], set()
+    for alunos in portal.values():
+        for a in alunos:
+            mat = str(a.get("enrollment_number") or "").strip()
+            if not mat or mat in vistos:
+                continue
+            vistos.add(mat)
+            classes = [c.get("id") for c in a.get("classes") or [] if c.get("school_year") == ANO_LETIVO_ATUAL]
+            id_turma = str(classes[0]) if classes else "SEM_TURMA"
+            nome, ativo = a.get("name") or "", a.get("is_active", True)
+            linhas.append((a.get("id"), nome, mat, a.get("email"), [id_turma], ativo, ANO_LETIVO_ATUAL,
+                           gerente.gerar_hash(nome, ativo, id_turma)))
+    sumidos = sorted({mat for id_turma in portal for mat, _ in cache.get(id_turma, ())} - vistos)
+
+    with psycopg2.connect(**DB_CONFIG) as conn:
+        with conn.cursor() as cur:
+            with GravadorLote(cur, SQL_UPSERT_CACHE_ALUNOS, "alunos_lize", chave=(2, 6)) as gravador:
+                gravador.adicionar_varios(linhas)
+            if sumidos:
+                cur.execute("UPDATE alunos_lize SET hash_estado = NULL WHERE ano_letivo = %s AND matricula = ANY(%s)",
+                            (ANO_LETIVO_ATUAL, sumidos))
+    logging.info(f"Reconciliação: {len(linhas)} alunos regravados do portal, {len(sumidos)} marcados para reenvio.")
+    return len(linhas), len(sumidos)
+
+def reconciliar(gerente=None, corrigir=True):
+    """Retorna {id_turma: alunos do portal} das turmas divergentes (vazio se tudo confere)."""
+    gerente = gerente or LizeManager()
+    gerente.preparar()
+    turmas = carregar_turmas()
+    fonte = membros_fonte(gerente, gerente.carregar_fonte(), gerente.carregar_mapa_turmas())
+    cache = membros_cache(gerente.carregar_estado_local())
+
+    coords, divergentes = turmas_divergentes(fonte, cache, turmas)
+    total_coords = len({turmas.get(t, (None, None))[0] for t in fonte.keys() | cache.keys()})
+    logging.info(f"Digests: {len(coords)}/{total_coords} coordenações e {len(divergentes)}/{len(fonte.keys() | cache.keys())} turmas divergentes.")
+
+    # Turma fora do turmas_lize (ex.: SEM_TURMA no cache) não tem como ser filtrada no portal
+    desconhecidas = [t for t in divergentes if t not in turmas]
+    for t in desconhecidas:
+        logging.warning(f"Reconciliação: turma {t} não está no turmas_lize | fonte: {len(fonte.get(t, ()))} | cache: {len(cache.get(t, ()))}")
+    divergentes = [t for t in divergentes if t in turmas]
+    if not divergentes:
+        return {}
+
+    portal = baixar_turmas(gerente.cliente, divergentes)
+    for t in divergentes:
+        logging.info(f"Turma {turmas[t][1]} ({t}) | fonte: {len(fonte.get(t, ()))} | cache: {len(cache.get(t, ()))} | portal: {len(portal[t])}")
+    if corrigir:
+        corrigir_cache(gerente, portal, cache)
+    return portal
+
+SITUACOES = ("FALTANDO NA LIZE", "FANTASMA NA LIZE", "NOME DIVERGENTE")
+COLUNAS_CSV = ["turma", "unidade", "id_turma", "situacao", "matricula", "nome_fonte", "nome_lize"]
+
+def varrer_portal(cliente, ids_turmas=None, max_idade=None):
+    """
+    id_turma -> {matricula: nome} dos ativos no portal. Sem filtro: uma varredura concorrente
+    dos ativos do ano letivo; com ids_turmas: uma paginação por turma (classes=), em paralelo.
+    Com max_idade (s) usa o snapshot local se a captura for recente.
+    """
+    portal = defaultdict(dict)
+    if ids_turmas is None:
+        for alunos_pg in cliente.paginar_offsets("students/", {"school_year": ANO_LETIVO_ATUAL, "is_active": "true"}, max_workers=20, decodificar=decodificar_alunos, max_idade=max_idade):
+            for a in alunos_pg:
+                for id_turma in turmas_do_ano(a, ANO_LETIVO_ATUAL):
+                    portal[str(id_turma)][str(a.enrollment_number or "").strip()] = str(a.name or "").strip()
+        return portal
+    for id_turma, alunos in baixar_turmas(cliente, ids_turmas, max_idade=max_idade).items():
+        portal[id_turma] = {str(a.get("enrollment_number") or "").strip(): str(a.get("name") or "").strip() for a in alunos}
+    return portal
+
+def comparar_turma(fonte, portal):
+    """fonte/portal: {matricula: nome}. Gera (situacao, matricula, nome_fonte, nome_lize)."""
+    for mat in sorted(fonte.keys() - portal.keys()):
+        yield SITUACOES[0], mat, fonte[mat], ""
+    for mat in sorted(portal.keys() - fonte.keys()):
+        yield SITUACOES[1], mat, "", portal[mat]
+    for mat in sorted(fonte.keys() & portal.keys()):
+        if fonte[mat] != portal[mat]:
+            yield SITUACOES[2], mat, fonte[mat], portal[mat]
+
+def relatorio(nomes_turmas=None, caminho_csv=None, gerente=None, max_idade=None):
+    """
+    Relatório fonte x portal de todas as turmas do ano (ou só das turmas com esses nomes).
+    Retorna as linhas (dicts com COLUNAS_CSV); grava CSV se caminho_csv for informado.
+    """
+    gerente = gerente or LizeManager()
+    turmas = carregar_turmas()
+    unidades = {coord: unidade for (unidade, _), coord in gerente.registro.coordenacoes().items()}
+    ids = None
+    if nomes_turmas:
+        ids = sorted(t for t, (_, nome) in turmas.items() if nome in set(nomes_turmas))
+        if not ids:
+            print(f"❌ Nenhuma turma {', '.join(nomes_turmas)} no turmas_lize ({ANO_LETIVO_ATUAL}).")
+            return []
+
+    print("🔎 Lendo a fonte...")
+    fonte = {t: dict(m) for t, m in membros_fonte(gerente, gerente.carregar_fonte(), gerente.carregar_mapa_turmas()).items()}
+    gerente.consolidar_stats()
+    if gerente.turmas_ausentes:
+        print(f"⚠️  {len(gerente.turmas_ausentes)} turmas da fonte sem correspondência no turmas_lize (alunos fora do relatório).")
+    print("🌐 Varrendo o portal...")
+    portal = varrer_portal(gerente.cliente, ids, max_idade)
+
+    linhas, resumo = [], []
+    for id_turma in ids or sorted(fonte.keys() | portal.keys(), key=lambda t: turmas.get(t, ("", t))[::-1]):
+        coord, nome = turmas.get(id_turma, (None, id_turma))
+        achados = list(comparar_turma(fonte.get(id_turma, {}), portal.get(id_turma, {})))
+        linhas += [dict(zip(COLUNAS_CSV, (nome, unidades.get(coord, ""), id_turma) + a)) for a in achados]
+        resumo.append((nome, unidades.get(coord, ""), len(fonte.get(id_turma, ())), len(portal.get(id_turma, ())),
+                       *(sum(a[0] == s for a in achados) for s in SITUACOES)))
+
+    print(f"\n{'TURMA':<10} {'UNIDADE':<26} {'FONTE':>6} {'LIZE':>6} {'FALTANDO':>9} {'FANTASMAS':>10} {'NOMES':>6}")
+    for r in resumo:
+        if any(r[4:]) or nomes_turmas:
+            print(f"{r[0]:<10} {r[1]:<26} {r[2]:>6} {r[3]:>6} {r[4]:>9} {r[5]:>10} {r[6]:>6}")
+    print(f"✅ {len(resumo)} turmas | {sum(r[4] for r in resumo)} faltando | {sum(r[5] for r in resumo)} fantasmas | "
+          f"{sum(r[6] for r in resumo)} nomes divergentes")
+
+    if caminho_csv:
+        # ; e BOM para abrir direto no Excel em português
+        with open(caminho_csv, "w", newline="", encoding="utf-8-sig") as f:
+            escritor = csv.DictWriter(f, fieldnames=COLUNAS_CSV, delimiter=";")
+            escritor.writeheader()
+            escritor.writerows(linhas)
+        print(f"💾 {len(linhas)} linhas gravadas em {caminho_csv}")
+    return linhas
+
+def _opcao(nome):
+    return sys.argv[sys.argv.index(nome) + 1] if nome in sys.argv[:-1] else None
+
+if __name__ == "__main__":
+    if "--relatorio" in sys.argv:
+        turmas_escolhidas = _opcao("--turmas")
+        relatorio(turmas_escolhidas.split(",") if turmas_escolhidas else None, _opcao("--csv"), max_idade=max_idade_argv())
+    else:
+        reconciliar(corrigir="--so-verificar" not in sys.argv)
@@ -1,7 +1,8 @@
 from envio_lize import LizeManager
 import logging
+from logs_lize import configurar_logs
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(message)s")
+configurar_logs()
 
 if __name__ == "__main__":
     lm = LizeManager()
@@ -0,0 +1,133 @@
+import time
+import logging
+import threading
+import psycopg2
+from constantes import DB_CONFIG, CODIGO_PARA_UNIDADE, COORDINATION_IDS, GRADE_IDS, REGISTRO_TTL_S
+from gravador_lote import GravadorLote, sql_upsert
+from cache_listagens import ListagemEmCache
+
+ETAPAS = ("Anos Iniciais", "Anos Finais", "Ensino Médio")
+
+SQL_UPSERT_COORDENACOES = sql_upsert("coordenacoes_lize", ["id", "nome", "unidade"], "id")
+SQL_UPSERT_SERIES = sql_upsert("series_lize", ["id", "nome", "nivel"], "id")
+
+class RegistroLize:
+    """
+    Coordenações e séries da API espelhadas em coordenacoes_lize / series_lize (revalidadas
+    após o TTL) e um índice em memória para resolver (unidade, etapa) -> coordenação e
+    dígito da turma -> série. COORDINATION_IDS / GRADE_IDS continuam sendo a configuração;
+    o registro confere cada id com a API e aponta os erros antes da sincronização.
+    """
+    def __init__(self, cliente, ttl_s=REGISTRO_TTL_S):
+        self.cliente = cliente
+        self.ttl_s = ttl_s
+        self.coordenacoes_api = {}
+        self.series_api = {}
+        self._coordenacao = {}
+        self._serie = {}
+        self.problemas = []
+
+    def criar_tabelas(self, cur):
+        cur.execute("CREATE TABLE IF NOT EXISTS coordenacoes_lize (id TEXT PRIMARY KEY, nome TEXT, unidade TEXT);")
+        cur.execute("CREATE TABLE IF NOT EXISTS series_lize (id TEXT PRIMARY KEY, nome TEXT, nivel TEXT);")
+
+    def sincronizar(self, forcar=False):
+        with psycopg2.connect(**DB_CONFIG) as conn:
+            with conn.cursor() as cur:
+                self.criar_tabelas(cur)
+
+        def gravar(sql, rotulo, campos):
+            def _gravar(cur, itens):
+                with GravadorLote(cur, sql, rotulo, chave=(0,)) as gravador:
+                    gravador.adicionar_varios(tuple(str(i.get(c) or "") for c in campos) for i in itens)
+                logging.info(f"Registro: {len(itens)} itens gravados em {rotulo}.")
+            return _gravar
+
+        fontes = [
+            (ListagemEmCache(self.cliente, "coordinations", "coordinations/", campos=("id", "name", "unit"), ttl_s=self.ttl_s),
+             gravar(SQL_UPSERT_COORDENACOES, "coordenacoes_lize", ("id", "name", "unit"))),
+            (ListagemEmCache(self.cliente, "series", "series/", campos=("id", "name", "level"), ttl_s=self.ttl_s),
+             gravar(SQL_UPSERT_SERIES, "series_lize", ("id", "name", "level"))),
+        ]
+        for listagem, gravar_itens in fontes:
+            try:
+                listagem.sincronizar(gravar_itens, forcar=forcar)
+            except Exception as e:
+                # Sem API o registro segue com o que já está nas tabelas locais
+                logging.error(f"Registro: falha ao sincronizar {listagem.recurso}: {e}")
+
+    def carregar(self):
+        with psycopg2.connect(**DB_CONFIG) as conn:
+            with conn.cursor() as cur:
+                self.criar_tabelas(cur)
+                cur.execute("SELECT id, nome, unidade FROM coordenacoes_lize")
+                self.coordenacoes_api = {r[0]: (r[1], r[2]) for r in cur.fetchall()}
+                cur.execute("SELECT id, nome, nivel FROM series_lize")
+                self.series_api = {r[0]: (r[1], r[2]) for r in cur.fetchall()}
+        self._indexar()
+        return self
+
+    def _indexar(self):
+        self.problemas = []
+        self._coordenacao = {}
+        self._serie = {}
+        # Registro vazio (API nunca sincronizada): confia na configuração sem validar os ids
+        conferir_coord = bool(self.coordenacoes_api)
+        conferir_serie = bool(self.series_api)
+
+        for codigo, unidade in sorted(CODIGO_PARA_UNIDADE.items()):
+            etapas = COORDINATION_IDS.get(unidade)
+            if not etapas:
+                self.problemas.append(f"Unidade {codigo} ({unidade}) sem entrada em COORDINATION_IDS")
+                continue
+            unidades_api = set()
+            for etapa in ETAPAS:
+                coord_id = etapas.get(etapa)
+                if not coord_id:
+                    self.problemas.append(f"{unidade} | {etapa}: coordenação não configurada")
+                elif conferir_coord and coord_id not in self.coordenacoes_api:
+                    self.problemas.append(f"{unidade} | {etapa}: coordenação {coord_id} não existe na API")
+                else:
+                    self._coordenacao[(unidade, etapa)] = coord_id
+                    if conferir_coord:
+                        unidades_api.add(self.coordenacoes_api[coord_id][1])
+            # As três coordenações de uma unidade pertencem à mesma unidade no portal
+            if len(unidades_api) > 1:
+                self.problemas.append(f"{unidade}: coordenações configuradas apontam para unidades diferentes no portal {sorted(unidades_api)}")
+
+        for digito, grade_id in sorted(GRADE_IDS.items()):
+            if conferir_serie and grade_id not in self.series_api:
+                self.problemas.append(f"Série do dígito {digito}: {grade_id} não existe na API")
+            else:
+                self._serie[digito] = grade_id
+
+    def coordenacao(self, unidade_nome, etapa):
+        return self._coordenacao.get((unidade_nome, etapa))
+
+    def coordenacoes(self):
+        """Índice (unidade, etapa) -> coordenação já validado (para o diff em colunas)."""
+        return dict(self._coordenacao)
+
+    def serie(self, digito):
+        return self._serie.get(str(digito))
+
+    def registrar_problemas(self):
+        for p in self.problemas:
+            logging.error(f"CONFIG | {p}")
+        return self.problemas
+
+_registro = None
+_registro_em = 0.0
+_registro_lock = threading.Lock()
+
+def obter_registro(cliente):
+    """Registro do processo: sincroniza e indexa uma vez, e de novo quando o TTL vence (processos residentes)."""
+    global _registro, _registro_em
+    with _registro_lock:
+        if _registro is None or time.monotonic() - _registro_em > _registro.ttl_s:
+            registro = RegistroLize(cliente)
+            registro.sincronizar()
+            _registro = registro.carregar()
+            _registro_em = time.monotonic()
+            _registro.registrar_problemas()
+        return _registro
@@ -1,6 +1,7 @@
-import requests
+from cliente_lize import ClienteLize
 import os
 from dotenv import load_dotenv
+from snapshot_lize import max_idade_argv
 
 # Carregar variáveis de ambiente do arquivo config.env
 load_dotenv("config.env")
@@ -9,29 +10,23 @@ load_dotenv("config.env")
 token = os.getenv("API_TOKEN")
 HEADERS = {"Authorization": f"{token}", "Accept": "application/json"}
 
-# Função para obter todos os alunos
-def obter_todos_alunos():
-    url = "https://staging.lizeedu.com.br/api/v2/students/"
+cliente = ClienteLize("staging", headers=HEADERS)
 
+# Função para obter todos os alunos (--max-idade MIN: aceita o snapshot local dessa idade)
+def obter_todos_alunos():
     # Parâmetros de consulta
     params = {
     }
 
-    response = requests.get(url, headers=HEADERS, params=params)
-
-    if response.status_code == 200:
-        data = response.json()
-        alunos = data.get("results", [])
+    alunos = list(cliente.paginar("students/", params, max_idade=max_idade_argv()))
 
-        # Imprimir todos os alunos com seus IDs e nomes
-        if alunos:
-            print("📋 Lista de alunos encontrados:")
-            for aluno in alunos:
-                print(f"📌 Nome: {aluno['name']} | ID: {aluno['id']} | Matrícula: {aluno['enrollment_number']}")
-        else:
-            print("❌ Nenhum aluno encontrado.")
+    # Imprimir todos os alunos com seus IDs e nomes
+    if alunos:
+        print("📋 Lista de alunos encontrados:")
+        for aluno in alunos:
+            print(f"📌 Nome: {aluno['name']} | ID: {aluno['id']} | Matrícula: {aluno['enrollment_number']}")
     else:
-        print(f"❌ Erro ao buscar alunos: {response.status_code} - {response.text}")
+        print("❌ Nenhum aluno encontrado.")
 
 # Chamada para obter e imprimir todos os alunos
 obter_todos_alunos()
@@ -1,4 +1,4 @@
-import requests 
+from cliente_lize import ClienteLize
 import os
 from dotenv import load_dotenv
 
@@ -16,10 +16,10 @@ HEADERS = {
     "Accept": "application/json"
 }
 
+cliente = ClienteLize("app", headers=HEADERS)
+
 # Função para buscar resultados de alunos
 def buscar_resultados_alunos(limit=None, offset=None, ordering=None, search=None):
-    url = "https://app.lizeedu.com.br/api/v2/application-students-results/"
-    
     params = {}
     
     # Adicionando parâmetros caso existam
@@ -32,7 +32,7 @@ def buscar_resultados_alunos(limit=None, offset=None, ordering=None, search=None
     if search:
         params["search"] = search
     
-    response = requests.get(url, headers=HEADERS, params=params)
+    response = cliente.get("application-students-results/", params=params)
 
     # Exibe a resposta completa da API para depuração
     print("Resposta da API:", response.json())
@@ -1,4 +1,5 @@
-import requests, os
+import os
+from cliente_lize import ClienteLize
 from dotenv import load_dotenv
 
 load_dotenv("config.env")
@@ -7,14 +8,14 @@ load_dotenv("config.env")
 token = os.getenv("API_TOKEN")
 HEADERS = {"Authorization": f"{token}", "Accept": "application/json"}
 
+cliente = ClienteLize("app", headers=HEADERS)
+
 # Função para obter todas as séries
 def obter_todas_series():
-    url = "https://app.lizeedu.com.br/api/v2/series/"
-
     # Parâmetros de consulta
     params = {}
 
-    response = requests.get(url, headers=HEADERS, params=params)
+    response = cliente.get("series/", params=params)
 
     if response.status_code == 200:
         data = response.json()
@@ -1,8 +1,5 @@
-import requests
 from constantes import HEADERS, ANO_LETIVO_ATUAL
-
-# URL base do endpoint
-url = f"https://app.lizeedu.com.br/api/v2/classes/?school_year={ANO_LETIVO_ATUAL}"
+from cliente_lize import ClienteLize
 
 # Cabeçalhos com autenticação
 headers = {
@@ -10,18 +7,10 @@ headers = {
     "accept": "application/json"
 }
 
-turmas = []
+cliente = ClienteLize("app", headers=headers)
 
-# Loop para percorrer todas as páginas
-while url:
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        data = response.json()
-        turmas.extend(data["results"])  # Adiciona os resultados da página atual à lista
-        url = data.get("next")  # Atualiza a URL para a próxima página (se houver)
-    else:
-        print("Erro:", response.status_code, response.text)
-        break  # Para a execução em caso de erro
+# Percorre todas as páginas (para no primeiro erro da API)
+turmas = list(cliente.paginar("classes/", {"school_year": ANO_LETIVO_ATUAL}))
 
 # Exibir o total de turmas coletadas
 print("Total de turmas coletadas:", len(turmas))
@@ -0,0 +1,75 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import gzip
+import glob
+import json
+import time
+import uuid
+import random
+from modelos_lize import decodificar_alunos, DECODIFICADOR
+
+# Benchmark: response.json() + extração dos campos usados vs decodificar_alunos (modelos_lize),
+# e tamanho da página com/sem gzip. Usa páginas gravadas (um JSON de /students/ por arquivo)
+# se um diretório for passado; senão gera páginas sintéticas no formato do portal.
+# Uso: python scratch/bench_decodificacao.py [diretorio_paginas] [n_paginas_sinteticas]
+
+ANO = 2026
+
+def aluno_sintetico(i):
+    turmas = [{"id": str(uuid.uuid4()), "name": str(11500 + random.randint(0, 400)), "school_year": ano,
+               "coordination": str(uuid.uuid4()), "grade": str(uuid.uuid4()), "class_type": 1,
+               "created_at": "2025-01-15T10:00:00Z"} for ano in (ANO - 1, ANO)]
+    return {
+        "id": str(uuid.uuid4()), "name": f"ALUNO SINTETICO NUMERO {i} DA SILVA",
+        "enrollment_number": f"{random.randint(1, 17):02d}{i:07d}", "email": f"{i}@alunos.smrede.com.br",
+        "is_active": random.random() > 0.1, "classes": turmas, "user": str(uuid.uuid4()),
+        "created_at": "2025-01-15T10:00:00Z", "updated_at": "2026-02-01T08:30:00Z",
+        "responsible_email": None, "phone": None, "can_update_email": True, "can_update_password": True,
+        "client": str(uuid.uuid4()), "username": f"aluno{i}",
+    }
+
+def paginas_sinteticas(n):
+    return [json.dumps({"count": n * 50, "next": None, "previous": None,
+                        "results": [aluno_sintetico(p * 50 + j) for j in range(50)]}).encode() for p in range(n)]
+
+def via_dicts(conteudo):
+    # Caminho antigo: response.json() e acesso por chave aos campos usados
+    saida = []
+    for a in json.loads(conteudo).get("results", []):
+        classes = [c.get("id") for c in a.get("classes", []) if c.get("school_year") == ANO]
+        saida.append((a["id"], a["name"], a["enrollment_number"], a.get("email"), a["is_active"], classes))
+    return saida
+
+def via_structs(conteudo):
+    return [(a.id, a.name, a.enrollment_number, a.email, a.is_active, [c.id for c in a.classes if c.school_year == ANO])
+            for a in decodificar_alunos(conteudo)]
+
+def medir(func, paginas, repeticoes=3):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for p in paginas:
+            func(p)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and os.path.isdir(sys.argv[1]):
+        paginas = [open(f, "rb").read() for f in sorted(glob.glob(os.path.join(sys.argv[1], "*.json")))]
+        origem = f"{len(paginas)} páginas gravadas de {sys.argv[1]}"
+    else:
+        n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+        paginas = paginas_sinteticas(n)
+        origem = f"{n} páginas sintéticas (50 alunos cada)"
+
+    assert via_dicts(paginas[0]) == via_structs(paginas[0]), "decodificadores divergem"
+    bruto = sum(len(p) for p in paginas)
+    compactado = sum(len(gzip.compress(p, 6)) for p in paginas)
+    t_dicts = medir(via_dicts, paginas)
+    t_structs = medir(via_structs, paginas)
+
+    print(f"Origem: {origem}")
+    print(f"Transferência: {bruto / 1e6:.1f} MB sem compressão | {compactado / 1e6:.1f} MB com gzip ({bruto / compactado:.1f}x menor)")
+    print(f"json + dicts:            {t_dicts * 1000:8.1f} ms")
+    print(f"{DECODIFICADOR + ' + structs:':<24} {t_structs * 1000:8.1f} ms ({t_dicts / t_structs:.2f}x)")
@@ -0,0 +1,94 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
+import uuid
+import random
+import diff_vetorizado
+from envio_lize import LizeManager
+from registro_lize import RegistroLize
+from constantes import CODIGO_PARA_UNIDADE
+
+# Benchmark: diff linha a linha (planejar_aluno + detectar_fantasmas) vs diff_vetorizado,
+# com população sintética no formato de carregar_fonte / carregar_estado_local / carregar_mapa_turmas.
+# Perfil de uma execução diária: ~1% de novos, ~3% de divergentes e 2% de fantasmas no cache.
+# Confere que os dois produzem exatamente os mesmos planos, turmas ausentes e fantasmas.
+# Uso: python scratch/bench_diff_vetorizado.py [n1 n2 ...]   (padrão: 10000 100000 1000000)
+
+TURMAS = [str(t) for t in range(11511, 11600, 10)] + [str(t) for t in range(11611, 11700, 10)] + ["21011", "22011", "23011", "24011"]
+
+def populacao(n, gerente, semente=42):
+    random.seed(semente)
+    codigos = sorted(CODIGO_PARA_UNIDADE)
+    coordenacoes = gerente.registro.coordenacoes()
+    mapa_turmas = {}
+    for (_, etapa), coord in coordenacoes.items():
+        for turma in TURMAS:
+            if gerente.definir_etapa_ensino(turma) == etapa and random.random() > 0.02:
+                mapa_turmas[(coord, turma)] = str(uuid.uuid4())
+
+    fonte, estado = [], {}
+    for i in range(n):
+        cod = random.choice(codigos)
+        mat = f"{cod}{i:07d}"
+        nome = f"ALUNO {i} DA SILVA "
+        turma = random.choice(TURMAS) if random.random() > 0.01 else "11400"
+        fonte.append((cod, random.choice([1, 1, 1, 1, 1, 1, 2, 4]), mat, nome, turma))
+        if random.random() < 0.01:
+            continue  # novo: ainda não está no cache
+        # Estado alvo do aluno (um cache vazio força o plano completo)
+        vazio = {mat: {"id_api": None, "nome": None, "email": None, "ativo": None, "classes": [], "hash": None}}
+        plano = gerente.planejar_aluno(mat, fonte[-1], vazio, mapa_turmas)
+        ativo, id_turma = plano["ativo"], plano["id_turma"]
+        sorteio = random.random()
+        if sorteio < 0.97:
+            h = gerente.gerar_hash(nome, ativo, id_turma or "SEM_TURMA")   # em dia
+        else:
+            h = "desatualizado"
+            if sorteio < 0.98:
+                ativo = not ativo
+            elif sorteio < 0.99:
+                id_turma = None
+            else:
+                nome = "NOME ANTIGO"
+        estado[mat] = {"id_api": str(uuid.uuid4()), "nome": nome.strip(), "classes": [id_turma] if id_turma else [],
+                       "ativo": ativo, "hash": h, "email": f"{mat}@alunos.smrede.com.br"}
+    # Fantasmas: no cache e fora da fonte
+    for i in range(n // 50):
+        mat = f"99{i:07d}"
+        estado[mat] = {"id_api": str(uuid.uuid4()), "nome": "EX ALUNO", "classes": [], "ativo": random.random() > 0.3,
+                       "hash": "x", "email": f"{mat}@alunos.smrede.com.br"}
+    return fonte, estado, mapa_turmas
+
+def via_linhas(gerente, fonte, estado, mapa_turmas):
+    gerente._local.acc = None
+    planos = [p for p in (gerente.planejar_aluno(a[2], a, estado, mapa_turmas) for a in fonte) if p]
+    return planos, set(gerente._acumulador()["ausentes"]), gerente.detectar_fantasmas(fonte, estado)
+
+def via_colunas(gerente, fonte, estado, mapa_turmas):
+    planos, ausentes, _ = diff_vetorizado.planejar_lote(fonte, estado, mapa_turmas, gerente.registro.coordenacoes(),
+                                                        CODIGO_PARA_UNIDADE, gerente.siglas_diretas)
+    return planos, ausentes, diff_vetorizado.detectar_fantasmas(fonte, estado)
+
+def medir(func, *args):
+    inicio = time.perf_counter()
+    resultado = func(*args)
+    return time.perf_counter() - inicio, resultado
+
+if __name__ == "__main__":
+    if not diff_vetorizado.DISPONIVEL:
+        sys.exit("polars não instalado")
+    tamanhos = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    gerente = LizeManager()
+    gerente._registro = RegistroLize(gerente.cliente)
+    gerente._registro._indexar()  # só a configuração, sem banco nem API
+    gerente.usar_diff_vetorizado = lambda alunos_origem: False  # referência: caminho linha a linha
+
+    for n in tamanhos:
+        fonte, estado, mapa_turmas = populacao(n, gerente)
+        t_linhas, r_linhas = medir(via_linhas, gerente, fonte, estado, mapa_turmas)
+        t_colunas, r_colunas = medir(via_colunas, gerente, fonte, estado, mapa_turmas)
+        assert r_linhas == r_colunas, f"diffs divergem em n={n}"
+        planos, ausentes, fantasmas = r_colunas
+        print(f"n={n:>9,} | {len(planos):>7,} planos | {len(fantasmas):>6,} fantasmas | {len(ausentes):>3} turmas ausentes | "
+              f"linha a linha {t_linhas:7.2f}s | colunas {t_colunas:7.2f}s ({t_linhas / t_colunas:.1f}x)")
@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# Micro-benchmark: custo de contencao do stats_lock global vs acumuladores por worker.
+# Reproduz o padrao de _sync_single_student/desativar_fantasma sem rede nem banco.
+# Uso: python scratch/bench_stats_lock.py
+
+TAREFAS = 200_000
+SIGLAS = ["BR", "MD", "SC", "CD", "TQ", "NP", "SP", "BT", "CG", "MC", "IG", "FG", "RB"]
+
+def trabalho_simulado(i):
+    # Pequeno custo de CPU para se aproximar do diff real (strip, hash, lookups)
+    return hash((i, "nome", "turma")) & 0xFF
+
+def com_lock_global(workers):
+    lock = threading.Lock()
+    stats = defaultdict(lambda: defaultdict(int))
+
+    def tarefa(i):
+        trabalho_simulado(i)
+        with lock:
+            stats["MUDANÇA"][SIGLAS[i % len(SIGLAS)]] += 1
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(tarefa, range(TAREFAS), chunksize=1))
+    return sum(stats["MUDANÇA"].values())
+
+def com_acumulador_por_worker(workers):
+    lock = threading.Lock()
+    local = threading.local()
+    acumuladores = []
+
+    def acumulador():
+        acc = getattr(local, "acc", None)
+        if acc is None:
+            acc = local.acc = defaultdict(lambda: defaultdict(int))
+            with lock:
+                acumuladores.append(acc)
+        return acc
+
+    def tarefa(i):
+        trabalho_simulado(i)
+        acumulador()["MUDANÇA"][SIGLAS[i % len(SIGLAS)]] += 1
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(tarefa, range(TAREFAS), chunksize=1))
+
+    stats = defaultdict(lambda: defaultdict(int))
+    for acc in acumuladores:
+        for categoria, unidades in acc.items():
+            for sigla, qtd in unidades.items():
+                stats[categoria][sigla] += qtd
+    return sum(stats["MUDANÇA"].values())
+
+def medir(funcao, workers, repeticoes=3):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        total = funcao(workers)
+        decorrido = time.perf_counter() - inicio
+        assert total == TAREFAS, f"contagem incorreta: {total}"
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor
+
+if __name__ == "__main__":
+    print(f"{TAREFAS} tarefas por cenario (melhor de 3)")
+    print(f"{'workers':>8} | {'lock global':>12} | {'por worker':>12} | {'ganho':>7}")
+    for workers in (20, 100, 500):
+        t_lock = medir(com_lock_global, workers)
+        t_local = medir(com_acumulador_por_worker, workers)
+        print(f"{workers:>8} | {t_lock:>11.3f}s | {t_local:>11.3f}s | {t_lock / t_local:>6.2f}x")
@@ -0,0 +1,41 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import polars as pl
+from constantes import ANO_LETIVO_ATUAL, EXPORTACAO_LIZE
+
+# Mesmos números do check_sync_stats.py, lidos de uma exportação Parquet (exportacao_lize.py)
+# sem tocar no banco de produção. Uso: python scratch/check_sync_stats_parquet.py [execucao]
+
+def ler(nome, execucao):
+    return (pl.scan_parquet(os.path.join(EXPORTACAO_LIZE, nome, "**", "*.parquet"), hive_partitioning=True)
+            .filter((pl.col("execucao") == execucao) & (pl.col("ano_letivo") == ANO_LETIVO_ATUAL)))
+
+def check_stats(execucao=None):
+    execucoes = sorted(os.listdir(os.path.join(EXPORTACAO_LIZE, "fonte")))
+    execucao = execucao or execucoes[-1].split("=", 1)[1]
+    fonte = ler("fonte", execucao)
+    cache = ler("alunos_lize", execucao)
+    portal = ler("portal", execucao)
+
+    elegiveis = (fonte.filter(pl.col("turma").cast(pl.Int64, strict=False) >= 11500)
+                 .filter(~pl.col("sit").cast(pl.Float64, strict=False).is_in([2.0, 4.0])))
+    ativos = cache.filter(pl.col("ativo"))
+    intrusos = ativos.join(elegiveis, on="matricula", how="anti")
+
+    print(f"Execução: {execucao} | Ano: {ANO_LETIVO_ATUAL}")
+    print(f"Total in Source (Eligible): {elegiveis.select(pl.len()).collect().item()}")
+    print(f"Total in Cache (alunos_lize): {cache.select(pl.len()).collect().item()}")
+    print(f"Active in Cache: {ativos.select(pl.len()).collect().item()}")
+    print(f"Active in Portal: {portal.filter(pl.col('ativo')).select(pl.len()).collect().item()}")
+    print(f"Active in Cache but NOT in Source (Intruders): {intrusos.select(pl.len()).collect().item()}")
+    print("\nPor unidade (fonte elegível | cache ativo | portal ativo):")
+    por_unidade = (elegiveis.group_by("unidade").agg(fonte=pl.len())
+                   .join(ativos.group_by("unidade").agg(cache=pl.len()), on="unidade", how="full", coalesce=True)
+                   .join(portal.filter(pl.col("ativo")).group_by("unidade").agg(portal=pl.len()), on="unidade", how="full", coalesce=True)
+                   .sort("unidade").collect())
+    for unidade, n_fonte, n_cache, n_portal in por_unidade.iter_rows():
+        print(f"  {unidade}: {n_fonte or 0} | {n_cache or 0} | {n_portal or 0}")
+
+if __name__ == "__main__":
+    check_stats(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -1,23 +1,23 @@
 
-import requests
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import psycopg2
-from constantes import HEADERS, DB_CONFIG, ANO_LETIVO_ATUAL, TABELA_ALUNOS_GERAL
+from constantes import DB_CONFIG, ANO_LETIVO_ATUAL, TABELA_ALUNOS_GERAL
+from cliente_lize import ClienteLize
+from modelos_lize import decodificar_alunos
+from snapshot_lize import max_idade_argv
+
+# Uso: python scratch/find_portal_ghosts.py [--max-idade MIN]  (varredura recente vem do snapshot local)
 
 def find_ghosts():
     try:
         # 1. Get all active students from API (regardless of year)
-        # Note: This might be slow if there are many, but let's try to get a sample or first page.
         print(f"Buscando alunos ativos no portal (geral)...")
-        url = "https://app.lizeedu.com.br/api/v2/students/?is_active=true&limit=100"
-        response = requests.get(url, headers=HEADERS, timeout=20)
-        if response.status_code != 200:
-            print(f"Erro na API: {response.status_code}")
-            return
-        
-        data = response.json()
-        active_students = data.get("results", [])
-        total_active = data.get("count", 0)
-        print(f"Total de ativos no portal: {total_active}")
+        cliente = ClienteLize(timeout=20)
+        active_students = [a for pg in cliente.paginar_offsets("students/", {"is_active": "true"}, decodificar=decodificar_alunos,
+                                                               max_idade=max_idade_argv()) for a in pg]
+        print(f"Total de ativos no portal: {len(active_students)}")
 
         # 2. Get the list of matriculas from our source of truth (2026)
         conn = psycopg2.connect(**DB_CONFIG)
@@ -32,14 +32,14 @@ def find_ghosts():
         # 3. Compare
         ghosts = []
         for s in active_students:
-            mat = str(s.get("enrollment_number", "")).strip()
+            mat = str(s.enrollment_number or "").strip()
             if mat not in source_matriculas:
                 ghosts.append(s)
         
-        print(f"Fantasmas encontrados na primeira página (100 registros): {len(ghosts)}")
+        print(f"Fantasmas encontrados: {len(ghosts)}")
         for g in ghosts[:10]:
-            classes = [c.get("name") for c in g.get("classes", [])]
-            print(f" - {g.get('name')} | Mat: {g.get('enrollment_number')} | Turmas: {classes}")
+            classes = [c.id for c in g.classes]
+            print(f" - {g.name} | Mat: {g.enrollment_number} | Turmas: {classes}")
 
     except Exception as e:
         print(f"Erro: {e}")
@@ -0,0 +1,159 @@
+import sys
+import time
+import hmac
+import socket
+import logging
+import threading
+import socketserver
+import psycopg2
+from envio_lize import LizeManager
+from constantes import DB_CONFIG, ANO_LETIVO_ATUAL, SERVICO_TOKEN
+
+# Gatilho local: apenas 127.0.0.1, uma linha "<SERVICO_TOKEN> <comando>" (sincronizar | status | parar)
+ENDERECO_CONTROLE = ("127.0.0.1", 8765)
+
+INTERVALO_CICLO_S = 900            # ciclo agendado
+INTERVALO_MAPA_TURMAS_S = 3600     # refaz atualizar_mapa_turmas (API) no máximo 1x por hora
+INTERVALO_RECARGA_ESTADO_S = 6 * 3600  # releitura completa do alunos_lize mesmo sem mudança detectada
+
+class ServicoLize(LizeManager):
+    """
+    Serviço residente: mantém sessão HTTP, mapa_turmas e o índice estado_local aquecidos
+    entre ciclos. Cada ciclo só relê a fonte; o estado local é atualizado em memória com
+    o próprio resultado do ciclo e recarregado por completo quando outro script escreveu
+    no alunos_lize (impressão digital no banco) ou periodicamente.
+    """
+    def __init__(self):
+        super().__init__()
+        self.mapa_turmas = None
+        self.estado_local = None
+        self._mapa_em = 0.0
+        self._estado_em = 0.0
+        self._impressao_estado = None
+        self._ciclo_lock = threading.Lock()
+        self._disparo = threading.Event()
+        self._parar = threading.Event()
+        self.ultimo_ciclo = None
+
+    def _aquecer(self):
+        agora = time.monotonic()
+        if self.mapa_turmas is None or agora - self._mapa_em > INTERVALO_MAPA_TURMAS_S:
+            self.atualizar_mapa_turmas()
+            self.mapa_turmas = self.carregar_mapa_turmas()
+            self._mapa_em = agora
+        impressao = self.impressao_estado()
+        if self.estado_local is None or agora - self._estado_em > INTERVALO_RECARGA_ESTADO_S \
+                or impressao != self._impressao_estado:
+            self.estado_local = self.carregar_estado_local()
+            self._estado_em = agora
+            self._impressao_estado = impressao
+            logging.info(f"Estado local recarregado: {len(self.estado_local)} registros.")
+        # O registro do processo é revalidado quando o TTL vence (obter_registro)
+        self._registro = None
+
+    def impressao_estado(self):
+        """MD5 do alunos_lize do ano calculado no banco: muda com qualquer escrita de outro script."""
+        with psycopg2.connect(**DB_CONFIG) as conn:
+            with conn.cursor() as cur:
+                cur.execute("""SELECT md5(string_agg(matricula || ':' || COALESCE(hash_estado, '') || ':' || COALESCE(ativo::TEXT, ''),
+                                                  ',' ORDER BY matricula))
+                               FROM alunos_lize WHERE ano_letivo = %s""", (ANO_LETIVO_ATUAL,))
+                return cur.fetchone()[0]
+
+    def _aplicar_no_estado(self, upserts):
+        # Espelha em memória o que SQL_UPSERT_SYNC_ALUNOS grava (id/email só em inserções)
+        for id_api, nome, mat, email, classes, ativo, _, hash_estado in upserts:
+            atual = self.estado_local.get(mat)
+            if atual:
+                atual.update({"nome": nome, "classes": classes, "ativo": ativo, "hash": hash_estado})
+            else:
+                self.estado_local[mat] = {"id_api": id_api, "nome": nome, "classes": classes, "ativo": ativo, "hash": hash_estado, "email": email}
+
+    def ciclo(self):
+        with self._ciclo_lock:
+            inicio = time.monotonic()
+            logging.info(f"CICLO | Iniciando sincronizacao Lize {ANO_LETIVO_ATUAL}")
+            # Como no processar: o diff completo refaz tudo o que estava no diário
+            self.diario.descartar()
+            self._aquecer()
+
+            alunos_origem = self.carregar_fonte()
+            fantasmas = self.detectar_fantasmas(alunos_origem, self.estado_local)
+            upserts = self.sincronizar_alunos(alunos_origem, self.estado_local, self.mapa_turmas, fantasmas)
+            self.persistir_upserts(upserts)
+            self._aplicar_no_estado(upserts)
+            # As próprias escritas não disparam recarga no próximo ciclo
+            self._impressao_estado = self.impressao_estado()
+
+            self.exibir_relatorio()
+            self.stats_trocas.clear()
+            self.turmas_ausentes.clear()
+            self.tempo_ate_acesso = None
+            self.ultimo_ciclo = {"duracao_s": round(time.monotonic() - inicio, 1), "alteracoes": len(upserts), "fim": time.strftime("%H:%M:%S")}
+            logging.info(f"CICLO | {len(alunos_origem)} alunos na fonte | {len(upserts)} alterações | {self.ultimo_ciclo['duracao_s']}s")
+
+    def _servidor_controle(self):
+        servico = self
+
+        class Controle(socketserver.StreamRequestHandler):
+            def handle(self):
+                token, _, comando = self.rfile.readline().decode().strip().partition(" ")
+                comando = comando.strip().lower()
+                if not hmac.compare_digest(token.encode(), SERVICO_TOKEN.encode()):
+                    logging.warning(f"Controle: comando recusado de {self.client_address[0]} (token inválido)")
+                    resposta = "erro: token invalido"
+                elif comando == "sincronizar":
+                    servico._disparo.set()
+                    resposta = "ok: ciclo agendado"
+                elif comando == "status":
+                    resposta = f"ok: em_ciclo={servico._ciclo_lock.locked()} ultimo={servico.ultimo_ciclo}"
+                elif comando == "parar":
+                    servico._parar.set()
+                    servico._disparo.set()
+                    resposta = "ok: encerrando"
+                else:
+                    resposta = "erro: comandos validos sao sincronizar | status | parar"
+                self.wfile.write((resposta + "\n").encode())
+
+        servidor = socketserver.ThreadingTCPServer(ENDERECO_CONTROLE, Controle)
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, name="controle", daemon=True).start()
+        return servidor
+
+    def executar(self):
+        if not SERVICO_TOKEN:
+            logging.warning("LIZE_SERVICO_TOKEN vazio: controle local desligado (só o ciclo agendado).")
+        # Tabelas, mapa de turmas via API e carga inicial do cache (se vazio), uma única vez
+        self.preparar()
+        self.mapa_turmas = self.carregar_mapa_turmas()
+        self._mapa_em = time.monotonic()
+        servidor = self._servidor_controle() if SERVICO_TOKEN else None
+        controle = f"{ENDERECO_CONTROLE[0]}:{ENDERECO_CONTROLE[1]}" if servidor else "desligado"
+        logging.info(f"Serviço Lize ativo | ciclo a cada {INTERVALO_CICLO_S}s | controle: {controle}")
+        try:
+            while not self._parar.is_set():
+                try:
+                    self.ciclo()
+                except Exception as e:
+                    logging.error(f"CICLO FALHOU | {e}")
+                self._disparo.wait(INTERVALO_CICLO_S)
+                self._disparo.clear()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if servidor:
+                servidor.shutdown()
+                servidor.server_close()
+            logging.info("Serviço Lize encerrado.")
+
+def disparar(comando="sincronizar"):
+    """CLI: envia um comando ao serviço em execução."""
+    with socket.create_connection(ENDERECO_CONTROLE, timeout=5) as s:
+        s.sendall(f"{SERVICO_TOKEN} {comando}\n".encode())
+        print(s.makefile().readline().strip())
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--disparar":
+        disparar(sys.argv[2] if len(sys.argv) > 2 else "sincronizar")
+    else:
+        ServicoLize().executar()
@@ -0,0 +1,158 @@
+import sys
+import time
+import logging
+import threading
+import requests
+import psycopg2
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from envio_lize import LizeManager
+from logs_lize import configurar_logs_processo
+from cliente_lize import ClienteLize
+from constantes import DB_CONFIG, CODIGO_PARA_UNIDADE
+
+# Namespace dos advisory locks (pg_try_advisory_lock(NAMESPACE, codigo_unidade))
+NAMESPACE_LOCK = 74521
+
+# Orçamento de requisições por segundo de cada shard (cada processo tem o seu)
+LIMITE_RPS_SHARD = 10
+
+class SessaoComLimite(requests.Session):
+    """requests.Session com token bucket simples: no máximo `rps` requisições por segundo."""
+    def __init__(self, rps):
+        super().__init__()
+        self.intervalo = 1.0 / rps if rps else 0.0
+        self._proxima = time.monotonic()
+        self._lock = threading.Lock()
+
+    def request(self, *args, **kwargs):
+        if self.intervalo:
+            with self._lock:
+                agora = time.monotonic()
+                espera = self._proxima - agora
+                self._proxima = max(agora, self._proxima) + self.intervalo
+            if espera > 0:
+                time.sleep(espera)
+        return super().request(*args, **kwargs)
+
+def unidades_do_shard(indice, total):
+    return sorted(CODIGO_PARA_UNIDADE)[indice::total]
+
+class ShardLize(LizeManager):
+    """
+    Sincroniza apenas as unidades do shard. Cada unidade é protegida por um advisory lock
+    de sessão; unidades já travadas por outra execução (cron sobreposto, outro host) são
+    puladas em vez de processadas em dobro.
+    """
+    def __init__(self, unidades, limite_rps=LIMITE_RPS_SHARD, orfaos=False):
+        super().__init__()
+        self.unidades = list(unidades)
+        # Matrículas cujo prefixo não é código de unidade ficam com um único shard (lock 0)
+        self.orfaos = orfaos
+        self.unidades_travadas = []
+        self._conn_lock = None
+        if limite_rps:
+            self.cliente = ClienteLize(max_conexoes=20, disjuntor=self.disjuntor, sessao=SessaoComLimite(limite_rps))
+            self.session = self.cliente.sessao
+
+    def travar_unidades(self):
+        # A conexão fica aberta durante todo o shard: fechar libera os locks
+        self._conn_lock = psycopg2.connect(**DB_CONFIG)
+        self._conn_lock.autocommit = True
+        with self._conn_lock.cursor() as cur:
+            if self.orfaos:
+                cur.execute("SELECT pg_try_advisory_lock(%s, 0)", (NAMESPACE_LOCK,))
+                self.orfaos = cur.fetchone()[0]
+            for codigo in self.unidades:
+                cur.execute("SELECT pg_try_advisory_lock(%s, %s)", (NAMESPACE_LOCK, int(codigo)))
+                if cur.fetchone()[0]:
+                    self.unidades_travadas.append(codigo)
+                else:
+                    logging.warning(f"SHARD | Unidade {codigo} em uso por outra execução, pulando.")
+        return self.unidades_travadas
+
+    def liberar_unidades(self):
+        if self._conn_lock is not None:
+            self._conn_lock.close()
+            self._conn_lock = None
+
+    def _do_shard(self, codigo, unidades):
+        return codigo in unidades or (self.orfaos and codigo not in CODIGO_PARA_UNIDADE)
+
+    def processar_shard(self, preparar=True, descartar_diario=True):
+        try:
+            if not self.travar_unidades():
+                return self.exportar_stats()
+            # Como no processar: o diff completo refaz tudo o que estava no diário. Em
+            # executar_shards os processos dividem o mesmo arquivo e quem descarta é o pai
+            if descartar_diario:
+                self.diario.descartar()
+            if preparar:
+                self.preparar()
+            unidades = set(self.unidades_travadas)
+            alunos_fonte = self.carregar_fonte()
+            # Unidade fora do CODIGO_PARA_UNIDADE fica com o shard dos órfãos, como no cache: o
+            # processar reporta esses alunos como turma ausente (ou desativa) e o shard também
+            alunos_shard = [a for a in alunos_fonte
+                            if self._do_shard(str(a[0]).strip().zfill(2), unidades)]
+            # O diff usa o cache inteiro: aluno transferido para uma unidade fora do prefixo da
+            # matrícula ainda tem estado (e id) no cache e não pode ser planejado como inserção
+            estado_local = self.carregar_estado_local()
+            # Candidatos a fantasma do shard: matrícula começa pelo código da unidade
+            candidatos = {m: d for m, d in estado_local.items() if self._do_shard(m[:2], unidades)}
+            logging.info(f"SHARD {sorted(unidades)} | Fonte: {len(alunos_shard)} | Cache: {len(candidatos)}")
+
+            # Fantasmas comparados com a fonte inteira: aluno transferido para unidade de outro shard não é fantasma
+            fantasmas = self.detectar_fantasmas(alunos_fonte, candidatos)
+            upserts = self.sincronizar_alunos(alunos_shard, estado_local, self.carregar_mapa_turmas(), fantasmas)
+            self.persistir_upserts(upserts)
+        finally:
+            self.liberar_unidades()
+        return self.exportar_stats()
+
+    def exportar_stats(self):
+        self.consolidar_stats()
+        return {
+            "unidades": self.unidades_travadas,
+            "trocas": {cat: dict(u) for cat, u in self.stats_trocas.items()},
+            "ausentes": sorted(self.turmas_ausentes),
+        }
+
+def _executar_shard(indice, total, preparar, limite_rps):
+    return ShardLize(unidades_do_shard(indice, total), limite_rps, orfaos=(indice == 0)).processar_shard(
+        preparar=preparar, descartar_diario=False)
+
+def executar_shards(total, limite_rps=LIMITE_RPS_SHARD):
+    """Roda `total` shards em processos paralelos e junta os relatórios."""
+    relatorio = LizeManager()
+    # Os shards juntos refazem o diff de todas as unidades: o diário anterior é descartado
+    # uma vez, antes de abrir os processos (o que eles gravarem fica para o --retomar)
+    relatorio.diario.descartar()
+    # Tabelas, mapa de turmas e carga inicial uma única vez, antes de abrir os shards
+    relatorio.preparar()
+
+    # Cada processo recria o listener de logs (o fork não herda a thread do listener)
+    with ProcessPoolExecutor(max_workers=total, initializer=configurar_logs_processo) as executor:
+        futures = {executor.submit(_executar_shard, i, total, False, limite_rps): i for i in range(total)}
+        for future in as_completed(futures):
+            try:
+                stats = future.result()
+            except Exception as e:
+                logging.error(f"SHARD {futures[future]} FALHOU | {e}")
+                continue
+            logging.info(f"SHARD {futures[future]} concluído | unidades {stats['unidades']}")
+            for categoria, unidades in stats["trocas"].items():
+                for sigla, qtd in unidades.items():
+                    relatorio.stats_trocas[categoria][sigla] += qtd
+            relatorio.turmas_ausentes.update(stats["ausentes"])
+    relatorio.exibir_relatorio()
+
+if __name__ == "__main__":
+    # python shards_lize.py --shards 4      -> 4 processos locais
+    # python shards_lize.py --shard 2/4     -> apenas o shard 2 de 4 (um por host)
+    if len(sys.argv) > 2 and sys.argv[1] == "--shard":
+        indice, total = (int(x) for x in sys.argv[2].split("/"))
+        shard = ShardLize(unidades_do_shard(indice, total), orfaos=(indice == 0))
+        shard.processar_shard()
+        shard.exibir_relatorio()
+    else:
+        executar_shards(int(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[1] == "--shards" else 4)
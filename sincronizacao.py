@@ -0,0 +1,104 @@
+import abc
+import logging
+import time
+import psycopg2
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from constantes import DB_CONFIG, TABELA_ALUNOS_GERAL
+from logs_lize import configurar_logs
+from envio_lize import LizeManager
+from outro_envio import processar_alunos
+
+configurar_logs()
+
+# Linha normalizada da fonte: unidade com 2 dígitos, sit inteiro (None se nulo/inválido), textos sem espaços
+AlunoFonte = namedtuple("AlunoFonte", "unidade sit matricula nome turma")
+
+def _turma_num(turma):
+    try:
+        return int(turma)
+    except (TypeError, ValueError):
+        return 0
+
+def _sit_num(sit):
+    try:
+        return int(sit)
+    except (TypeError, ValueError):
+        return None
+
+def carregar_populacao_fonte(turma_minima=11500):
+    """Lê a tabela geral uma única vez (todas as situações) e normaliza para os destinos."""
+    with psycopg2.connect(**DB_CONFIG) as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT unidade, sit, matricula, nome, turma
+                FROM {TABELA_ALUNOS_GERAL}
+                WHERE turma::NUMERIC >= %s
+            """, (turma_minima,))
+            linhas = cur.fetchall()
+
+    alunos = [
+        AlunoFonte(str(unidade).strip().zfill(2), _sit_num(sit), str(matricula).strip(), str(nome).strip(), str(turma).strip())
+        for unidade, sit, matricula, nome, turma in linhas
+    ]
+    sem_sit = sum(1 for a in alunos if a.sit is None)
+    if sem_sit:
+        logging.warning(f"Fonte: {sem_sit} alunos com sit nula/inválida, ignorados pelos destinos.")
+    return alunos
+
+class AdaptadorDestino(abc.ABC):
+    """Destino plugável: filtra a população normalizada e faz o próprio diff/envio."""
+    nome = "DESTINO"
+
+    def filtrar(self, alunos):
+        return alunos
+
+    @abc.abstractmethod
+    def sincronizar(self, alunos):
+        """Diff/envio dos alunos já filtrados para o destino."""
+
+class AdaptadorLize(AdaptadorDestino):
+    nome = "Lize"
+
+    def filtrar(self, alunos):
+        # Mesmo critério do carregar_fonte: sit NOT IN (2, 4) descarta sit nula
+        return [a for a in alunos if a.sit is not None and a.sit not in (2, 4)]
+
+    def sincronizar(self, alunos):
+        LizeManager().processar(alunos)
+
+class AdaptadorRedacaoOnline(AdaptadorDestino):
+    nome = "Redação Online"
+
+    def filtrar(self, alunos):
+        # Redação Online recebe também sit 2/4 (para remoção), só a partir da turma 11900
+        return [a for a in alunos if a.sit is not None and _turma_num(a.turma) >= 11900]
+
+    def sincronizar(self, alunos):
+        processar_alunos(alunos)
+
+def sincronizar_destinos(adaptadores, alunos=None):
+    """Distribui a mesma população da fonte para todos os destinos, em paralelo."""
+    if alunos is None:
+        alunos = carregar_populacao_fonte()
+    logging.info(f"Fonte lida uma vez: {len(alunos)} alunos para {len(adaptadores)} destinos.")
+
+    def executar(adaptador):
+        inicio = time.monotonic()
+        adaptador.sincronizar(adaptador.filtrar(alunos))
+        return time.monotonic() - inicio
+
+    falhas = 0
+    with ThreadPoolExecutor(max_workers=len(adaptadores)) as executor:
+        futures = {executor.submit(executar, a): a for a in adaptadores}
+        for future in as_completed(futures):
+            adaptador = futures[future]
+            try:
+                logging.info(f"DESTINO OK | {adaptador.nome} | {future.result():.1f}s")
+            except Exception as e:
+                falhas += 1
+                logging.error(f"DESTINO FALHOU | {adaptador.nome} | {e}")
+    return falhas == 0
+
+if __name__ == "__main__":
+    sincronizar_destinos([AdaptadorLize(), AdaptadorRedacaoOnline()])
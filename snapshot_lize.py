@@ -0,0 +1,94 @@
+import sys
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from urllib.parse import urlencode
+from constantes import SNAPSHOT_LIZE, SNAPSHOT_MAX_IDADE_S
+
+SQL_CRIAR = """
+CREATE TABLE IF NOT EXISTS capturas (
+    id INTEGER PRIMARY KEY, ambiente TEXT, caminho TEXT, consulta TEXT,
+    capturado_em REAL, paginas INTEGER, bytes INTEGER, UNIQUE (ambiente, caminho, consulta)
+);
+CREATE TABLE IF NOT EXISTS paginas (
+    captura INTEGER, ordem INTEGER, conteudo BLOB, PRIMARY KEY (captura, ordem)
+);
+"""
+
+def consulta_canonica(params):
+    # Mesmos filtros em qualquer ordem caem na mesma captura; limit/offset são da paginação
+    return urlencode(sorted((k, str(v)) for k, v in (params or {}).items() if k not in ("limit", "offset")))
+
+class SnapshotLize:
+    """
+    Cópia local (SQLite) das páginas de listagens do portal. O ClienteLize grava aqui as
+    varreduras completas chamadas com `max_idade` (paginar / paginar_offsets sem erro de
+    página) e, se a captura tiver até `max_idade` segundos, responde daqui sem tocar na API.
+    As páginas ficam como o JSON original comprimido com zlib: decodificar_alunos /
+    carregar_json leem o conteúdo devolvido como leriam o response.content.
+    """
+    def __init__(self, caminho=SNAPSHOT_LIZE):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        with self._conectar() as conn:
+            conn.executescript(SQL_CRIAR)
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho, timeout=30)
+
+    def gravar(self, ambiente, caminho, params, paginas):
+        """Substitui a captura de (ambiente, caminho, filtros) pelas páginas (bytes) informadas."""
+        compactadas = [zlib.compress(p, 6) for p in paginas]
+        with self._lock, self._conectar() as conn:
+            chave = (ambiente, caminho, consulta_canonica(params))
+            conn.execute("DELETE FROM paginas WHERE captura IN (SELECT id FROM capturas WHERE ambiente = ? AND caminho = ? AND consulta = ?)", chave)
+            conn.execute("DELETE FROM capturas WHERE ambiente = ? AND caminho = ? AND consulta = ?", chave)
+            captura = conn.execute("INSERT INTO capturas (ambiente, caminho, consulta, capturado_em, paginas, bytes) VALUES (?, ?, ?, ?, ?, ?)",
+                                   chave + (time.time(), len(compactadas), sum(map(len, compactadas)))).lastrowid
+            conn.executemany("INSERT INTO paginas (captura, ordem, conteudo) VALUES (?, ?, ?)",
+                             ((captura, i, c) for i, c in enumerate(compactadas)))
+        logging.info(f"Snapshot: {caminho} [{consulta_canonica(params)}] gravado ({len(compactadas)} páginas, "
+                     f"{sum(map(len, compactadas)) / 1e6:.1f} MB).")
+
+    def ler(self, ambiente, caminho, params, max_idade):
+        """Páginas (bytes) da captura se ela tiver no máximo max_idade segundos; senão None."""
+        with self._conectar() as conn:
+            linha = conn.execute("SELECT id, capturado_em FROM capturas WHERE ambiente = ? AND caminho = ? AND consulta = ?",
+                                 (ambiente, caminho, consulta_canonica(params))).fetchone()
+            if not linha or time.time() - linha[1] > max_idade:
+                return None
+            paginas = [zlib.decompress(r[0]) for r in
+                       conn.execute("SELECT conteudo FROM paginas WHERE captura = ? ORDER BY ordem", (linha[0],))]
+        logging.info(f"Snapshot: {caminho} [{consulta_canonica(params)}] lido do disco "
+                     f"(capturado há {(time.time() - linha[1]) / 60:.0f} min, {len(paginas)} páginas).")
+        return paginas
+
+    def capturas(self):
+        """(ambiente, caminho, filtros, capturado_em, páginas, bytes) de cada captura guardada."""
+        with self._conectar() as conn:
+            return conn.execute("SELECT ambiente, caminho, consulta, capturado_em, paginas, bytes FROM capturas ORDER BY capturado_em DESC").fetchall()
+
+def max_idade_argv(padrao=SNAPSHOT_MAX_IDADE_S):
+    """Idade máxima (s) aceita pelo script: "--max-idade MIN" na linha de comando (0 = sempre da API)."""
+    if "--max-idade" in sys.argv[:-1]:
+        return int(sys.argv[sys.argv.index("--max-idade") + 1]) * 60
+    return padrao
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+def obter_snapshot():
+    """Snapshot do processo (None se LIZE_SNAPSHOT estiver vazio)."""
+    global _snapshot
+    if not SNAPSHOT_LIZE:
+        return None
+    with _snapshot_lock:
+        if _snapshot is None:
+            try:
+                _snapshot = SnapshotLize()
+            except sqlite3.Error as e:
+                logging.warning(f"Snapshot indisponível ({SNAPSHOT_LIZE}): {e}")
+                return None
+        return _snapshot
@@ -0,0 +1,11 @@
+from gravador_lote import sql_upsert
+
+# Upserts das tabelas locais da Lize, compartilhados entre o envio_lize e os scripts
+# avulsos (criar_turmas, auditoria_lize, reconciliacao_lize) sem importar o LizeManager
+
+COLUNAS_ALUNOS_LIZE = ["id", "nome", "matricula", "email", "classes", "ativo", "ano_letivo", "hash_estado"]
+SQL_UPSERT_TURMAS = sql_upsert("turmas_lize", ["id", "nome", "coordination", "school_year"], "id", ["nome", "coordination"])
+SQL_UPSERT_CACHE_ALUNOS = sql_upsert("alunos_lize", COLUNAS_ALUNOS_LIZE, ["matricula", "ano_letivo"],
+                                     ["id", "nome", "classes", "ativo", "hash_estado"])
+SQL_UPSERT_SYNC_ALUNOS = sql_upsert("alunos_lize", COLUNAS_ALUNOS_LIZE, ["matricula", "ano_letivo"],
+                                    ["nome", "ativo", "classes", "hash_estado"])
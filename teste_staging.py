@@ -1,14 +1,17 @@
-import psutil
-import requests
 import psycopg2
 from datetime import datetime
-from psycopg2.extras import execute_batch
+from psycopg2.extras import execute_values
 from constantes2 import HEADERS, DB_CONFIG, CODIGO_PARA_UNIDADE, COORDINATION_IDS, TABELA_ALUNOS_GERAL
+from gravador_lote import GravadorLote, sql_upsert
+from cliente_lize import ClienteLize
 
 class AlunoProcessor:
     def __init__(self):
+        self.cliente = ClienteLize("staging", headers=HEADERS)
         self.alunos_cache = {}
         self.turmas_cache = {}
+        # Mudanças de status acumuladas para um único UPDATE (gravar_status_pendentes)
+        self.status_pendentes = {}
         
     def criar_tabelas(self):
         """Cria tabelas no banco de dados se não existirem"""
@@ -33,7 +36,7 @@ class AlunoProcessor:
         dados, pagina = [], 1
         while url:
             print(f"🔄 Obtendo {tipo_dado} da página {pagina}...")
-            response = requests.get(url, headers=HEADERS)
+            response = self.cliente.get(url)
             if response.status_code == 200:
                 data = response.json()
                 dados.extend(data.get("results", []))
@@ -46,41 +49,25 @@ class AlunoProcessor:
         return dados
 
     def persistir_dados_em_lote(self, tabela, dados, colunas, conflito):
-        """Persiste dados em lotes com gerenciamento dinâmico de memória"""
+        """Persiste dados em lotes dimensionados pelo orçamento de memória (GravadorLote)"""
         if not dados: return
         
         try:
-            batch_size = 1000 if psutil.virtual_memory().percent < 70 else 500
-            print(f"🔧 Batch size: {batch_size} | RAM: {psutil.virtual_memory().percent}%")
-
             with psycopg2.connect(**DB_CONFIG) as conexao, conexao.cursor() as cursor:
-                placeholders = ", ".join(["%s"] * len(colunas))
-                update_set = ", ".join(f"{c} = EXCLUDED.{c}" for c in colunas if c != conflito)
-                query = f"""INSERT INTO {tabela} ({", ".join(colunas)}) VALUES ({placeholders})
-                          ON CONFLICT ({conflito}) DO UPDATE SET {update_set};"""
-
-                for i in range(0, len(dados), batch_size):
-                    if i > 0 and i % (5 * batch_size) == 0:
-                        batch_size = 1000 if psutil.virtual_memory().percent < 70 else 500
-                    
-                    batch = dados[i:i + batch_size]
-                    valores = [(
+                with GravadorLote(cursor, sql_upsert(tabela, colunas, conflito), tabela,
+                                  chave=(colunas.index(conflito),)) as gravador:
+                    gravador.adicionar_varios((
                         dado.get("id"), dado.get("name"), dado.get("enrollment_number"),
                         dado.get("email"), [str(c["id"]) for c in dado.get("classes", [])],
                         dado.get("is_active", True)
                     ) if tabela == "alunos_lize_teste" else (
                         dado.get("id"), dado.get("name"), 
                         dado.get("coordination"), dado.get("school_year")
-                    ) for dado in batch]
-
-                    execute_batch(cursor, query, valores)
-                    conexao.commit()
-                    print(f"✅ Lote {i//batch_size + 1} persistido - {len(batch)} registros")
-                
-                print(f"✅ Todos os dados persistidos na tabela {tabela}")
+                    ) for dado in dados)
+                conexao.commit()
+                print(f"✅ Todos os dados persistidos na tabela {tabela} | {gravador.resumo()}")
         except Exception as e:
             print(f"❌ Erro ao persistir dados em lote: {e}")
-            if 'conexao' in locals(): conexao.rollback()
 
     def obter_alunos_banco(self):
         """Gera alunos do banco local em streaming"""
@@ -151,13 +138,12 @@ class AlunoProcessor:
 
         email_gerado = f"{matricula}@alunos.smrede.com.br"
         if not aluno_info:
-            if self.inserir_aluno(nome, matricula, email_gerado):
-                aluno_id = self.obter_id_aluno_por_matricula(matricula)
-                if aluno_id:
-                    self.alunos_cache[matricula] = {
-                        'id': aluno_id, 'nome': nome, 'email': email_gerado,
-                        'ativo': True, 'classes': []
-                    }
+            aluno_id = self.inserir_aluno(nome, matricula, email_gerado)
+            if aluno_id:
+                self.alunos_cache[matricula] = {
+                    'id': aluno_id, 'nome': nome, 'email': email_gerado,
+                    'ativo': True, 'classes': []
+                }
         elif aluno_info['nome'] != nome or aluno_info['email'] != email_gerado:
             if self.atualizar_aluno(aluno_info['id'], nome, matricula, email_gerado):
                 self.alunos_cache[matricula].update({'nome': nome, 'email': email_gerado})
@@ -176,9 +162,9 @@ class AlunoProcessor:
     def processar_alunos(self):
         """Processa todos os alunos"""
         print("⏳ Iniciando coleta de dados...")
-        alunos_api = self.obter_dados_api("https://staging.lizeedu.com.br/api/v2/students/", "alunos")
+        alunos_api = self.obter_dados_api("students/", "alunos")
         turmas_api = self.obter_dados_api(
-            f"https://staging.lizeedu.com.br/api/v2/classes/?school_year={datetime.now().year}", "turmas")
+            f"classes/?school_year={datetime.now().year}", "turmas")
         
         print("⏳ Persistindo dados da API...")
         self.persistir_dados_em_lote("alunos_lize_teste", alunos_api, 
@@ -197,6 +183,7 @@ class AlunoProcessor:
         
         tempo_inicio = datetime.now()
         contador = sum(1 for aluno in alunos_banco if self.processar_aluno(*aluno))
+        self.gravar_status_pendentes()
         
         tempo_total = (datetime.now() - tempo_inicio).total_seconds()
         print(f"\n✅ Processamento concluído!\n• Alunos processados: {contador}\n"
@@ -205,29 +192,30 @@ class AlunoProcessor:
 
     # Métodos auxiliares
     def obter_id_aluno_por_matricula(self, matricula):
-        try:
-            with psycopg2.connect(**DB_CONFIG) as conexao, conexao.cursor() as cursor:
-                cursor.execute("SELECT id FROM alunos_lize_teste WHERE matricula = %s;", (matricula,))
-                return cursor.fetchone()[0] if cursor.rowcount > 0 else None
-        except Exception as e:
-            print(f"❌ Erro ao buscar ID do aluno: {e}")
-            return None
+        aluno_info = self.alunos_cache.get(matricula)
+        return aluno_info['id'] if aluno_info else None
 
     def atualizar_status_aluno_local(self, id_aluno, status, nome_aluno):
+        """Registra a mudança; o banco é atualizado em lote por gravar_status_pendentes"""
+        self.status_pendentes[id_aluno] = status
+
+    def gravar_status_pendentes(self):
+        if not self.status_pendentes: return
         try:
             with psycopg2.connect(**DB_CONFIG) as conexao, conexao.cursor() as cursor:
-                cursor.execute("UPDATE alunos_lize_teste SET ativo = %s WHERE id = %s;", 
-                             (status, id_aluno))
+                execute_values(cursor, """UPDATE alunos_lize_teste AS a SET ativo = v.ativo
+                                          FROM (VALUES %s) AS v(id, ativo) WHERE a.id = v.id;""",
+                               list(self.status_pendentes.items()))
                 conexao.commit()
-                print(f"✅ Status do aluno {nome_aluno} atualizado para {'ativo' if status else 'inativo'}.")
+                print(f"✅ Status de {len(self.status_pendentes)} alunos atualizado no banco local.")
+            self.status_pendentes.clear()
         except Exception as e:
-            print(f"❌ Erro ao atualizar status do aluno {nome_aluno}: {e}")
+            print(f"❌ Erro ao atualizar status dos alunos no banco local: {e}")
 
     def atualizar_aluno(self, aluno_id, nome, matricula, email):
         """Atualiza os dados de um aluno na API do Lize"""
-        url = f"https://staging.lizeedu.com.br/api/v2/students/{aluno_id}/"
         data = {"name": nome, "enrollment_number": matricula, "email": email}
-        response = requests.put(url, headers=HEADERS, json=data)
+        response = self.cliente.put(f"students/{aluno_id}/", json=data)
         
         if response.status_code == 200:
             print(f"✅ Aluno {nome} atualizado com sucesso!")
@@ -240,18 +228,18 @@ class AlunoProcessor:
         aluno_nome = self.alunos_cache.get(student_id, {}).get('nome', 'Desconhecido')
         turma_nome = next((k[1] for k, v in self.turmas_cache.items() if school_class_id in v), 'Desconhecida')
         
-        response = requests.post(
-            f"https://staging.lizeedu.com.br/api/v2/students/{student_id}/set_classes/",
-            headers=HEADERS, json={"school_classes": [str(school_class_id)]})
+        response = self.cliente.post(
+            f"students/{student_id}/set_classes/",
+            json={"school_classes": [str(school_class_id)]})
         
         if response.status_code == 200:
             print(f"✅ Aluno {aluno_nome} associado à turma {turma_nome} com sucesso!")
         return response.status_code == 200
 
     def desativar_aluno(self, id_aluno, nome_aluno, matricula):
-        response = requests.post(
-            f"https://staging.lizeedu.com.br/api/v2/students/{id_aluno}/disable/",
-            headers=HEADERS, json={})
+        response = self.cliente.post(
+            f"students/{id_aluno}/disable/",
+            json={})
         
         if response.status_code in [200, 204]:
             print(f"❌ Aluno {nome_aluno} desativado com sucesso!")
@@ -262,9 +250,9 @@ class AlunoProcessor:
             return False
 
     def ativar_aluno(self, id_aluno, nome_aluno, matricula):
-        response = requests.post(
-            f"https://staging.lizeedu.com.br/api/v2/students/{id_aluno}/enable/",
-            headers=HEADERS, json={})
+        response = self.cliente.post(
+            f"students/{id_aluno}/enable/",
+            json={})
         
         if response.status_code in [200, 204]:
             print(f"✅ Aluno {nome_aluno} ativado com sucesso!")
@@ -275,10 +263,11 @@ class AlunoProcessor:
             return False
 
     def inserir_aluno(self, nome, matricula, email):
-        response = requests.post(
-            "https://staging.lizeedu.com.br/api/v2/students/",
-            headers=HEADERS, json={"name": nome, "enrollment_number": matricula, "email": email})
-        return response.status_code == 201
+        response = self.cliente.post(
+            "students/",
+            json={"name": nome, "enrollment_number": matricula, "email": email})
+        # O id volta na própria resposta; dispensa nova consulta ao banco
+        return response.json().get("id") if response.status_code == 201 else None
 
 if __name__ == "__main__":
     processor = AlunoProcessor()